@@ -1,44 +1,68 @@
 #!/usr/bin/env python
 
+import os
+import sys
 import json
-import yaml
-
-def u_constrt(loader, node):
-    return node.value
-def io_constrt(loader, node):
-    value = loader.construct_mapping(node)
-    return value
-def list_constrt(loader, node):
-    value = loader.construct_mapping(node)
-    return value
-def obj_constrt(loader, node):
-    value = loader.construct_mapping(node)
-    return value
-def str_constrt(loader, node):
-    return node.value
-def vec3_constrt(loader, node):
-    return node.value
-def color_constrt(loader, node):
-    return node.value
-yaml.add_constructor('!u', u_constrt)
-yaml.add_constructor('!io', io_constrt)
-yaml.add_constructor('!color', color_constrt)
-yaml.add_constructor('!list', list_constrt)
-yaml.add_constructor('!obj', obj_constrt)
-yaml.add_constructor('!str64', str_constrt)
-yaml.add_constructor('!str32', str_constrt)
-yaml.add_constructor('!str256', str_constrt)
-yaml.add_constructor('!vec3', vec3_constrt)
-
-def area_data_json():
-    with open('Ecosystem/AreaData.yml','r') as f:
-        data = yaml.load(f, Loader=yaml.FullLoader)
-    json.dump(data, open('area_data.json','w'))
-
-
-def climate_data_json():
-    with open('WorldMgr/normal.winfo.yml','r') as f:
-        data = yaml.load(f, Loader=yaml.FullLoader)
+import shutil
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tools'))
+from yaml_loader import load_yaml
+import json_stream
+from json_stream import JsonWriter, open_atomic
+
+
+def area_data_json(pretty=False):
+    data = load_yaml('Ecosystem/AreaData.yml')
+    # Keys sorted; the byte range of every area is kept for the shards
+    offsets = {}
+    with open_atomic('area_data.json') as f:
+        w = JsonWriter(f, pretty)
+        w.begin_object()
+        for layer in sorted(data):
+            w.key(layer)
+            w.begin_object()
+            for area in sorted(data[layer]):
+                offsets[(layer, area)] = w.member(area, data[layer][area])
+            w.end_object()
+        w.end_object()
+    area_data_shards(data, offsets)
+
+
+def area_data_shards(data, offsets, out_dir='area_data'):
+    # One file per layer/area, named by content hash so unchanged areas keep
+    #   their URL across data updates, plus a manifest:
+    #   {layer: {area: {path, hash, size, offset, length}}}
+    #   where offset/length locate the same area inside area_data.json.
+    tmp_dir = f'{out_dir}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    manifest = {}
+    for (layer, area), (start, end) in offsets.items():
+        text = json.dumps(data[layer][area], separators=(',', ':'), sort_keys=True).encode()
+        digest = hashlib.sha256(text).hexdigest()[:16]
+        path = f'{layer}/{area}.{digest}.json'
+        os.makedirs(os.path.join(tmp_dir, layer), exist_ok=True)
+        with open(os.path.join(tmp_dir, path), 'wb') as f:
+            f.write(text)
+        manifest.setdefault(layer, {})[str(area)] = {
+            'path': path,
+            'hash': digest,
+            'size': len(text),
+            'offset': start,
+            'length': end - start,
+        }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json_stream.dump(manifest, f)
+    # Swap the whole directory so the manifest never points at missing shards
+    if os.path.exists(out_dir):
+        os.rename(out_dir, f'{out_dir}.old')
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(f'{out_dir}.old', ignore_errors=True)
+
+
+def climate_data_json(pretty=False):
+    data = load_yaml('WorldMgr/normal.winfo.yml')
 
     climate_data = {}
 
@@ -58,12 +82,15 @@ def climate_data_json():
             'height': z,
         }
         for key, value in val.items():
-            if key == "FeatureColor":
-                #print(val2[0].value)
-                value = [v.value for v in value]
             climate_data[name][key] = value
 
-    json.dump(climate_data, open('climate_data.json','w'))
+    with open_atomic('climate_data.json') as f:
+        json_stream.dump(climate_data, f, pretty)
+
+
+parser = argparse.ArgumentParser(description='Generate area_data.json and climate_data.json')
+parser.add_argument('--pretty', action='store_true', help='indent the output for diffing')
+args = parser.parse_args()
 
-area_data_json()
-climate_data_json()
+area_data_json(args.pretty)
+climate_data_json(args.pretty)
@@ -1,51 +1,15 @@
 #!/usr/bin/env python3
 
 import os
-import yaml
+import sys
 import json
 import glob
+import argparse
 
-
-def u_constrt(loader, node):
-    return node.value
-
-
-def io_constrt(loader, node):
-    value = loader.construct_mapping(node)
-    return value
-
-
-def list_constrt(loader, node):
-    value = loader.construct_mapping(node)
-    return value
-
-
-def obj_constrt(loader, node):
-    value = loader.construct_mapping(node)
-    return value
-
-
-def str_constrt(loader, node):
-    return node.value
-
-
-def vec3_constrt(loader, node):
-    return node.value
-
-
-def color_constrt(loader, node):
-    return node.value
-
-
-yaml.add_constructor("!u", u_constrt)
-yaml.add_constructor("!io", io_constrt)
-yaml.add_constructor("!color", color_constrt)
-yaml.add_constructor("!list", list_constrt)
-yaml.add_constructor("!obj", obj_constrt)
-yaml.add_constructor("!str64", str_constrt)
-yaml.add_constructor("!str32", str_constrt)
-yaml.add_constructor("!str256", str_constrt)
-yaml.add_constructor("!vec3", vec3_constrt)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools"))
+from parse_cache import load_yaml, cache
+from parallel import add_jobs_argument, map_chunked
+import profiling
 
 
 def is_npc(name):
@@ -97,36 +61,27 @@ def get_value(data, names):
     return v
 
 
-meta = {}
-
-
-def add_meta(name, key, value):
-    if not name in meta:
-        meta[name] = {}
-    meta[name][key] = value
-
-
-for file in glob.glob(f"Actor/ActorLink/*.yml"):
-    with open(file, "r") as f:
-        bdata = yaml.load(f, Loader=yaml.FullLoader)
+def actor_meta(file):
+    """Returns (name, {life, attack}) for an ActorLink file, or None"""
+    bdata = load_yaml(file)
 
     name = os.path.basename(file).replace(".yml", "")
 
     gpar = get_value(bdata, ["param_root", "objects", "LinkTarget", "GParamUser"])
     if gpar == "Dummy" or gpar == "MessageOnly":
-        continue
+        return None
 
-    with open(f"Actor/GeneralParamList/{gpar}.gparamlist.yml", "r") as f:
-        data = yaml.load(f, Loader=yaml.FullLoader)
+    data = load_yaml(f"Actor/GeneralParamList/{gpar}.gparamlist.yml")
 
     enemy = get_value(data, ["param_root", "objects", "Enemy"])
     weapon = get_value(data, ["param_root", "objects", "WeaponCommon"])
     if not enemy and not weapon:
-        continue
+        return None
     aname = get_value(data, ["param_root", "objects", "System", "SameGroupActorName"])
 
     if should_skip(name):
-        continue
+        return None
+    meta = {}
     life = get_value(data, ["param_root", "objects", "General", "Life"])
     if "Enemy_SiteBoss" in file:
         # See https://zeldamods.org/wiki/Difficulty_scaling#Ganon_Blights
@@ -139,9 +94,32 @@ for file in glob.glob(f"Actor/ActorLink/*.yml"):
         else:
             life = "800 - 2000"
     if life:
-        add_meta(name, "life", life)
+        meta["life"] = life
     attack = get_value(data, ["param_root", "objects", "Attack", "Power"])
     if attack:
-        add_meta(name, "attack", attack)
+        meta["attack"] = attack
+    return name, meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate object_meta.json from Actor/ActorLink")
+    add_jobs_argument(parser)
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.start("gen_object_meta", args)
+
+    files = sorted(glob.glob(f"Actor/ActorLink/*.yml"))
+    meta = {}
+    with profiling.phase("actors"):
+        for result in map_chunked(actor_meta, files, args.jobs):
+            if result and result[1]:
+                name, value = result
+                meta[name] = value
+
+    with profiling.phase("write"):
+        json.dump(meta, open("object_meta.json", "w"))
+    cache.report()
+
 
-json.dump(meta, open("object_meta.json", "w"))
+if __name__ == "__main__":
+    main()
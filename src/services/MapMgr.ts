@@ -80,6 +80,7 @@ export class MapMgr {
   }
 
   private infoMainField: any;
+  private dropTablePack: Promise<any> | null = null;
 
   async init() {
     await Promise.all([
@@ -125,7 +126,19 @@ export class MapMgr {
     return fetch(`${GAME_FILES}/ecosystem/beedle_shop_data.json`).then(parse);
   }
 
-  getObjDropTables(unitConfigName: string, tableName: string) {
+  async getObjDropTables(unitConfigName: string, tableName: string) {
+    // drop_tables.json (tools/make_drop_tables.py) first, radar for anything missing
+    if (!this.dropTablePack)
+      this.dropTablePack = fetch(`${GAME_FILES}/drop_tables.json`).then(parse).catch(() => null);
+    const pack = await this.dropTablePack;
+    const tables = pack?.actors[unitConfigName];
+    const index = tables?.[tableName] ?? (tableName == 'Default' ? tables?.[''] : undefined);
+    if (index !== undefined) {
+      const table = pack.tables[index];
+      // Copies: callers adjust the elements in place
+      const items = table.items.map((i: number) => JSON.parse(JSON.stringify(pack.elements[i])));
+      return { ...table, items };
+    }
     return fetch(`${RADAR_URL}/drop/${unitConfigName}/${tableName}`).then(parse);
   }
 
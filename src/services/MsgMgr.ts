@@ -2,6 +2,47 @@ import { GAME_FILES } from '@/util/map';
 
 type File = { [label: string]: string };
 
+/// Decodes values of an interned JSON document (see tools/interned.py) on demand.
+/// The documents in tests/fixtures/interned.json must decode to their "value"
+/// here as with the Python Decoder (tests/test_interned.py).
+export class InternedDecoder {
+  readonly root: any;
+  private affixes: [string, string][];
+  private shapes: string[][];
+  private values: any[];
+  private cache: Map<number, any> = new Map();
+
+  constructor(doc: any) {
+    if (doc.format !== 'interned/1')
+      throw new Error(`unsupported format ${doc.format}`);
+    this.root = doc.root;
+    this.affixes = doc.affixes;
+    this.shapes = doc.shapes;
+    this.values = doc.values;
+  }
+
+  value(ref: number): any {
+    if (this.cache.has(ref))
+      return this.cache.get(ref);
+    const entry = this.values[ref];
+    let out: any = entry;
+    if (Array.isArray(entry)) {
+      if (entry.length && entry[0] < 0) {
+        const keys = this.shapes[-1 - entry[0]];
+        out = {};
+        keys.forEach((key, i) => { out[key] = this.value(entry[i + 1]); });
+      } else {
+        out = entry.map((r: number) => this.value(r));
+      }
+    } else if (entry !== null && typeof entry === 'object') {
+      const [prefix, suffix] = this.affixes[entry.a];
+      out = prefix + entry.s + suffix;
+    }
+    this.cache.set(ref, out);
+    return out;
+  }
+}
+
 export class MsgMgr {
   private static instance: MsgMgr;
   static getInstance() {
@@ -14,10 +55,16 @@ export class MsgMgr {
   private files: Map<string, File> = new Map();
   private climate: any | null = null;
   private area: any | null = null;
+  private areaInterned: InternedDecoder | null = null;
+  // area_data/manifest.json; null when the shards are not available
+  private areaManifest: any | null | undefined = undefined;
+  private areaShards: Map<string, any> = new Map();
   private metadata: any | null = null;
   private hornMaterial: any | null = null;
 
   async init() {
+    if (await this.initFromBundle())
+      return;
     const PREFIX = `${GAME_FILES}/text/`;
     const fileList: string[] = await fetch(PREFIX + 'list.json').then(r => r.json());
     const fileLoadPromises = [];
@@ -33,6 +80,38 @@ export class MsgMgr {
     await Promise.all(fileLoadPromises);
   }
 
+  /// Load all text files and names from the bundle named by
+  /// text_bundle/manifest.json (see tools/msg_gen_list.py).
+  private async initFromBundle(): Promise<boolean> {
+    const PREFIX = `${GAME_FILES}/text_bundle/`;
+    let bundle: any;
+    try {
+      const manifest = await fetch(PREFIX + 'manifest.json', { cache: 'no-cache' });
+      if (!manifest.ok)
+        return false;
+      const { format, bundle: file } = await manifest.json();
+      if (format !== 'text_bundle/2')
+        return false;
+      const res = await fetch(PREFIX + file);
+      if (!res.ok)
+        return false;
+      bundle = await res.json();
+    } catch (e) {
+      return false;
+    }
+    const strings: string[] = bundle.strings;
+    const expand = (doc: { refs: { [key: string]: number }, values: { [key: string]: any } }) => {
+      const out: { [key: string]: any } = { ...doc.values };
+      for (const [key, ref] of Object.entries(doc.refs))
+        out[key] = strings[ref];
+      return out;
+    };
+    for (const [file, doc] of Object.entries(bundle.files))
+      this.files.set(file, Object.freeze(expand(doc as any)));
+    this.names = expand(bundle.names);
+    return true;
+  }
+
   private getFile(file: string) {
     return this.files.get(file);
   }
@@ -42,10 +121,53 @@ export class MsgMgr {
     return f === undefined ? "???" : f[label];
   }
 
+  /// One area from its area_data/<layer>/<area>.<hash>.json shard (see
+  /// gen_climate_data.py). Returns null when the shards cannot be used.
+  private async getAreaShard(layer: string, item: number): Promise<{ area: any } | null> {
+    if (this.areaManifest === undefined) {
+      try {
+        const res = await fetch(`${GAME_FILES}/area_data/manifest.json`, { cache: 'no-cache' });
+        this.areaManifest = res.ok ? await res.json() : null;
+      } catch (e) {
+        this.areaManifest = null;
+      }
+    }
+    if (!this.areaManifest)
+      return null;
+    const entry = this.areaManifest[layer]?.[String(item)];
+    if (!entry)
+      return { area: undefined };
+    if (!this.areaShards.has(entry.path)) {
+      try {
+        const res = await fetch(`${GAME_FILES}/area_data/${entry.path}`);
+        if (!res.ok)
+          return null;
+        this.areaShards.set(entry.path, await res.json());
+      } catch (e) {
+        return null;
+      }
+    }
+    return { area: this.areaShards.get(entry.path) };
+  }
+
   async getAreaData(layer: string, item: number) {
-    if (!this.area) {
-      const res = await fetch(`${GAME_FILES}/area_data.json`);
-      this.area = await res.json();
+    if (!this.area && !this.areaInterned) {
+      const shard = await this.getAreaShard(layer, item);
+      if (shard)
+        return shard.area;
+    }
+    if (!this.area && !this.areaInterned) {
+      const res = await fetch(`${GAME_FILES}/area_data.interned.json`);
+      if (res.ok) {
+        this.areaInterned = new InternedDecoder(await res.json());
+      } else {
+        const res = await fetch(`${GAME_FILES}/area_data.json`);
+        this.area = await res.json();
+      }
+    }
+    if (this.areaInterned) {
+      const ref = this.areaInterned.root[layer]?.[item];
+      return ref === undefined ? undefined : this.areaInterned.value(ref);
     }
     if (this.area) {
       return this.area[layer][item];//.find((val: any) => val.AreaNumber == item);
@@ -0,0 +1,206 @@
+# BYML writer for the tests; the shipped tools only read BYML.
+
+import struct
+
+from byml import (
+    ARRAY,
+    BINARY,
+    BOOL,
+    CONTAINERS,
+    DICT,
+    DOUBLE,
+    FLOAT,
+    HASH32,
+    HASH64,
+    INT,
+    INT64,
+    LONG,
+    NULL,
+    STRING,
+    STRING_TABLE,
+    UINT,
+    UINT64,
+    _f32,
+)
+
+
+class F32Bits(int):
+    """A FLOAT node holding these raw bits"""
+
+
+class Writer:
+    """Minimal v2 - v7 writer for the test fixtures"""
+
+    def __init__(self, version, endian):
+        self.version = version
+        self.endian = endian
+        self.out = bytearray()
+
+    def pack(self, fmt, *values):
+        return struct.pack(self.endian + fmt, *values)
+
+    def u24(self, value):
+        return value.to_bytes(3, "big" if self.endian == ">" else "little")
+
+    def collect(self, obj, keys, strings):
+        if isinstance(obj, dict):
+            for k, v in obj.items():
+                if isinstance(k, str):
+                    keys.add(k)
+                self.collect(v, keys, strings)
+        elif isinstance(obj, list):
+            for v in obj:
+                self.collect(v, keys, strings)
+        elif isinstance(obj, str):
+            strings.add(obj)
+
+    def string_table(self, values):
+        data = bytearray()
+        offsets = []
+        head = 4 + 4 * (len(values) + 1)
+        for s in values:
+            offsets.append(head + len(data))
+            data += s.encode("utf-8") + b"\0"
+        offsets.append(head + len(data))
+        out = bytes([STRING_TABLE]) + self.u24(len(values)) + self.pack(f"{len(offsets)}I", *offsets) + data
+        return out + b"\0" * (-len(out) % 4)
+
+    def kind(self, value):
+        if isinstance(value, dict):
+            if value and all(isinstance(k, int) for k in value):
+                return HASH32 if max(value) < 1 << 32 else HASH64
+            return DICT
+        if isinstance(value, list):
+            return ARRAY
+        if isinstance(value, str):
+            return STRING
+        if isinstance(value, bool):
+            return BOOL
+        if isinstance(value, F32Bits):
+            return FLOAT
+        if value is None:
+            return NULL
+        if isinstance(value, bytes):
+            return BINARY
+        if isinstance(value, float):
+            try:
+                bits = struct.unpack("<I", struct.pack("<f", value))[0]
+            except OverflowError:
+                return DOUBLE
+            return FLOAT if _f32(bits) == value else DOUBLE
+        if -(1 << 31) <= value < 1 << 31:
+            return INT
+        if 0 <= value < 1 << 32:
+            return UINT
+        return INT64 if value < 1 << 63 else UINT64
+
+    def align(self):
+        self.out += b"\0" * (-len(self.out) % 4)
+
+    def raw(self, kind, value):
+        """The u32 stored in the parent; out of line values are appended"""
+        if kind in CONTAINERS:
+            return self.node(value)
+        if kind == STRING:
+            return self.strings[value]
+        if kind == BOOL:
+            return int(value)
+        if kind == NULL:
+            return 0
+        if kind == FLOAT and isinstance(value, F32Bits):
+            return int(value)
+        if kind == FLOAT:
+            return struct.unpack(self.endian + "I", self.pack("f", value))[0]
+        if kind in (INT, UINT):
+            return value & 0xFFFFFFFF
+        self.align()
+        offset = len(self.out)
+        if kind == BINARY:
+            self.out += self.pack("I", len(value)) + value
+        else:
+            self.out += self.pack(LONG[kind], value)
+        return offset
+
+    def node(self, obj):
+        self.align()
+        offset = len(self.out)
+        kind = self.kind(obj)
+        if kind == ARRAY:
+            values = list(obj)
+            kinds = [self.kind(v) for v in values]
+            self.out += bytes([ARRAY]) + self.u24(len(values)) + bytes(kinds)
+            self.align()
+            slots = len(self.out)
+            self.out += bytes(4 * len(values))
+            for i, (k, v) in enumerate(zip(kinds, values)):
+                self.out[slots + 4 * i : slots + 4 * i + 4] = self.pack("I", self.raw(k, v))
+        elif kind == DICT:
+            items = sorted(obj.items(), key=lambda kv: kv[0].encode("utf-8"))
+            self.out += bytes([DICT]) + self.u24(len(items)) + bytes(8 * len(items))
+            for i, (key, v) in enumerate(items):
+                k = self.kind(v)
+                entry = self.u24(self.keys[key]) + bytes([k]) + self.pack("I", self.raw(k, v))
+                self.out[offset + 4 + 8 * i : offset + 12 + 8 * i] = entry
+        else:
+            items = sorted(obj.items())
+            key_format = "I" if kind == HASH32 else "Q"
+            stride = struct.calcsize(key_format) + 4
+            kinds = [self.kind(v) for _, v in items]
+            self.out += bytes([kind]) + self.u24(len(items)) + bytes(stride * len(items)) + bytes(kinds)
+            for i, ((key, v), k) in enumerate(zip(items, kinds)):
+                pos = offset + 4 + stride * i
+                self.out[pos : pos + stride] = self.pack(key_format + "I", key, self.raw(k, v))
+        return offset
+
+    def dumps(self, obj):
+        keys, strings = set(), set()
+        self.collect(obj, keys, strings)
+        keys = sorted(keys, key=str.encode)
+        strings = sorted(strings, key=str.encode)
+        self.keys = {k: i for i, k in enumerate(keys)}
+        self.strings = {s: i for i, s in enumerate(strings)}
+        self.out += (b"BY" if self.endian == ">" else b"YB") + self.pack("H", self.version) + bytes(12)
+        key_offset = len(self.out) if keys else 0
+        self.out += self.string_table(keys) if keys else b""
+        string_offset = len(self.out) if strings else 0
+        self.out += self.string_table(strings) if strings else b""
+        root = self.node(obj) if obj is not None else 0
+        self.out[4:16] = self.pack("III", key_offset, string_offset, root)
+        return bytes(self.out)
+
+
+def dumps(obj, version=7, big_endian=False):
+    """Serializes dicts (str keys, or int keys for hash dicts), lists and scalars"""
+    return Writer(version, ">" if big_endian else "<").dumps(obj)
+
+
+FIXTURES = {
+    "scalars": {
+        "Bool": True,
+        "Int": -2,
+        "UInt": 3_000_000_000,
+        "Int64": -(1 << 40),
+        "UInt64": (1 << 63) + 5,
+        "Float": 0.5,
+        "InexactFloat": 0.1,
+        "Double": 1e300,
+        "Null": None,
+        "Binary": b"\0\1\2",
+        "String": "Work/Location/Dungeon000.game__location__Location.gyml",
+        "Unicode": "ハイラル",
+    },
+    "nested": {"A": [1, [2, [3, {"B": []}]], {}], "C": {"D": {"E": "x"}}},
+    "hashes": {"H32": {1: "a", 0xFFFFFFFF: [1]}, "H64": {1 << 40: 1.5, 7: None}},
+    "locationarea": {
+        "Shrine": [
+            {
+                "InstanceID": [(1 << 63) + 1, 42],
+                "LocationName": "Work/Location/Dungeon001.game__location__Location.gyml",
+                "Trans": [[1.5, 2.25, -3.0999999], [-1254.8, 130.0, 2019.2]],
+                "TargetZoomLevel": ["Far", "Middle"],
+            }
+        ],
+        "Stable": [],
+    },
+    "array_root": [1, "x", [], {"k": False}],
+}
@@ -0,0 +1,77 @@
+# MSBT writer for the tests; the shipped tools only read MSBT.
+
+import struct
+
+from msbt import MAGIC, TAG, TAG_END
+
+
+def label_hash(label, groups):
+    h = 0
+    for c in label.encode("utf-8"):
+        h = (h * 0x492 + c) & 0xFFFFFFFF
+    return h % groups
+
+
+def dumps(entries, big_endian=False, groups=101):
+    """Builds an MSBT from {label: contents}"""
+    endian = ">" if big_endian else "<"
+    codec = "utf-16-be" if big_endian else "utf-16-le"
+
+    def section(magic, data):
+        out = magic + struct.pack(endian + "I", len(data)) + bytes(8) + data
+        return out + b"\xab" * (-len(out) % 16)
+
+    labels = list(entries)
+    buckets = [[] for _ in range(groups)]
+    for index, label in enumerate(labels):
+        buckets[label_hash(label, groups)].append((label, index))
+    table = bytearray(struct.pack(endian + "I", groups))
+    body = bytearray()
+    for bucket in buckets:
+        table += struct.pack(endian + "II", len(bucket), 4 + 8 * groups + len(body))
+        for label, index in bucket:
+            name = label.encode("utf-8")
+            body += bytes([len(name)]) + name + struct.pack(endian + "I", index)
+
+    texts = []
+    for label in labels:
+        data = bytearray()
+        for item in entries[label]:
+            if "text" in item:
+                data += item["text"].encode(codec)
+                continue
+            control = item["control"]
+            if control.get("close"):
+                data += struct.pack(endian + "3H", TAG_END, control["group"], control["type"])
+            else:
+                params = bytes.fromhex(control["params"])
+                data += struct.pack(endian + "4H", TAG, control["group"], control["type"], len(params))
+                data += params + bytes(len(params) % 2)
+        texts.append(bytes(data) + bytes(2))
+    offsets = []
+    pos = 4 + 4 * len(texts)
+    for t in texts:
+        offsets.append(pos)
+        pos += len(t)
+    txt = struct.pack(endian + f"{len(texts) + 1}I", len(texts), *offsets) + b"".join(texts)
+    atr = struct.pack(endian + "II", len(labels), 0)
+
+    sections = section(b"LBL1", bytes(table + body)) + section(b"ATR1", atr) + section(b"TXT2", txt)
+    bom = b"\xfe\xff" if big_endian else b"\xff\xfe"
+    header = MAGIC + bom + struct.pack(endian + "HBBHHI", 0, 1, 3, 3, 0, 0x20 + len(sections)) + bytes(10)
+    return header + sections
+
+
+FIXTURES = {
+    "0001": [{"text": "Ishodag Shrine"}],
+    "Enemy_Bokoblin_Name": [{"text": "Bokoblin"}],
+    "Npc_Color_Name": [
+        {"control": {"group": 0, "type": 3, "params": "ffff"}},
+        {"text": "Red"},
+        {"control": {"group": 0, "type": 3, "close": True}},
+        {"text": " Bokoblin"},
+    ],
+    "Odd_Params": [{"text": "a"}, {"control": {"group": 1, "type": 0, "params": "0a0b0c"}}, {"text": "b"}],
+    "Unicode": [{"text": "ゾナウ é\U0001f600"}],
+    "Empty": [],
+}
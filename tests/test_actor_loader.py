@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+import pack_index
+import parse_cache
+from actor_loader import Actor, ActorLoader, DocumentCache
+
+FILES = {
+    "Component/Base.json": {"A": 1, "Nested": {"x": 1, "y": 2}, "List": [1, 2]},
+    "Component/Mid.json": {"$parent": "Work/Component/Base.gyml", "Nested": {"y": 3}},
+    "Component/Leaf1.json": {"$parent": "Work/Component/Mid.gyml", "Leaf": 1},
+    "Component/Leaf2.json": {"$parent": "Work/Component/Mid.gyml", "Leaf": 2, "List": [3]},
+    "Actor/Enemy.json": {"Components": {"Drop": "Work/Component/Leaf1.gyml"}},
+}
+LEAF1 = {"$parent": "Work/Component/Mid.gyml", "A": 1, "Nested": {"x": 1, "y": 3}, "List": [1, 2], "Leaf": 1}
+LEAF2 = {"$parent": "Work/Component/Mid.gyml", "A": 1, "Nested": {"x": 1, "y": 3}, "List": [3], "Leaf": 2}
+MID = {"$parent": "Work/Component/Base.gyml", "A": 1, "Nested": {"x": 1, "y": 3}, "List": [1, 2]}
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    for name, root in FILES.items():
+        path = tmp_path / "Pack" / "Work" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"RootNode": root}))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pack_index, "index", pack_index.PackIndex("Pack"))
+    monkeypatch.setattr(parse_cache, "cache", parse_cache.ParseCache(tmp_path / "cache", 0, enabled=False))
+    return ActorLoader("Pack/Work", "Pack/ResCom", DocumentCache())
+
+
+def mutate(doc):
+    doc["Nested"]["x"] = 99
+    doc["List"].append(100)
+    doc["New"] = True
+    del doc["A"]
+
+
+def test_resolved(loader):
+    assert loader.load_file("Work/Component/Leaf1.gyml") == LEAF1
+    assert loader.load_file("Work/Component/Leaf2.gyml") == LEAF2
+    assert loader.load_file("Work/Component/Mid.gyml") == MID
+
+
+def test_resolved_copies_are_private(loader):
+    mutate(loader.load_file("Work/Component/Leaf1.gyml"))
+    # Both the cached document and its cached parents are untouched
+    assert loader.load_file("Work/Component/Leaf1.gyml") == LEAF1
+    assert loader.load_file("Work/Component/Leaf2.gyml") == LEAF2
+    mutate(loader.load_file("Work/Component/Mid.gyml"))
+    assert loader.load_file("Work/Component/Mid.gyml") == MID
+    assert loader.load_file("Work/Component/Leaf1.gyml") == LEAF1
+    assert loader.docs.raw("Pack/Work/Component/Base.json")["RootNode"] == FILES["Component/Base.json"]
+
+
+def test_fresh_parent_is_not_shared(loader):
+    # Leaf2 resolves Mid as a parent first; the parent must not leak into it
+    leaf2 = loader.load_file("Work/Component/Leaf2.gyml")
+    mutate(leaf2)
+    assert loader.load_file("Work/Component/Mid.gyml") == MID
+    assert loader.load_file("Work/Component/Leaf1.gyml") == LEAF1
+
+
+def test_read_component(loader):
+    first = Actor("Pack/Work/Actor/Enemy.json", loader)
+    assert first.read_component("Drop", loader)
+    drop = first.ActorParam["Components"]["Drop"]
+    assert drop == dict(LEAF1, _file="Work/Component/Leaf1.gyml")
+    mutate(drop)
+
+    second = Actor("Pack/Work/Actor/Enemy.json", loader)
+    assert second.ActorParam["Components"]["Drop"] == "Work/Component/Leaf1.gyml"
+    assert second.read_component("Drop", loader)
+    assert second.ActorParam["Components"]["Drop"] == dict(LEAF1, _file="Work/Component/Leaf1.gyml")
+    assert not second.read_component("Missing", loader)
+
+
+def test_counters(loader):
+    docs = loader.docs
+    loader.load_file("Work/Component/Leaf1.gyml")
+    # Mid and Base resolved as parents
+    assert (docs.parent_loads, docs.parent_hits, docs.resolved_hits) == (2, 0, 0)
+    loader.load_file("Work/Component/Leaf1.gyml")
+    assert (docs.parent_loads, docs.parent_hits, docs.resolved_hits) == (2, 0, 1)
+    loader.load_file("Work/Component/Leaf2.gyml")
+    assert (docs.parent_loads, docs.parent_hits, docs.resolved_hits) == (2, 1, 1)
+    loader.load_file("Work/Component/Mid.gyml")
+    loader.load_file("Work/Component/Base.gyml")
+    assert (docs.parent_loads, docs.parent_hits, docs.resolved_hits) == (2, 1, 3)
+    assert docs.raw_loads == 4
+
+    totals = DocumentCache()
+    totals.add_counters(docs.counters())
+    totals.add_counters(docs.counters())
+    assert totals.counters() == {k: 2 * v for k, v in docs.counters().items()}
+
@@ -0,0 +1,63 @@
+import pytest
+
+import byml
+from byml_writer import FIXTURES, F32Bits, dumps
+
+
+@pytest.mark.parametrize("big_endian", [False, True])
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+def test_round_trip(name, big_endian):
+    assert byml.loads(dumps(FIXTURES[name], big_endian=big_endian)) == FIXTURES[name]
+
+
+@pytest.mark.parametrize("version", [2, 3, 7])
+def test_versions(version):
+    assert byml.loads(dumps(FIXTURES["nested"], version=version)) == FIXTURES["nested"]
+
+
+def test_lazy_access():
+    doc = byml.Document(dumps(FIXTURES["locationarea"]))
+    shrine = doc.root["Shrine"][0]
+    assert isinstance(shrine, byml.Hash)
+    assert shrine["Trans"][-1][0] == -1254.8
+    assert len(doc.root["Stable"]) == 0
+    assert "Missing" not in doc.root
+    assert "Shrine" in doc.root
+    assert doc.root["Shrine"][-1] is not None
+    assert doc.root.get("Zzz", 1) == 1
+
+
+def test_hash_lookup():
+    root = byml.Document(dumps(FIXTURES["hashes"])).root
+    assert isinstance(root["H32"], byml.HashMap)
+    assert root["H32"][0xFFFFFFFF][0] == 1
+    assert root["H64"][1 << 40] == 1.5
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        byml.loads(b"MsgStdBn" + bytes(24))
+
+
+def test_mmap_load(tmp_path):
+    path = tmp_path / "fixture.byml"
+    path.write_bytes(dumps(FIXTURES["nested"]))
+    assert byml.load(path) == FIXTURES["nested"]
+
+
+def test_zstd_load(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "fixture.byml.zs"
+    path.write_bytes(zstandard.ZstdCompressor().compress(dumps(FIXTURES["nested"])))
+    assert byml.load(path) == FIXTURES["nested"]
+
+
+@pytest.mark.parametrize("big_endian", [False, True])
+def test_f32_values(big_endian):
+    # 587.74615 as stored by the game
+    data = dumps({"X": F32Bits(0x4412EFC1), "L": [F32Bits(0x4412EFC1)]}, big_endian=big_endian)
+    doc = byml.Document(data)
+    assert doc.root["X"] == 587.7461547851562
+    # Materialized like the converters write the JSON exports
+    assert byml.loads(data) == {"L": [587.74615], "X": 587.74615}
+    assert byml.to_python(doc.root["L"]) == [587.74615]
@@ -0,0 +1,159 @@
+import math
+
+import pytest
+
+import geo
+from ecosystem_lod import BUFFER_PX, MAP_SIZE, TILE_SIZE, cut_tiles, tile_bounds, tile_range
+
+# Concave outer ring with a hole; no vertex or edge lies on a tile border
+RING = [[-4100.5, -3010.3], [2250.7, -2890.1], [1300.3, -900.9], [2900.9, 2100.7], [-3700.1, 2650.3], [-4100.5, -3010.3]]
+HOLE = [[-1500.3, -1200.7], [500.9, -1100.1], [-200.1, 800.3], [-1500.3, -1200.7]]
+SMALL = [[3100.3, 3100.1], [3300.7, 3150.9], [3200.1, 3400.3], [3100.3, 3100.1]]
+
+
+def contains(rings, x, z):
+    inside = False
+    for ring in rings:
+        for (x1, z1), (x2, z2) in zip(ring, ring[1:]):
+            if (z1 > z) != (z2 > z) and x < x1 + (z - z1) * (x2 - x1) / (z2 - z1):
+                inside = not inside
+    return inside
+
+
+def contains_geom(geom, x, z):
+    if geom is None:
+        return False
+    return any(contains(poly, x, z) for poly in geo.polygons(geom))
+
+
+def samples(bbox, n=40, margin=1.0):
+    x0, z0, x1, z1 = bbox
+    for i in range(n):
+        for j in range(n):
+            yield (x0 + margin + (x1 - x0 - 2 * margin) * (i + 0.37) / n,
+                   z0 + margin + (z1 - z0 - 2 * margin) * (j + 0.61) / n)
+
+
+def _segments_cross(a, b, c, d):
+    def orient(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+    return (orient(a, b, c) > 0) != (orient(a, b, d) > 0) and (orient(c, d, a) > 0) != (orient(c, d, b) > 0)
+
+
+def intersects(geom, bbox):
+    """Does the geometry overlap bbox, without clipping it"""
+    x0, z0, x1, z1 = bbox
+    if geom["type"] == "Point":
+        x, z = geom["coordinates"][:2]
+        return x0 <= x <= x1 and z0 <= z <= z1
+    corners = [(x0, z0), (x1, z0), (x1, z1), (x0, z1)]
+    sides = list(zip(corners, corners[1:] + corners[:1]))
+    for poly in geo.polygons(geom):
+        outer = poly[0]
+        if any(x0 <= x <= x1 and z0 <= z <= z1 for x, z in outer):
+            return True
+        if any(contains(poly, x, z) for x, z in corners):
+            return True
+        if any(_segments_cross(a, b, c, d) for a, b in zip(outer, outer[1:]) for c, d in sides):
+            return True
+    return False
+
+
+def all_tiles(z):
+    xs, ys = tile_range((-MAP_SIZE[0] / 2, -MAP_SIZE[1] / 2, MAP_SIZE[0] / 2, MAP_SIZE[1] / 2), z)
+    return [(x, y) for x in xs for y in ys]
+
+
+def test_tile_bounds():
+    # The map's top left corner is pixel 0 and a tile is TILE_SIZE pixels
+    assert tile_bounds(0, 0, 0) == (-6000, -5000, -6000 + 16384, -5000 + 16384)
+    assert tile_bounds(2, 1, 2) == (-6000 + 4096, -5000 + 8192, -6000 + 8192, -5000 + 12288)
+    assert tile_bounds(7, 3, 4, BUFFER_PX) == (-6000 + 384 - 2, -5000 + 512 - 2, -6000 + 512 + 2, -5000 + 640 + 2)
+
+
+@pytest.mark.parametrize("z", [2, 5, 7])
+def test_tile_range_matches_pixels(z):
+    scale = 4 * 2**z / TILE_SIZE
+    for x, y in samples((-MAP_SIZE[0] / 2, -MAP_SIZE[1] / 2, MAP_SIZE[0] / 2, MAP_SIZE[1] / 2), 25):
+        tx = math.floor((x + MAP_SIZE[0] / 4) * scale / TILE_SIZE)
+        ty = math.floor((y + MAP_SIZE[1] / 4) * scale / TILE_SIZE)
+        xs, ys = tile_range((x, y, x, y), z)
+        assert (list(xs), list(ys)) == ([tx], [ty])
+        b = tile_bounds(z, tx, ty)
+        assert b[0] <= x < b[2] and b[1] <= y < b[3]
+
+
+@pytest.mark.parametrize("bbox", [
+    (-5000.0, -4000.0, 4000.0, 4000.0),
+    (-2000.0, -1500.0, 0.0, 0.0),
+    (-4200.0, -3100.0, -3900.0, -2800.0),
+    (1000.0, -2000.0, 3000.0, 3000.0),
+    (-1000.0, -1000.0, -500.0, -500.0),
+])
+def test_clip_matches_point_in_polygon(bbox):
+    geom = {"type": "Polygon", "coordinates": [RING, HOLE]}
+    clipped = geo.clip(geom, bbox)
+    for x, z in samples(bbox):
+        assert contains_geom(clipped, x, z) == contains(geom["coordinates"], x, z), (x, z)
+
+
+def test_clip_outside():
+    multi = {"type": "MultiPolygon", "coordinates": [[RING, HOLE], [SMALL]]}
+    assert geo.clip(multi, (5000, 5000, 6000, 6000)) is None
+    # Inside the hole: the outer ring and the hole both clip to the box
+    in_hole = geo.clip(multi, (-1000, -1000, -900, -900))
+    assert [len(poly) for poly in in_hole["coordinates"]] == [2]
+    assert not any(contains_geom(in_hole, x, z) for x, z in samples((-1000, -1000, -900, -900), 5))
+    only_small = geo.clip(multi, (3000, 3000, 3500, 3500))
+    assert only_small["type"] == "MultiPolygon" and len(only_small["coordinates"]) == 1
+    point = {"type": "Point", "coordinates": [1.5, 2.5, 0]}
+    assert geo.clip(point, (0, 0, 2, 3)) is point
+    assert geo.clip(point, (2, 0, 3, 3)) is None
+
+
+def doc():
+    geometries = [
+        {"type": "Polygon", "coordinates": [RING, HOLE]},
+        {"type": "MultiPolygon", "coordinates": [[SMALL]]},
+        {"type": "Point", "coordinates": [-2500.5, 1200.5]},
+    ]
+    return {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "properties": {"n": i}, "geometry": g} for i, g in enumerate(geometries)],
+    }
+
+
+@pytest.mark.parametrize("z", [2, 3, 4])
+def test_cut_tiles_matches_brute_force(z):
+    source = doc()
+    tiles = cut_tiles(source, z)
+    for x, y in all_tiles(z):
+        bbox = tile_bounds(z, x, y, BUFFER_PX)
+        expected = [f["properties"]["n"] for f in source["features"] if intersects(f["geometry"], bbox)]
+        found = [f["properties"]["n"] for f in tiles[(x, y)]["features"]] if (x, y) in tiles else []
+        assert found == expected, (x, y)
+
+
+def test_tile_contents():
+    source = doc()
+    for (x, y), tile in cut_tiles(source, 3).items():
+        bbox = tile_bounds(3, x, y, BUFFER_PX)
+        for feature in tile["features"]:
+            original = source["features"][feature["properties"]["n"]]["geometry"]
+            if original["type"] == "Point":
+                assert feature["geometry"] == original
+                continue
+            for px, pz in samples(bbox, 20):
+                assert contains_geom(feature["geometry"], px, pz) == contains_geom(original, px, pz)
+
+
+def test_cut_tiles_keyed_layout():
+    source = {"0": [{"type": "Polygon", "coordinates": [SMALL]}], "1": [{"type": "Polygon", "coordinates": [RING]}]}
+    tiles = cut_tiles(source, 2)
+    for x, y in all_tiles(2):
+        bbox = tile_bounds(2, x, y, BUFFER_PX)
+        expected = [key for key, geoms in source.items() if intersects(geoms[0], bbox)]
+        assert sorted(tiles.get((x, y), {})) == expected
+        for key in expected:
+            assert len(tiles[(x, y)][key]) == 1 and tiles[(x, y)][key][0]["type"] == "Polygon"
@@ -0,0 +1,39 @@
+import geo
+
+# The bumps are all at the same distance from the shared edge's chord, so
+#   Douglas-Peucker keeps whichever it meets first
+EDGE = [[0, 0], [2, 1], [4, 1], [6, 1], [8, 1], [10, 0]]
+
+
+def edge_points(ring):
+    return sorted(p for p in ring if 0 < p[0] < 10 and 0 < p[1] < 10)
+
+
+def test_shared_edge_simplifies_alike():
+    below = EDGE + [[10, -10], [0, -10], [0, 0]]
+    above = [[0, 0], [0, 10], [10, 10]] + EDGE[::-1]
+    doc = {"0": [{"type": "Polygon", "coordinates": [below]}, {"type": "Polygon", "coordinates": [above]}]}
+    geo.simplify(doc, 0.9, 2)
+    a, b = (geom["coordinates"][0] for geom in doc["0"])
+    assert edge_points(a) == edge_points(b) != []
+
+
+def test_identical_loops_simplify_alike():
+    loop = [[0, 0], [5, 1], [10, 0], [11, 5], [10, 10], [5, 11], [0, 10], [-1, 5]]
+    rotated = loop[3:] + loop[:3]
+    doc = {"0": [{"type": "Polygon", "coordinates": [r + r[:1]]} for r in (loop, rotated[::-1])]}
+    geo.simplify(doc, 1.5, 2)
+    a, b = (geom["coordinates"][0] for geom in doc["0"])
+    assert sorted(a[:-1]) == sorted(b[:-1])
+
+
+def test_feature_bounds_follow_simplification():
+    ring = [[0.0, 0.0], [5.0, -0.2], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]]
+    props = {"group": "Cave_A", "xmin": 0.0, "xmax": 10.0, "zmin": -0.2, "zmax": 10.0}
+    doc = {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "properties": props, "geometry": {"type": "Polygon", "coordinates": [ring]}}],
+    }
+    geo.simplify(doc, 0.5, 2)
+    assert [5.0, -0.2] not in doc["features"][0]["geometry"]["coordinates"][0]
+    assert props == {"group": "Cave_A", "xmin": 0, "xmax": 10, "zmin": 0, "zmax": 10}
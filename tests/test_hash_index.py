@@ -0,0 +1,116 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from hash_index import HashIndex, build, load_or_build, name_key, parse_key  # noqa: E402
+
+KOROKS = {
+    "0x7de66884408148fc": {"pos": [1040.5, 118.5, 1068.5], "id": "PF01"},
+    "0x0000000000000010": {"pos": [0.0, 0.0, 0.0], "id": "PF02"},
+    "0xffffffffffffff00": {"pos": [1.0, 2.0, 3.0], "id": "PF03"},
+    "0x536160272d49959c": {"pos": [627.5, 120.3, 1161.6], "id": "PF04"},
+}
+RBOX = [
+    {"hash_id": "15467851743395390442", "ui_name": "Device Dispenser"},
+    {"hash_id": "42", "ui_name": "Small"},
+]
+SHRINE_CAVES = [
+    {"map_name": "Surface_A-2", "Location": "Dungeon021"},
+    {"map_name": "Surface_A-4", "Location": "Dungeon037"},
+]
+
+
+def write_sources(base, koroks=KOROKS, rbox=RBOX, shrine_caves=SHRINE_CAVES):
+    (base / "tools").mkdir(exist_ok=True)
+    (base / "tools" / "koroks_id.json").write_text(json.dumps(koroks))
+    (base / "tools" / "rbox.json").write_text(json.dumps(rbox))
+    (base / "tools" / "shrine_caves.json").write_text(json.dumps(shrine_caves))
+
+
+@pytest.fixture
+def index(tmp_path):
+    write_sources(tmp_path)
+    path = tmp_path / "index.bin"
+    path.write_bytes(build(tmp_path))
+    index = HashIndex(path)
+    yield index
+    index.close()
+
+
+def test_parse_key():
+    assert parse_key(42) == 42
+    assert parse_key("42") == 42
+    assert parse_key("15467851743395390442") == 15467851743395390442
+    assert parse_key("0x7de66884408148fc") == 0x7DE66884408148FC
+    assert parse_key("0x00000000000000ff") == 255
+
+
+def test_hits(index):
+    for key, rec in KOROKS.items():
+        assert index.get("koroks", key) == rec
+        assert index.get("koroks", int(key, 16)) == rec
+    assert index.get("rbox", "15467851743395390442") == RBOX[0]
+    assert index.get("rbox", "0x2a") == RBOX[1]
+    assert index.get("shrine_caves", name_key("Dungeon037")) == SHRINE_CAVES[1]
+
+
+def test_misses(index):
+    # Below, between and above the stored keys
+    keys = ["0x0", "0x11", "0x7de66884408148fd", "0xffffffffffffffff"]
+    assert index.lookup("koroks", keys) == [None] * 4
+    assert index.get("shrine_caves", name_key("Dungeon999")) is None
+
+
+def test_positions(index):
+    keys = ["0x10", "0x11", "0xffffffffffffff00", "0x536160272d49959c"]
+    assert index.positions("koroks", keys).tolist() == [0, -1, 3, 1]
+    queries = np.array([16, 0xFFFFFFFFFFFFFF00, 2**64 - 1], dtype=np.uint64)
+    assert index.positions("koroks", queries).tolist() == [0, 3, -1]
+    assert index.lookup("rbox", ["42", "43", "15467851743395390442"]) == [RBOX[1], None, RBOX[0]]
+
+
+def test_empty_table(tmp_path):
+    write_sources(tmp_path, rbox=[])
+    path = tmp_path / "index.bin"
+    path.write_bytes(build(tmp_path))
+    index = HashIndex(path)
+    assert index.lookup("rbox", ["42"]) == [None]
+    assert index.get("koroks", "0x10") == KOROKS["0x0000000000000010"]
+    index.close()
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / "index.bin"
+    path.write_bytes(b"nope" + bytes(12))
+    with pytest.raises(ValueError):
+        HashIndex(path)
+
+
+def test_load_or_build(tmp_path):
+    write_sources(tmp_path)
+    path = tmp_path / "index.bin"
+    index = load_or_build(path, tmp_path)
+    assert not index.stale(tmp_path)
+    index.close()
+    inode = os.stat(path).st_ino
+
+    # Unchanged sources reuse the file
+    index = load_or_build(path, tmp_path)
+    assert os.stat(path).st_ino == inode
+    index.close()
+
+    # A changed source rebuilds it
+    write_sources(tmp_path, koroks={"0x20": {"pos": [0.0, 0.0, 0.0], "id": "New"}})
+    index = load_or_build(path, tmp_path)
+    assert os.stat(path).st_ino != inode
+    assert index.get("koroks", "0x20")["id"] == "New"
+    assert index.get("koroks", "0x10") is None
+    assert not index.stale(tmp_path)
+
+    # So does a missing one
+    os.unlink(tmp_path / "tools" / "rbox.json")
+    assert index.stale(tmp_path)
+    index.close()
@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import interned
+
+# Encoded documents with their expected values, shared with the TypeScript
+#   InternedDecoder (src/services/MsgMgr.ts)
+FIXTURES = json.loads((Path(__file__).parent / "fixtures" / "interned.json").read_text())
+
+
+def same(a, b):
+    # == treats 1, 1.0 and True as equal and ignores dict order
+    return json.dumps(a) == json.dumps(b)
+
+
+@pytest.mark.parametrize("case", FIXTURES, ids=[c["name"] for c in FIXTURES])
+def test_round_trip(case):
+    doc = interned.encode(case["value"], case["plain_depth"])
+    decoded = interned.decode(json.loads(json.dumps(doc)))
+    assert same(decoded, case["value"])
+
+
+@pytest.mark.parametrize("case", FIXTURES, ids=[c["name"] for c in FIXTURES])
+def test_fixture_is_current(case):
+    # When the encoding changes, re-encode every value of the fixture with its
+    #   plain_depth; the TypeScript decoder must still read it
+    assert same(interned.encode(case["value"], case["plain_depth"]), case["encoded"])
+    assert same(interned.decode(case["encoded"]), case["value"])
+
+
+def test_numbers_and_bools_stay_distinct():
+    doc = interned.encode([1, 1.0, True, 0, 0.0, False, None, "1"])
+    assert doc["values"][:8] == [1, 1.0, True, 0, 0.0, False, None, "1"]
+    assert [type(v) for v in doc["values"][:8]] == [int, float, bool, int, float, bool, type(None), str]
+
+
+def test_values_are_interned():
+    species = ["Fox", "Bear"]
+    doc = interned.encode({"a": {"s": species, "n": 1}, "b": {"s": list(species), "n": 1}, "c": {"n": 1, "s": species}})
+    # Two names, the list, 1, two dicts (key order differs) and the root
+    assert len(doc["values"]) == 7
+    assert doc["shapes"] == [["a", "b", "c"], ["s", "n"], ["n", "s"]]
+    decoded = interned.decode(doc)
+    assert decoded["a"] is decoded["b"]
+    assert decoded["a"]["s"] is decoded["c"]["s"]
+
+
+def test_affixes():
+    name = "Work/Location/Lake.game__location__Location.gyml"
+    doc = interned.encode([name, "Work/Location/Lake.gyml"])
+    assert {"a": 0, "s": "Lake"} in doc["values"]
+    assert "Work/Location/Lake.gyml" in doc["values"]
+    assert interned.decode(doc) == [name, "Work/Location/Lake.gyml"]
+
+
+def test_plain_depth():
+    value = {"MapArea": {"1": {"Name": "A"}, "2": {"Name": "A"}}, "Count": 2}
+    doc = interned.encode(value, plain_depth=2)
+    root = doc["root"]
+    assert set(root) == {"MapArea", "Count"} and set(root["MapArea"]) == {"1", "2"}
+    assert isinstance(root["MapArea"]["1"], int) and root["MapArea"]["1"] == root["MapArea"]["2"]
+    # One entry decodes on its own
+    assert interned.Decoder(doc).value(root["MapArea"]["2"]) == {"Name": "A"}
+
+
+def test_check_and_format():
+    assert interned.check({"x": [1.5, {}]}, 1)["format"] == interned.FORMAT
+    with pytest.raises(ValueError):
+        interned.decode({"format": "interned/0", "values": [], "root": 0})
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from korok_layers import OVERRIDES, SKY, SKY_HEIGHT, SURFACE, classify  # noqa: E402
+from region_index import Region, RegionIndex  # noqa: E402
+
+ISLAND = [100, 100, 300, 100, 300, 250, 100, 250, 100, 100]
+
+
+def scalar(pt, key, overrides=OVERRIDES, island=None):
+    # The per-object loop classify() replaced
+    layer = SURFACE
+    if pt[1] >= SKY_HEIGHT and (island is None or island.contains(pt[0], pt[2])):
+        layer = SKY
+    return overrides.get(int(key), layer)
+
+
+def objects(n=2000, seed=0):
+    rng = random.Random(seed)
+    keys = list(OVERRIDES)
+    pts, hashes = [], []
+    for i in range(n):
+        y = rng.choice([SKY_HEIGHT, SKY_HEIGHT - 1e-3, rng.uniform(0, 1500)])
+        pts.append((rng.uniform(0, 400), y, rng.uniform(0, 400)))
+        choice = i % 4
+        if choice == 0:
+            key = rng.choice(keys)
+        elif choice == 1:
+            # Next to an override, or beyond all of them
+            key = min(rng.choice(keys) + rng.choice([-1, 1]), 2**64 - 1)
+        else:
+            key = rng.randrange(2**64)
+        hashes.append(str(key) if i % 3 else key)
+    hashes[-1] = 2**64 - 1
+    hashes[-2] = 0
+    return pts, hashes
+
+
+def test_height_threshold():
+    labels = classify([[0, SKY_HEIGHT, 0], [0, SKY_HEIGHT - 0.01, 0], [0, 2000, 0], [0, -10, 0]])
+    assert labels.tolist() == [SKY, SURFACE, SKY, SURFACE]
+
+
+def test_overrides():
+    keys = sorted(OVERRIDES)
+    coords = [[0, 0, 0]] * len(keys) + [[0, 1000, 0]] * len(keys)
+    labels = classify(coords, keys + [str(k) for k in keys])
+    assert labels.tolist() == [OVERRIDES[k] for k in keys] * 2
+
+
+def test_matches_scalar():
+    pts, hashes = objects()
+    labels = classify(pts, hashes)
+    assert labels.tolist() == [scalar(pt, key) for pt, key in zip(pts, hashes)]
+
+
+@pytest.mark.parametrize("overrides", [{}, {5: SKY}, {2**64 - 1: SURFACE, 0: SKY}])
+def test_custom_overrides(overrides):
+    pts, hashes = objects(500, seed=1)
+    labels = classify(pts, hashes, overrides)
+    assert labels.tolist() == [scalar(pt, key, overrides) for pt, key in zip(pts, hashes)]
+
+
+def test_region_index():
+    island = Region("sky_polys", "0", "Island", [100, 100, 300, 250], [ISLAND])
+    cave = Region("cave_polys", "0", "Cave", [0, 0, 400, 400], [[0, 0, 400, 0, 400, 400, 0, 400, 0, 0]])
+    index = RegionIndex([cave, island], cell=50.0)
+    pts, hashes = objects(seed=2)
+    labels = classify(pts, hashes, index=index)
+    assert labels.tolist() == [scalar(pt, key, island=island) for pt, key in zip(pts, hashes)]
+    assert SKY in labels.tolist() and SURFACE in labels.tolist()
+
+
+def test_empty():
+    assert classify([], []).tolist() == []
+    index = RegionIndex([Region("sky_polys", "0", "", [0, 0, 1, 1], [[0, 0, 1, 0, 1, 1, 0, 0]])])
+    assert classify(np.zeros((0, 3)), index=index).tolist() == []
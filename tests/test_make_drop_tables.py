@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+import actor_loader
+import pack_index
+import parse_cache
+from make_drop_tables import FORMAT, Interner, actor_drops, pack
+
+DROP_REF = "Work/Component/DropRef/Drop.game__component__DropRef.gyml"
+PARAM = "Actor/{}.engine__actor__ActorParam.json"
+
+APPLE = {"DropActorName": "Item_Fruit_A", "DropProbability": 50, "DropActorAttachment": ""}
+ARROW = {"DropActorName": "NormalArrow", "DropProbability": 10, "DropActorAttachment": ""}
+
+
+def table(*elements, **props):
+    return dict(props, DropTableElementResourceList=[f"Work/Drop/Element/{e}.game__drop__DropTableElement.gyml" for e in elements])
+
+
+# Files relative to Pack/; elements live in ResidentCommon and are found
+#   through the loader's fallback
+FILES = {
+    "ResidentCommon/Drop/Element/Base.game__drop__DropTableElement.json": {"DropProbability": 10, "DropActorAttachment": ""},
+    "ResidentCommon/Drop/Element/Apple.game__drop__DropTableElement.json": {
+        "$parent": "Work/Drop/Element/Base.game__drop__DropTableElement.gyml",
+        "DropActorName": "Item_Fruit_A",
+        "DropProbability": 50,
+    },
+    "ResidentCommon/Drop/Element/Arrow.game__drop__DropTableElement.json": {
+        "$parent": "Work/Drop/Element/Base.game__drop__DropTableElement.gyml",
+        "DropActorName": "NormalArrow",
+    },
+    # No DropTableName: the actor's default table
+    "Actor/Enemy_A/" + PARAM.format("Enemy_A"): {"Components": {"DropRef": DROP_REF}},
+    "Actor/Enemy_A/Component/DropRef/Drop.game__component__DropRef.json": {
+        "DropTableResourceList": ["Work/Drop/Main.game__drop__DropTable.gyml", "Work/Drop/Rare.game__drop__DropTable.gyml"],
+    },
+    "Actor/Enemy_A/Drop/Main.game__drop__DropTable.json": table("Apple", "Arrow", RepeatNumMin=1),
+    "Actor/Enemy_A/Drop/Rare.game__drop__DropTable.json": table("Apple", DropTableName="Rare"),
+    # Same default table as Enemy_A, through a $parent
+    "Actor/Enemy_B/" + PARAM.format("Enemy_B"): {"Components": {"DropRef": DROP_REF}},
+    "Actor/Enemy_B/Component/DropRef/Drop.game__component__DropRef.json": {
+        "DropTableResourceList": ["Work/Drop/Main.game__drop__DropTable.gyml", "Work/Drop/Named.game__drop__DropTable.gyml"],
+    },
+    "Actor/Enemy_B/Drop/Base.game__drop__DropTable.json": table("Apple", "Arrow"),
+    "Actor/Enemy_B/Drop/Main.game__drop__DropTable.json": {"$parent": "Work/Drop/Base.game__drop__DropTable.gyml", "RepeatNumMin": 1},
+    "Actor/Enemy_B/Drop/Named.game__drop__DropTable.json": table("Arrow", DropTableName="Default"),
+    # No DropRef, a missing table file
+    "Actor/Obj_C/" + PARAM.format("Obj_C"): {"Components": {}},
+    "Actor/Enemy_D/" + PARAM.format("Enemy_D"): {"Components": {"DropRef": DROP_REF}},
+    "Actor/Enemy_D/Component/DropRef/Drop.game__component__DropRef.json": {
+        "DropTableResourceList": ["Work/Drop/Missing.game__drop__DropTable.gyml"],
+    },
+}
+
+
+@pytest.fixture
+def romfs(tmp_path, monkeypatch):
+    for name, root in FILES.items():
+        path = tmp_path / "Pack" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"RootNode": root}))
+    (tmp_path / "Pack" / "Actor" / "Obj_NoParam").mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pack_index, "index", pack_index.PackIndex("Pack"))
+    monkeypatch.setattr(parse_cache, "cache", parse_cache.ParseCache(tmp_path / "cache", 0, enabled=False))
+    monkeypatch.setattr(actor_loader, "documents", actor_loader.DocumentCache())
+    return tmp_path
+
+
+def results():
+    names = ["Enemy_A", "Enemy_B", "Enemy_D", "Obj_C", "Obj_NoParam"]
+    return [r for r in (actor_drops(f"Pack/Actor/{name}") for name in names) if r]
+
+
+def get_drop_table(doc, actor, name):
+    # MapMgr.getObjDropTables
+    tables = doc["actors"].get(actor) or {}
+    index = tables.get(name, tables.get("") if name == "Default" else None)
+    if index is None:
+        return None
+    t = doc["tables"][index]
+    return dict(t, items=[doc["elements"][i] for i in t["items"]])
+
+
+def test_interner():
+    interner = Interner()
+    assert interner.add({"a": 1, "b": [2]}) == 0
+    assert interner.add({"b": [2], "a": 1}) == 0
+    assert interner.add({"a": 1.0, "b": [2]}) == 1
+    assert interner.add({"a": True, "b": [2]}) == 2
+    assert interner.add({}) == 3
+    assert interner.add({"a": 1, "b": [2]}) == 0
+    assert interner.values == [{"a": 1, "b": [2]}, {"a": 1.0, "b": [2]}, {"a": True, "b": [2]}, {}]
+
+
+def test_actor_drops(romfs, capsys):
+    found = results()
+    assert [actor for actor, _ in found] == ["Enemy_A", "Enemy_B"]
+    assert "Enemy_D: skipped" in capsys.readouterr().err
+    tables = dict(found)["Enemy_A"]
+    assert [t["DropTableName"] for t in tables] == ["", "Rare"]
+    assert tables[0]["items"][0] == dict(APPLE, **{"$parent": "Work/Drop/Element/Base.game__drop__DropTableElement.gyml"})
+
+
+def test_pack(romfs):
+    doc = pack(results())
+    assert doc["format"] == FORMAT
+    assert doc["elements"] == [APPLE, ARROW]
+    assert doc["actors"] == {"Enemy_A": {"": 0, "Rare": 1}, "Enemy_B": {"": 0, "Default": 2}}
+    assert [t["items"] for t in doc["tables"]] == [[0, 1], [0], [1]]
+    assert all("$parent" not in t for t in doc["tables"])
+    assert json.loads(json.dumps(doc)) == doc
+
+
+def test_lookup_matches_tables(romfs):
+    doc = pack(results())
+    default = get_drop_table(doc, "Enemy_A", "Default")
+    assert default["DropTableName"] == "" and default["RepeatNumMin"] == 1
+    assert default["items"] == [APPLE, ARROW]
+    assert get_drop_table(doc, "Enemy_A", "Rare")["items"] == [APPLE]
+    # A table named Default wins over the unnamed one
+    assert get_drop_table(doc, "Enemy_B", "Default")["items"] == [ARROW]
+    assert get_drop_table(doc, "Enemy_B", "")["items"] == [APPLE, ARROW]
+    assert get_drop_table(doc, "Enemy_A", "Missing") is None
+    assert get_drop_table(doc, "Obj_C", "Default") is None
+    # Every packed table is the resolved table without $parent
+    for actor, tables in results():
+        for t in tables:
+            expected = {k: v for k, v in t.items() if k != "$parent"}
+            expected["items"] = [{k: v for k, v in e.items() if k != "$parent"} for e in t["items"]]
+            assert get_drop_table(doc, actor, t["DropTableName"]) == expected
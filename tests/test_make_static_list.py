@@ -0,0 +1,96 @@
+import json
+import os
+import struct
+import subprocess
+import sys
+
+import pytest
+
+from byml_writer import F32Bits, dumps
+
+zstandard = pytest.importorskip("zstandard")
+
+TOOLS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools")
+
+# Floats as the byml -> yml -> json converters write them: the shortest
+#   decimal that reads back as the stored f32
+BANC = {
+    ("MainField", "LocationArea"): {
+        "City": [
+            {
+                "InstanceID": [987, 988],
+                "LocationName": "Work/Location/Kakariko.game__location__Location.gyml",
+                "Trans": [[587.74615, 20.1, -3.3], [11.0, 21.0, 31.0]],
+            }
+        ],
+        "Shrine": [
+            {
+                "InstanceID": [123456789],
+                "LocationName": "Work/Location/Dungeon021.game__location__Location.gyml",
+                "Trans": [[-1254.8, 130.25, 2019.2]],
+            }
+        ],
+        "SpotBig": [
+            {
+                "InstanceID": [77],
+                "LocationName": "Work/Location/Well_0001.game__location__Location.gyml",
+                "TargetZoomLevel": ["Far"],
+                "Trans": [[1.0, 2.0, 3.0]],
+            }
+        ],
+    },
+    ("MainField", "HiddenKorok"): {"A": {"12": [0.1, 100.3, 1.7], "6577590198901788531": [5.5, 800.9, 2.0]}},
+    ("MinusField", "LocationArea"): {},
+    ("MinusField", "HiddenKorok"): {"A": {"9059106917463250940": [-0.3, -500.7, 33.33]}},
+}
+
+
+def f32_bits(obj):
+    """obj with every float stored as an f32 node"""
+    if isinstance(obj, dict):
+        return {k: f32_bits(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [f32_bits(v) for v in obj]
+    if isinstance(obj, float):
+        return F32Bits(struct.unpack("<I", struct.pack("<f", obj))[0])
+    return obj
+
+
+@pytest.fixture
+def romfs(tmp_path):
+    root = tmp_path / "romfs"
+    for (field, kind), data in BANC.items():
+        base = root / "Banc" / field / kind
+        base.mkdir(parents=True)
+        (base / f"{field}.{kind.lower()}.json").write_text(json.dumps(data))
+        (base / f"{field}.{kind.lower()}.byml.zs").write_bytes(zstandard.ZstdCompressor().compress(dumps(f32_bits(data))))
+    (root / "ZsDic").mkdir()
+    (root / "ZsDic" / "zs.zsdic").write_bytes(b"unused raw content dictionary" * 8)
+    tools = tmp_path / "work" / "tools"
+    tools.mkdir(parents=True)
+    (tools / "koroks_id.json").write_text(json.dumps({"0x000000000000000c": {"id": "PF01", "pos": [0.1, 100.3, 1.7]}}))
+    (tools / "rbox.json").write_text("[]")
+    (tools / "shrine_caves.json").write_text(json.dumps([{"Location": "Dungeon021", "map_name": "Cave_A"}]))
+    return root
+
+
+def static_list(romfs, *args):
+    work = romfs.parent / "work"
+    env = dict(os.environ, OBJMAP_PARSE_CACHE="0")
+    env.pop("OBJMAP_PROFILE", None)
+    subprocess.run(
+        [sys.executable, os.path.join(TOOLS, "make_static_list.py"), str(romfs), *args],
+        cwd=work,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    return (work / "static.json").read_text()
+
+
+def test_byml_matches_json_exports(romfs):
+    from_json = static_list(romfs)
+    assert static_list(romfs, "--byml") == from_json
+    markers = json.loads(from_json)["markers"]
+    assert markers["Place"][0]["Translate"] == {"X": 587.74615, "Y": 20.1, "Z": -3.3}
+    assert [k["id"] for k in markers["Korok"]] == ["PF01", "0x5b484b6fb3a1cf73", "0x7db869be85ae57fc"]
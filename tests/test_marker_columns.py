@@ -0,0 +1,58 @@
+import json
+import os
+import struct
+
+import pytest
+
+import marker_columns
+
+STATIC = os.path.join(os.path.dirname(__file__), "..", "public", "game_files", "map_summary")
+
+DOC = {
+    "_doc_": {"created": "make_static_list.py"},
+    "markers": {
+        "Location": [
+            {"MessageID": "Kakariko", "SaveFlag": "Location_Kakariko", "Translate": {"X": 1.5, "Y": 0, "Z": -3.25}},
+            {"MessageID": "Hateno", "SaveFlag": "Location_Hateno", "Translate": {"X": 2019.25, "Y": 130.5, "Z": 1e300}},
+        ],
+        "Dispensers": [
+            {"hash_id": "0x0123456789abcdef", "id": "0x0123456789abcdef", "equip": ["Sword"], "ui": True},
+            {"hash_id": "0xfedcba9876543210", "id": "0xfedcba9876543210", "equip": [], "ui": False, "extra": 7},
+            {"id": "0x0000000000000001", "hash_id": "0x0000000000000001", "equip": ["Sword"], "ui": True},
+        ],
+        "Empty": [],
+    },
+}
+
+
+def test_round_trip():
+    decoded = marker_columns.decode(marker_columns.encode(DOC))
+    assert decoded == DOC
+    # Row key order comes back too
+    for kind, items in DOC["markers"].items():
+        assert [list(item) for item in decoded["markers"][kind]] == [list(item) for item in items]
+
+
+def test_column_types():
+    data = marker_columns.encode(DOC)
+    head_len = struct.unpack_from("<I", data, 8)[0]
+    tables = {t["kind"]: t for t in json.loads(data[12 : 12 + head_len])["tables"]}
+    types = {".".join(c["path"]): c["type"] for c in tables["Location"]["columns"]}
+    assert types == {"MessageID": "dict", "SaveFlag": "prefix", "Translate.X": "f32", "Translate.Y": "f32", "Translate.Z": "f64"}
+    types = {".".join(c["path"]): c["type"] for c in tables["Dispensers"]["columns"]}
+    assert types["hash_id"] == "u64hex" and types["id"] == "alias" and types["ui"] == "bool"
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        marker_columns.decode(b"{}")
+
+
+@pytest.mark.parametrize("field", ["MainField", "MinusField", "SkyField"])
+def test_static_json(field):
+    path = os.path.join(STATIC, field, "static.json")
+    if not os.path.exists(path):
+        pytest.skip(f"{path} not generated")
+    with open(path) as f:
+        doc = json.load(f)
+    assert json.dumps(marker_columns.decode(marker_columns.check(doc)), sort_keys=True) == json.dumps(doc, sort_keys=True)
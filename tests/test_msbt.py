@@ -0,0 +1,32 @@
+import pytest
+
+import msbt
+from msbt_writer import FIXTURES, dumps
+
+
+@pytest.fixture(params=[False, True], ids=["little", "big"])
+def path(request, tmp_path):
+    path = tmp_path / "fixture.msbt"
+    path.write_bytes(dumps(FIXTURES, request.param))
+    return path
+
+
+def test_load(path):
+    entries = msbt.load(path)["entries"]
+    assert list(entries) == sorted(FIXTURES)
+    assert {label: entry["contents"] for label, entry in entries.items()} == FIXTURES
+
+
+def test_texts_skip_control_tags(path):
+    assert dict(msbt.texts(path))["Npc_Color_Name"] == "Red Bokoblin"
+
+
+def test_load_messages_by_extension(path):
+    assert msbt.load_messages(path) == msbt.load(path)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.msbt"
+    path.write_bytes(b"YB" + bytes(30))
+    with pytest.raises(ValueError):
+        msbt.open_file(path)
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from pack_index import PackIndex
+
+
+@pytest.fixture
+def pack(tmp_path, monkeypatch):
+    (tmp_path / "Pack" / "Actor" / "Enemy" / "Component").mkdir(parents=True)
+    (tmp_path / "Pack" / "Actor" / "Enemy" / "Component" / "Drop.json").write_text("{}")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_lookups(pack):
+    index = PackIndex("Pack").scan()
+    assert index.exists("Pack/Actor/Enemy/Component/Drop.json")
+    assert index.exists(pack / "Pack" / "Actor" / "Enemy")
+    assert not index.exists("Pack/Actor/Enemy/Component/Missing.json")
+    assert index.find("Drop.json") == [os.path.join("Pack", "Actor", "Enemy", "Component", "Drop.json")]
+    assert index.disk_lookups == 0
+
+
+def test_symlink_cycle(pack):
+    os.symlink("..", pack / "Pack" / "Actor" / "Enemy" / "Component" / "Up")
+    os.symlink("Actor", pack / "Pack" / "Alias")
+    index = PackIndex("Pack").scan()
+    assert index.exists("Pack/Alias/Enemy/Component/Drop.json")
+    assert index.exists("Pack/Actor/Enemy/Component/Up/Component/Drop.json")
+    assert index.exists("Pack/Alias")
+    assert not index.exists("Pack/Alias/Enemy/Missing.json")
+
+
+def test_disabled(pack):
+    index = PackIndex("Pack", enabled=False)
+    assert index.exists("Pack/Actor/Enemy/Component/Drop.json")
+    assert index.disk_lookups == 1
@@ -0,0 +1,39 @@
+import json
+
+from parse_cache import ParseCache, _parse_json
+
+
+def write_json(tmp_path, data):
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_hit_after_miss(tmp_path):
+    path = write_json(tmp_path, {"a": [1, 2]})
+    cache = ParseCache(tmp_path / "cache", 1 << 20)
+    assert cache.load(path, "json", _parse_json) == {"a": [1, 2]}
+    assert cache.load(path, "json", _parse_json) == {"a": [1, 2]}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.bytes_written > 0
+
+
+def test_changed_input_is_reparsed(tmp_path):
+    path = write_json(tmp_path, {"a": 1})
+    cache = ParseCache(tmp_path / "cache", 1 << 20)
+    cache.load(path, "json", _parse_json)
+    path.write_text(json.dumps({"a": 22}))
+    assert cache.load(path, "json", _parse_json) == {"a": 22}
+    assert cache.misses == 2
+
+
+def test_unwritable_cache_disables_itself(tmp_path, capsys):
+    path = write_json(tmp_path, {"a": 1})
+    # A file where the cache directory should be: mkdir fails
+    (tmp_path / "cache").write_text("")
+    cache = ParseCache(tmp_path / "cache", 1 << 20)
+    assert cache.load(path, "json", _parse_json) == {"a": 1}
+    assert not cache.enabled
+    assert "parse cache: disabled" in capsys.readouterr().err
+    assert cache.load(path, "json", _parse_json) == {"a": 1}
+    cache.close()
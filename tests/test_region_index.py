@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from region_index import RegionIndex
+
+# A square with a hole, a concave polygon spanning several cells and a second
+#   layer overlapping both. Vertices avoid the 10-unit cell centers so every
+#   center is clearly inside or outside.
+SQUARE = [[0, 0], [37, 0], [37, 33], [0, 33], [0, 0]]
+HOLE = [[11, 7], [26, 7], [26, 21], [11, 21], [11, 7]]
+CONCAVE = [[40, 3], [77, 12], [52, 18], [71, 41], [43, 31], [40, 3]]
+SKY = [[21, 13], [58, 26], [31, 38], [21, 13]]
+
+
+def contains(rings, x, z):
+    inside = False
+    for ring in rings:
+        for (x1, z1), (x2, z2) in zip(ring, ring[1:]):
+            if (z1 > z) != (z2 > z) and x < x1 + (z - z1) * (x2 - x1) / (z2 - z1):
+                inside = not inside
+    return inside
+
+
+POLYGONS = [("MapTower", [SQUARE, HOLE]), ("MapTower", [CONCAVE]), ("sky_polys", [SKY])]
+
+
+def brute_force(x, z, layer=None):
+    return [i for i, (name, rings) in enumerate(POLYGONS) if (layer is None or name == layer) and contains(rings, x, z)]
+
+
+@pytest.fixture
+def index(tmp_path):
+    features = [
+        {"type": "Feature", "properties": {"title": f"Area{i}"}, "geometry": {"type": "Polygon", "coordinates": rings}}
+        for i, (layer, rings) in enumerate(POLYGONS)
+        if layer == "MapTower"
+    ]
+    (tmp_path / "MapTower.json").write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    sky = {"Sky": [{"type": "Polygon", "coordinates": [SKY], "properties": {"group": "Island"}}]}
+    (tmp_path / "sky_polys.json").write_text(json.dumps(sky))
+    return RegionIndex.from_files(tmp_path, ["MapTower", "sky_polys"], cell=10.0)
+
+
+def points():
+    # A grid that does not line up with the cell borders, the cell centers and
+    #   points just off every edge
+    pts = [(x * 0.7 - 3.1, z * 0.7 - 2.9) for x in range(125) for z in range(70)]
+    pts += [(x + 5, z + 5) for x in range(0, 80, 10) for z in range(0, 50, 10)]
+    for _, rings in POLYGONS:
+        for ring in rings:
+            for (x1, z1), (x2, z2) in zip(ring, ring[1:]):
+                mx, mz = (x1 + x2) / 2, (z1 + z2) / 2
+                for d in [-1e-3, 1e-3]:
+                    pts.append((mx + (z2 - z1) * d, mz - (x2 - x1) * d))
+    return pts
+
+
+def regions_at(index, x, z, layer=None):
+    return [index.regions.index(r) for r in index.query(x, z, layer)]
+
+
+def test_regions(index):
+    assert [(r.layer, r.key, r.name) for r in index.regions] == [
+        ("MapTower", "0", "Area0"),
+        ("MapTower", "1", "Area1"),
+        ("sky_polys", "Sky", "Island"),
+    ]
+    assert len(index.regions[0].rings) == 2
+    assert (index.cols, index.rows) == (8, 5)
+
+
+def test_query_matches_brute_force(index):
+    for x, z in points():
+        assert regions_at(index, x, z) == brute_force(x, z), (x, z)
+        assert regions_at(index, x, z, "sky_polys") == brute_force(x, z, "sky_polys"), (x, z)
+
+
+def test_hole(index):
+    assert regions_at(index, 18, 14) == []
+    assert regions_at(index, 5, 14) == [0]
+    assert regions_at(index, 24, 16) == [2]
+
+
+def test_outside_grid(index):
+    assert index.query(-50, 10) == []
+    assert index.query(10, 500) == []
+
+
+def test_classify_matches_brute_force(index):
+    pytest.importorskip("numpy")
+    xs, zs = zip(*points())
+    for layer in ["MapTower", "sky_polys"]:
+        found = index.classify(xs, zs, layer)
+        for x, z, i in zip(xs, zs, found.tolist()):
+            expected = brute_force(x, z, layer)
+            assert i == (expected[0] if expected else -1), (x, z)
+
+
+def test_json_round_trip(index, tmp_path):
+    path = tmp_path / "region_index.json"
+    index.save(path)
+    loaded = RegionIndex.load(path)
+    assert loaded.to_json() == index.to_json()
+    for x, z in points():
+        assert regions_at(loaded, x, z) == regions_at(index, x, z)
+
+
+def test_version_mismatch(index):
+    data = index.to_json()
+    data["version"] += 1
+    with pytest.raises(ValueError):
+        RegionIndex.from_json(data)
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+import search_index
+from search_index import SearchIndex, decode_postings, encode_postings, parse_query, scan
+
+NAMES = {
+    "TBox_Field_Iron": "Treasure Chest",
+    "TBox_Dungeon_Stone": "Treasure Chest",
+    "Enemy_Bokoblin_Junior": "Bokoblin",
+    "Enemy_Moriblin_Middle": "Blue Moblin",
+    "Weapon_Sword_001": "Traveler's Sword",
+    "Obj_Zonaite_Deposit": "Zonaite Deposit",
+    "Npc_Ore_Seller": "Ore Seller",
+    "Item_Ore_A": "Diamond",
+    "Item_Ore_B": ["not", "a", "name"],
+}
+MESSAGES = {
+    "Hyrule_Castle": "Hyrule Castle",
+    "Lookout_Landing": "Lookout Landing",
+    "Dungeon001": "Wind Temple",
+}
+MARKERS = {
+    "markers": {
+        "Shrine": [
+            {"id": "Dungeon001", "hash_id": "0x0000000000000001", "Translate": {"X": 1.0, "Y": 2.0, "Z": 3.0}},
+            {"id": ["Dungeon", "002"], "name": "Shrine of Ore", "hash_id": "0x00000000000000ff",
+             "Translate": {"X": 4.0, "Y": 5.0, "Z": 6.0}},
+        ],
+        "Location": [
+            {"MessageID": "Lookout_Landing", "hash_id": "0x0a0b0c0d0e0f1011",
+             "Translate": {"X": 7.0, "Y": 8.0, "Z": 9.0}},
+        ],
+    }
+}
+
+QUERIES = [
+    'actor:^"TBox_"',
+    "TBox_ NOT name:Stone",
+    'actor:^"TBox_" NOT actor:Dungeon',
+    "Zonaite Deposit",
+    "chest",
+    "blin",
+    "Ore",
+    "name:Ore",
+    "actor:Ore OR name:Temple",
+    "Weapon_ NOT actor:^Enemy_",
+    "name:Shrine OR name:Tower",
+    "hash:0x00000000000000ff",
+    "hash:0a0b",
+    '"Lookout Landing"',
+    "Lookout Landing",
+    "^Hyrule",
+    "name:^castle",
+    "x",
+    "Bo",
+    "NOT Bokoblin",
+    "nothing_matches_this",
+    "",
+]
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    game_files = tmp_path / "game_files"
+    (game_files / "text" / "StaticMsg").mkdir(parents=True)
+    (game_files / "map_summary" / "MainField").mkdir(parents=True)
+    (game_files / "names.json").write_text(json.dumps(NAMES))
+    (game_files / "text" / "StaticMsg" / "LocationMarker.json").write_text(json.dumps(MESSAGES))
+    (game_files / "map_summary" / "MainField" / "static.json").write_text(json.dumps(MARKERS))
+    # Several document shards even for a handful of documents
+    monkeypatch.setattr(search_index, "DOC_SHARD", 4)
+    search_index.build(tmp_path / "search", game_files, shards=3)
+    return SearchIndex(tmp_path / "search")
+
+
+@pytest.mark.parametrize("ids", [[], [0], [0, 1, 2], [5, 127, 128, 300, 16383, 16384, 1 << 35]])
+def test_postings_round_trip(ids):
+    assert decode_postings(encode_postings(ids)) == ids
+
+
+def test_postings_varint():
+    # Deltas 1, 127, 1, 16256: one byte up to 127, two up to 16383
+    assert encode_postings([1, 128, 129, 16385]) == bytes([1, 0x7F, 1, 0x80, 0x7F])
+    assert decode_postings(memoryview(bytes([0x80, 0x01, 0x02]))) == [128, 130]
+
+
+def terms(query):
+    return [[(t.text, t.field, t.anchored, t.negated) for t in clause] for clause in parse_query(query)]
+
+
+def test_parse_query():
+    assert terms("Zonaite Deposit") == [[("zonaite", None, False, False), ("deposit", None, False, False)]]
+    assert terms('actor:^"TBox_" NOT name:Ore') == [[("tbox_", "actor", True, False), ("ore", "name", False, True)]]
+    assert terms("a OR b AND c") == [[("a", None, False, False)], [("b", None, False, False), ("c", None, False, False)]]
+    assert terms('"Lookout Landing" Weapon*') == [[("lookout landing", None, False, False), ("weapon", None, False, False)]]
+    assert terms("hash:0xff") == [[("0xff", "hash", False, False)]]
+    # Words in quotes or with a field are terms, not operators
+    assert terms('name:OR "NOT"') == [[("or", "name", False, False), ("not", None, False, False)]]
+    # Clauses without a positive term are dropped
+    assert terms("NOT a OR b") == [[("b", None, False, False)]]
+    assert terms("OR OR") == []
+    assert terms("") == []
+
+
+def test_manifest(index):
+    assert index.manifest["docs"] == 8 + 3 + 3
+    assert index.manifest["doc_shard"] == 4
+    assert index.manifest["posting_shards"] == 3
+    assert sorted(p.name for p in (index.path / "docs").iterdir()) == ["0000.json", "0001.json", "0002.json", "0003.json"]
+
+
+def test_marker_documents(index):
+    markers = [index.doc(i) for i in range(index.manifest["docs"]) if index.doc(i)["kind"] == "marker"]
+    assert [(d["category"], d["actor"], d["name"], d["hash"]) for d in markers] == [
+        ("Location", "Lookout_Landing", "Lookout Landing", "0x0a0b0c0d0e0f1011"),
+        ("Shrine", "Dungeon001", "Wind Temple", "0x0000000000000001"),
+        ("Shrine", "Dungeon002", "Shrine of Ore", "0x00000000000000ff"),
+    ]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_scan(index, query):
+    assert index.search(query, -1) == scan(index, query)
+
+
+def test_search_results(index):
+    assert [d["actor"] for d in index.search('actor:^"TBox_"')] == ["TBox_Field_Iron", "TBox_Dungeon_Stone"]
+    assert [d["actor"] for d in index.search("name:Ore")] == ["Npc_Ore_Seller", "Dungeon002"]
+    assert [d["actor"] for d in index.search("Ore", 2)] == ["Npc_Ore_Seller", "Item_Ore_A"]
+    assert index.search("nothing_matches_this") == []
+
+
+def test_rebuild_replaces_index(index, tmp_path):
+    names = dict(NAMES, Obj_New="Brand New")
+    (tmp_path / "game_files" / "names.json").write_text(json.dumps(names))
+    search_index.build(tmp_path / "search", tmp_path / "game_files", shards=3)
+    rebuilt = SearchIndex(tmp_path / "search")
+    assert [d["actor"] for d in rebuilt.search("brand")] == ["Obj_New"]
+    assert not (tmp_path / "search.tmp").exists() and not (tmp_path / "search.old").exists()
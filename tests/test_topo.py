@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+import geo
+import topo
+
+ECOSYSTEM = os.path.join(os.path.dirname(__file__), "..", "public", "game_files", "ecosystem")
+
+
+def square(x, z, size):
+    return [[x, z], [x + size, z], [x + size, z + size], [x, z + size], [x, z]]
+
+
+# Two areas sharing an edge and a lone hole-less island, as layer dicts
+LAYERS = {
+    "0": [
+        {"type": "Polygon", "coordinates": [square(0.0, 0.0, 10.0)], "properties": {"name": "A"}},
+        {"type": "Polygon", "coordinates": [square(10.0, 0.0, 10.0)[::-1]], "properties": {"name": "B"}},
+    ],
+    "1": [
+        {
+            "type": "MultiPolygon",
+            "coordinates": [[square(-51.234, 7.001, 3.3333)], [[[1.004, 2.0], [1.5, 2.0], [1.5, 2.5], [1.004, 2.0]]]],
+        }
+    ],
+}
+
+
+def assert_decodes_to(doc, quantum):
+    """Decodes the encoded document and compares its coordinates with doc"""
+    decoded = topo.decode(json.loads(geo.dumps(topo.encode(doc, quantum))))
+    tolerance = quantum / 2 + 1e-9
+    orig_rings, new_rings = list(geo.rings(doc)), list(geo.rings(decoded))
+    assert len(orig_rings) == len(new_rings)
+    for n, (orig, new) in enumerate(zip(orig_rings, new_rings)):
+        # Decoded rings are closed, may start at another point and drop
+        # points that fell into the same grid cell as their neighbour
+        assert new[0] == new[-1], f"ring {n} is not closed"
+        new = new[:-1]
+        near = [i for i, pt in enumerate(new) if abs(pt[0] - orig[0][0]) <= tolerance and abs(pt[1] - orig[0][1]) <= tolerance]
+        assert near, f"ring {n}: first point missing"
+        i = near[0]
+        for x, z in orig:
+            if abs(new[i][0] - x) > tolerance or abs(new[i][1] - z) > tolerance:
+                i = (i + 1) % len(new)
+            assert abs(new[i][0] - x) <= tolerance and abs(new[i][1] - z) <= tolerance, f"ring {n}: {[x, z]} moved to {new[i]}"
+        assert i == near[0] or (i + 1) % len(new) == near[0], f"ring {n}: decoded ring has extra points"
+
+
+@pytest.mark.parametrize("quantum", [0.01, 0.5])
+def test_layers(quantum):
+    assert_decodes_to(LAYERS, quantum)
+
+
+def test_shared_edge_is_stored_once():
+    encoded = topo.encode(LAYERS)
+    a, b = ({ref if ref >= 0 else ~ref for ref in geom["arcs"][0]} for geom in encoded["objects"]["0"])
+    assert len(a & b) == 1
+
+
+def test_feature_collection():
+    doc = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [square(5.0, 5.0, 1.0)]}, "properties": {}},
+            {"type": "Feature", "geometry": None, "properties": {"empty": True}},
+        ],
+    }
+    decoded = topo.decode(topo.encode(doc))
+    assert decoded["features"][1] == doc["features"][1]
+    assert_decodes_to(doc, 0.01)
+
+
+def test_no_polygons():
+    with pytest.raises(ValueError):
+        topo.encode({"0": []})
+
+
+@pytest.mark.parametrize("name", ["MapTower.json", "cave_polys.json", "sky_polys.json", "cherry_blossom_trees.json"])
+def test_ecosystem_files(name):
+    path = os.path.join(ECOSYSTEM, name)
+    if not os.path.exists(path):
+        pytest.skip(f"{name} not generated")
+    doc = geo.load(path)
+    if not any(True for _ in geo.rings(doc)):
+        pytest.skip(f"{name} has no polygons")
+    assert_decodes_to(doc, 0.01)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Actor pack loading with $parent inheritance, shared by the Pack/Actor tools.
+
+import copy
+import json
+import sys
+
+from pack_index import exists
+from parallel import register_counters
+from parse_cache import load_json
+
+
+class DocumentCache:
+    """Per-run cache of parsed and $parent-resolved actor documents.
+
+    Cached trees are never handed out directly: raw() documents are
+    read-only, and resolved() returns a private deep copy.
+    """
+
+    def __init__(self):
+        self._raw = {}
+        self._resolved = {}
+        self.raw_loads = 0
+        self.raw_hits = 0
+        self.resolved_hits = 0
+        self.parent_loads = 0
+        self.parent_hits = 0
+
+    def raw(self, file):
+        file = str(file)
+        doc = self._raw.get(file)
+        if doc is not None:
+            self.raw_hits += 1
+            return doc
+        self.raw_loads += 1
+        doc = load_json(file)
+        self._raw[file] = doc
+        return doc
+
+    def root(self, file):
+        raw = self.raw(file)
+        root = raw.get("RootNode")
+        if root is None:
+            print(raw)
+            raise ValueError("RootNode does not exist in", file)
+        return root
+
+    def resolved(self, chain):
+        # chain: the actual files from the document up to its last $parent
+        key = tuple(chain)
+        doc = self._resolved.get(key)
+        if doc is None:
+            doc = self._resolve(key)
+        else:
+            self.resolved_hits += 1
+        return copy.deepcopy(doc)
+
+    def _resolve(self, chain):
+        root = copy.deepcopy(self.root(chain[0]))
+        if len(chain) > 1:
+            parent = self._resolved.get(chain[1:])
+            if parent is None:
+                self.parent_loads += 1
+                parent = self._resolve(chain[1:])
+            else:
+                self.parent_hits += 1
+            root = merge(copy.deepcopy(parent), root)
+        self._resolved[chain] = root
+        return root
+
+    def counters(self):
+        return {
+            "raw_loads": self.raw_loads,
+            "raw_hits": self.raw_hits,
+            "resolved_hits": self.resolved_hits,
+            "parent_loads": self.parent_loads,
+            "parent_hits": self.parent_hits,
+        }
+
+    def add_counters(self, counters):
+        for key, value in counters.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def report(self, file=sys.stderr):
+        print(
+            f"documents: {self.raw_loads} loaded, {self.raw_hits} reused,"
+            f" {self.resolved_hits} resolved reused;"
+            f" {self.parent_loads} parents resolved, {self.parent_hits} parent loads saved",
+            file=file,
+        )
+
+
+documents = DocumentCache()
+register_counters(documents)
+
+
+class ActorLoader:
+    def __init__(self, work, rescom, docs=None):
+        self.work = work
+        self.rescom = rescom
+        self.docs = docs or documents
+
+    def find_file(self, files):
+        file = files[0]
+        if not exists(file):
+            file = files[1]
+            if not exists(file):
+                raise ValueError("file does not exist", file)
+        return file
+
+    def load_json(self, files):
+        return self.docs.raw(self.find_file(files))
+
+    def load_file(self, file, fix_path=True):
+        if fix_path:
+            file = self.get_path(file)
+        file = self.find_file(file)
+        chain = [file]
+        parent_file = self.docs.root(file).get("$parent")
+        while parent_file:
+            file = self.find_file(self.get_path(parent_file))
+            chain.append(file)
+            parent_file = self.docs.root(file).get("$parent")
+        return self.docs.resolved(chain)
+
+    def get_path(self, file):
+        WORK = self.work  # paths['WORK']
+        RESCOM = self.rescom  # paths['RESCOM']
+        file = file.replace(".gyml", ".json").replace(".bgyml", ".json")
+        work = file.replace("Work/", f"{WORK}/").replace("?", f"{WORK}/", 1)
+        rescom = file.replace("Work/", f"{RESCOM}/").replace("?", f"{RESCOM}/", 1)
+        return [work, rescom]
+
+
+def merge(a, b, path=None):
+    "merges b into a"
+    if path is None:
+        path = []
+    for key in b:
+        if key in a:
+            if isinstance(a[key], dict) and isinstance(b[key], dict):
+                merge(a[key], b[key], path + [str(key)])
+            elif a[key] == b[key]:
+                pass  # same leaf value
+            else:
+                # raise Exception('Conflict at %s' % '.'.join(path + [str(key)]))
+                a[key] = b[key]
+        else:
+            a[key] = b[key]
+    return a
+
+
+class Actor:
+    def __init__(self, param_file, loader):
+        self._param_file = str(param_file)
+        self.ActorParam = loader.load_file([self._param_file, ""], fix_path=False)
+
+    def read_component(self, component_name, loader):
+        components = self.ActorParam.get("Components")
+        if not components:
+            return False
+        component = components.get(component_name)
+        if not component:
+            return False
+        data = loader.load_file(component)
+        components[component_name] = data
+        components[component_name]["_file"] = component
+        return True
+
+    def getPath(self, path):
+        parts = path.split("/")
+        ref = self.__dict__
+        for part in parts:
+            tmp = ref.get(part)
+            if not tmp:
+                return None
+            ref = tmp
+        return tmp
+
+    def toJSON(self):
+        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True, indent=2)
+
+    def readDropTables(self, loader):
+        if not self.read_component("DropRef", loader):
+            return None
+        rsclist = self.ActorParam["Components"]["DropRef"]["DropTableResourceList"]
+        tables = []
+        for rsc in rsclist:
+            table = loader.load_file(rsc)
+            if not "DropTableName" in table:
+                table["DropTableName"] = ""
+            els = table.get("DropTableElementResourceList", [])
+            table["items"] = [loader.load_file(el) for el in els]
+            tables.append(table)
+        return tables
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# Incremental build of public/game_files from a game dump.
+#
+# Each generator is declared below with its inputs and outputs. A step only
+#   runs when the fingerprint (size + mtime) of its script, the repository
+#   modules it imports, its arguments or inputs changed since the last build,
+#   or when one of its outputs is missing. Steps whose inputs are produced by
+#   other steps wait for them; independent steps run concurrently, except the
+#   ones starting a worker pool (-j): those run one at a time with a worker
+#   per CPU, so concurrent steps do not start a pool each.
+#
+# Every step runs in a scratch directory under the output directory (so the
+#   generators keep writing to their cwd) and its outputs are moved into place
+#   with os.replace once the step succeeded. Parsed inputs are cached in
+#   .parse_cache/ next to the build state (tools/parse_cache.py) unless
+#   OBJMAP_PARSE_CACHE_DIR is set.
+#
+#   ./tools/build_game_files.py --romfs path/to/romfs --msg path/to/Mals
+#
+# With --profile DIR the generators that support it (tools/profiling.py) write
+#   their timing reports to DIR.
+#
+# With -z every JSON file in the output directory also gets precompressed
+#   .gz/.br siblings afterwards (tools/precompress.py).
+#
+# Input roots:
+#   romfs:  dumped romfs converted to yml/json (Actor/, Banc/, Ecosystem/, Pack/, WorldMgr/)
+#   msg:    msyt exports, containing USen.Product.100/
+#   repo:   this repository
+#   out:    the output directory (public/game_files)
+#
+# map_gen_markers.py is not part of the build: it reads BotW map files that
+#   are not generated for TotK and writes the same static.json as
+#   make_static_list.py.
+
+import argparse
+import ast
+import contextlib
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import precompress
+
+ROOT = Path(__file__).resolve().parent.parent
+TOOLS = ROOT / "tools"
+STATE_FILE = ".build_state.json"
+CACHE_DIR = ".parse_cache"
+
+
+class Step:
+    def __init__(self, name, script, cwd, args=(), inputs=(), outputs=None, links=(), stdout=None, pool=False):
+        self.name = name
+        self.script = script
+        # "romfs" or "repo": what the scratch directory mirrors
+        self.cwd = cwd
+        self.args = list(args)
+        self.inputs = list(inputs)
+        # produced file (relative to the scratch dir) -> destination under out
+        self.outputs = dict(outputs or {})
+        # extra files made visible in the scratch dir: name -> input path
+        self.links = dict(links)
+        # file under out that receives the step's stdout
+        self.stdout = stdout
+        # the script takes -j and starts a worker pool (parallel.py)
+        self.pool = pool
+
+    def destinations(self):
+        dests = list(self.outputs.values())
+        if self.stdout:
+            dests.append(self.stdout)
+        return dests
+
+
+STEPS = [
+    Step(
+        "climate",
+        ROOT / "gen_climate_data.py",
+        "romfs",
+        inputs=["romfs:Ecosystem/AreaData.yml", "romfs:WorldMgr/normal.winfo.yml"],
+        outputs={
+            "area_data.json": "area_data.json",
+            "area_data": "area_data",
+            "climate_data.json": "climate_data.json",
+        },
+    ),
+    Step(
+        "area_interned",
+        TOOLS / "interned.py",
+        "repo",
+        args=["encode", "{out}/area_data.json", "area_data.interned.json", "--plain-depth", "2"],
+        inputs=["out:area_data.json"],
+        outputs={"area_data.interned.json": "area_data.interned.json"},
+    ),
+    Step(
+        "object_meta",
+        ROOT / "gen_object_meta.py",
+        "romfs",
+        inputs=["romfs:Actor/ActorLink/*.yml", "romfs:Actor/GeneralParamList/*.gparamlist.yml"],
+        outputs={"object_meta.json": "object_meta.json"},
+        pool=True,
+    ),
+    Step(
+        "names",
+        TOOLS / "make_names_list.py",
+        "repo",
+        args=["{msg}"],
+        inputs=[
+            "msg:USen.Product.100/ActorMsg/*.msyt",
+            "repo:tools/names_extra.json",
+            "repo:missing.csv",
+        ],
+        outputs={"names.json": "names.json"},
+        pool=True,
+    ),
+    Step(
+        "dungeon",
+        TOOLS / "make_dungeon_list.py",
+        "repo",
+        args=["{msg}"],
+        inputs=["msg:USen.Product.100/LocationMsg/Dungeon.msyt"],
+        outputs={"Dungeon.json": "text/StaticMsg/Dungeon.json"},
+        pool=True,
+    ),
+    Step(
+        "location",
+        TOOLS / "make_location_list.py",
+        "repo",
+        args=["{msg}"],
+        inputs=["msg:USen.Product.100/LocationMsg/Location.msyt"],
+        outputs={"LocationMarker.json": "text/StaticMsg/LocationMarker.json"},
+        pool=True,
+    ),
+    Step(
+        "text_list",
+        TOOLS / "msg_gen_list.py",
+        "repo",
+        args=["{out}/text", "-o", "list.json", "--pack", "text_bundle"],
+        inputs=["out:text/*/*.json", "out:names.json"],
+        outputs={"list.json": "text/list.json", "text_bundle": "text_bundle"},
+    ),
+    Step(
+        "static",
+        TOOLS / "make_static_list.py",
+        "repo",
+        args=["{romfs}"],
+        inputs=[
+            "romfs:Banc/*/LocationArea/*.locationarea.json",
+            "romfs:Banc/*/HiddenKorok/*.hiddenkorok.json",
+            "repo:tools/koroks_id.json",
+            "repo:tools/rbox.json",
+            "repo:tools/shrine_caves.json",
+        ],
+        outputs={"static.json": "map_summary/MainField/static.json"},
+    ),
+    Step(
+        "horn",
+        TOOLS / "get_horn_data.py",
+        "romfs",
+        inputs=["romfs:Pack/Actor/*/**/*.json", "romfs:Pack/ResidentCommon/**/*.json", "out:names.json"],
+        links={"names.json": "out:names.json"},
+        stdout="horn_material.json",
+        pool=True,
+    ),
+    Step(
+        "drop_tables",
+        TOOLS / "make_drop_tables.py",
+        "romfs",
+        inputs=["romfs:Pack/Actor/*/**/*.json", "romfs:Pack/ResidentCommon/**/*.json"],
+        outputs={"drop_tables.json": "drop_tables.json"},
+        pool=True,
+    ),
+]
+
+
+class Build:
+    def __init__(self, roots, jobs, force=False, verbose=False, profile=None):
+        self.roots = roots
+        self.jobs = jobs
+        self.force = force
+        self.verbose = verbose
+        self.profile = profile
+        # Worker processes of the one pooled step running at a time
+        self.workers = os.cpu_count() or 1
+        self.pool_lock = threading.Lock()
+        self.out = roots["out"]
+        self.state_path = self.out / STATE_FILE
+        try:
+            with open(self.state_path, "r") as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+
+    def resolve(self, spec):
+        root, _, pattern = spec.partition(":")
+        return self.roots[root], pattern
+
+    def expand(self, spec):
+        base, pattern = self.resolve(spec)
+        return sorted(glob.glob(str(base / pattern), recursive=True))
+
+    def dependencies(self, step, steps):
+        deps = set()
+        for spec in step.inputs + list(step.links.values()):
+            root, _, pattern = spec.partition(":")
+            if root != "out":
+                continue
+            for other in steps:
+                if other.name != step.name and any(fnmatch.fnmatch(dest, pattern) for dest in other.destinations()):
+                    deps.add(other.name)
+        return deps
+
+    def command(self, step):
+        fmt = {key: str(path) for key, path in self.roots.items()}
+        return [sys.executable, str(step.script)] + [arg.format(**fmt) for arg in step.args]
+
+    def modules(self, script):
+        """script and the repository modules it imports, recursively"""
+        found, todo = set(), [Path(script)]
+        while todo:
+            path = todo.pop()
+            if path in found:
+                continue
+            found.add(path)
+            with open(path, "rb") as f:
+                tree = ast.parse(f.read(), str(path))
+            names = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names.update(alias.name.split(".")[0] for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    names.add(node.module.split(".")[0])
+            for name in names:
+                # The scripts import the tools as top level modules
+                for directory in (path.parent, TOOLS):
+                    if (directory / f"{name}.py").exists():
+                        todo.append(directory / f"{name}.py")
+                        break
+        return sorted(str(p) for p in found)
+
+    def fingerprint(self, step):
+        h = hashlib.sha1()
+        h.update(json.dumps(self.command(step)).encode())
+        for path in self.modules(step.script) + [p for spec in step.inputs for p in self.expand(spec)]:
+            st = os.stat(path)
+            h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()
+
+    def up_to_date(self, step, fingerprint):
+        if self.force or self.state.get(step.name) != fingerprint:
+            return False
+        return all((self.out / dest).exists() for dest in step.destinations())
+
+    def scratch(self, step):
+        work = Path(tempfile.mkdtemp(prefix=f".build-{step.name}-", dir=self.out))
+        src = self.roots[step.cwd]
+        # Stale copies of the outputs must not be linked, or the step would
+        #   write through the link into the input tree
+        skip = set(step.outputs) | set(step.links) | {".stdout"}
+        for entry in os.scandir(src):
+            if entry.name not in skip:
+                os.symlink(entry.path, work / entry.name)
+        for name, spec in step.links.items():
+            base, pattern = self.resolve(spec)
+            os.symlink(base / pattern, work / name)
+        return work
+
+    def run(self, step):
+        work = self.scratch(step)
+        try:
+            env = dict(os.environ)
+            # Keep the parse cache out of the throwaway scratch directory and
+            #   out of the (possibly read-only) input dump
+            env.setdefault("OBJMAP_PARSE_CACHE_DIR", str(self.out / CACHE_DIR))
+            if self.profile:
+                env["OBJMAP_PROFILE"] = str(self.profile)
+            command = self.command(step)
+            if step.pool:
+                command += ["-j", str(self.workers)]
+            stdout = open(work / ".stdout", "w") if step.stdout else subprocess.DEVNULL
+            try:
+                with self.pool_lock if step.pool else contextlib.nullcontext():
+                    result = subprocess.run(
+                        command,
+                        cwd=work,
+                        env=env,
+                        stdout=stdout if step.stdout or not self.verbose else None,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                    )
+            finally:
+                if step.stdout:
+                    stdout.close()
+            if result.returncode != 0:
+                raise RuntimeError(f"{step.name} failed ({result.returncode}):\n{result.stderr}")
+            if self.verbose and result.stderr:
+                print(result.stderr, end="", file=sys.stderr)
+            produced = dict(step.outputs)
+            if step.stdout:
+                produced[".stdout"] = step.stdout
+            for name, dest in produced.items():
+                src = work / name
+                if src.is_symlink() or not src.exists():
+                    raise RuntimeError(f"{step.name} did not produce {name}")
+                dest = self.out / dest
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                if src.is_dir() and dest.exists():
+                    # Directories cannot replace each other; swap via a rename
+                    old = work / ".old"
+                    os.rename(dest, old)
+                os.replace(src, dest)
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+    def save_state(self):
+        fd, tmp = tempfile.mkstemp(dir=self.out, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def build(self, steps, dry_run=False):
+        deps = {step.name: self.dependencies(step, steps) for step in steps}
+        pending = {step.name: step for step in steps}
+        done, failed = set(), set()
+        running = {}
+
+        with ThreadPoolExecutor(self.jobs) as ex:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    if deps[name] & failed:
+                        print(f"skip   {name} (dependency failed)")
+                        failed.add(name)
+                        del pending[name]
+                    elif deps[name] <= done:
+                        del pending[name]
+                        fingerprint = self.fingerprint(step)
+                        if self.up_to_date(step, fingerprint):
+                            print(f"ok     {name}")
+                            done.add(name)
+                        elif dry_run:
+                            print(f"stale  {name}")
+                            done.add(name)
+                        else:
+                            print(f"run    {name}")
+                            running[ex.submit(self.run, step)] = (step, fingerprint, time.perf_counter())
+                if not running:
+                    if pending and not any(deps[n] <= done | failed for n in pending):
+                        raise RuntimeError(f"dependency cycle between {sorted(pending)}")
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step, fingerprint, start = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"FAIL   {step.name}\n{e}", file=sys.stderr)
+                        failed.add(step.name)
+                        self.state.pop(step.name, None)
+                        continue
+                    print(f"done   {step.name} ({time.perf_counter() - start:.1f}s)")
+                    done.add(step.name)
+                    self.state[step.name] = fingerprint
+                    self.save_state()
+        return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally regenerate public/game_files")
+    parser.add_argument("--romfs", type=Path, required=True, help="dumped and converted romfs")
+    parser.add_argument("--msg", type=Path, required=True, help="msyt exports (contains USen.Product.100)")
+    parser.add_argument("--out", type=Path, default=ROOT / "public" / "game_files")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="steps run at once")
+    parser.add_argument("-f", "--force", action="store_true", help="rebuild even if up to date")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="only report stale steps")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show generator output")
+    parser.add_argument("-z", "--compress", action="store_true", help="write .gz/.br siblings afterwards")
+    parser.add_argument("--profile", type=Path, metavar="DIR", help="write generator timing reports to DIR (tools/profiling.py)")
+    parser.add_argument("steps", nargs="*", help=f"subset of: {' '.join(s.name for s in STEPS)}")
+    args = parser.parse_args()
+
+    roots = {
+        "romfs": args.romfs.resolve(),
+        "msg": args.msg.resolve(),
+        "repo": ROOT,
+        "out": args.out.resolve(),
+    }
+    steps = STEPS
+    if args.steps:
+        unknown = set(args.steps) - {s.name for s in STEPS}
+        if unknown:
+            parser.error(f"unknown steps: {' '.join(sorted(unknown))}")
+        steps = [s for s in STEPS if s.name in args.steps]
+
+    roots["out"].mkdir(parents=True, exist_ok=True)
+    profile = args.profile.resolve() if args.profile else None
+    build = Build(roots, args.jobs, force=args.force, verbose=args.verbose, profile=profile)
+    if not build.build(steps, dry_run=args.dry_run):
+        sys.exit(1)
+    if args.compress and not args.dry_run:
+        precompress.run(roots["out"], args.jobs, quiet=not args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# BYML (v2 - v7) reader working directly on the game files.
+#
+# Reads .byml files through mmap and .byml.zs files after decompressing them
+#   with the romfs zstd dictionary (ZsDic/zs.zsdic, needs the optional
+#   zstandard package), so the generators do not need the byml -> yml -> json
+#   conversion. Containers are decoded lazily: Document.root is a Hash or Array
+#   view whose children are only read when accessed, and dict lookups binary
+#   search the sorted key table. load() and to_python() materialize plain
+#   dicts and lists shaped like the JSON exports.
+#
+# Node types: 0xA0 string, 0xA1 binary, 0xA2 file data (binary with
+#   alignment), 0xC0 array, 0xC1 dict, 0x20/0x21 dicts keyed by 32/64 bit
+#   hashes (v7), 0xD0 bool, 0xD1 s32, 0xD2 f32, 0xD3 u32, 0xD4 s64, 0xD5 u64,
+#   0xD6 f64, 0xFF null. Lazy access returns f32 values as the exact f32
+#   widened to a float; load() and to_python() return the shortest decimal
+#   that reads back as the same f32, as the converters write them to JSON.
+#
+#   ./tools/byml.py dump Banc/MainField/LocationArea/MainField.locationarea.byml.zs --zsdic ZsDic/zs.zsdic -o out.json
+#   ./tools/byml.py get file.byml Shrine/0/Trans
+
+import argparse
+import functools
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STRING = 0xA0
+BINARY = 0xA1
+FILE_DATA = 0xA2
+ARRAY = 0xC0
+DICT = 0xC1
+STRING_TABLE = 0xC2
+HASH32 = 0x20
+HASH64 = 0x21
+BOOL = 0xD0
+INT = 0xD1
+FLOAT = 0xD2
+UINT = 0xD3
+INT64 = 0xD4
+UINT64 = 0xD5
+DOUBLE = 0xD6
+NULL = 0xFF
+
+CONTAINERS = (ARRAY, DICT, HASH32, HASH64)
+LONG = {INT64: "q", UINT64: "Q", DOUBLE: "d"}
+
+
+def _f32(bits):
+    return struct.unpack("<f", struct.pack("<I", bits))[0]
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _short_f32(bits):
+    value = _f32(bits)
+    if not math.isfinite(value):
+        return value
+    packed = struct.pack("<f", value)
+    for digits in range(6, 10):
+        short = float(f"{value:.{digits}g}")
+        if struct.pack("<f", short) == packed:
+            return short
+    return value
+
+
+class _StringTable:
+    def __init__(self, doc, offset):
+        self.doc = doc
+        self.count = doc._header(offset, STRING_TABLE)[1] if offset else 0
+        self.offsets = offset + 4
+        self.base = offset
+        self.cache = {}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        s = self.cache.get(i)
+        if s is None:
+            if not 0 <= i < self.count:
+                raise IndexError(i)
+            start, end = struct.unpack_from(self.doc.endian + "II", self.doc.buf, self.offsets + 4 * i)
+            s = bytes(self.doc.buf[self.base + start : self.base + end]).split(b"\0", 1)[0].decode("utf-8")
+            self.cache[i] = s
+        return s
+
+    def index(self, s):
+        """Position of s in the (sorted) table, -1 if missing"""
+        target = s.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = self[mid].encode("utf-8")
+            if key == target:
+                return mid
+            if key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return -1
+
+
+class Document:
+    """A BYML document over a buffer (bytes or mmap)"""
+
+    def __init__(self, buf):
+        self.buf = buf
+        magic = bytes(buf[:2])
+        if magic == b"BY":
+            self.endian = ">"
+        elif magic == b"YB":
+            self.endian = "<"
+        else:
+            raise ValueError(f"not a BYML file (magic {magic!r})")
+        self.version, keys, strings, self.root_offset = struct.unpack_from(self.endian + "HIII", buf, 2)
+        if not 2 <= self.version <= 7:
+            raise ValueError(f"unsupported BYML version {self.version}")
+        self.keys = _StringTable(self, keys)
+        self.strings = _StringTable(self, strings)
+
+    def _header(self, offset, expect=None):
+        kind = self.buf[offset]
+        raw = bytes(self.buf[offset + 1 : offset + 4])
+        count = int.from_bytes(raw, "big" if self.endian == ">" else "little")
+        if expect is not None and kind != expect:
+            raise ValueError(f"expected node 0x{expect:02x} at 0x{offset:x}, found 0x{kind:02x}")
+        return kind, count
+
+    @property
+    def root(self):
+        if not self.root_offset:
+            return None
+        return self._container(self.buf[self.root_offset], self.root_offset)
+
+    def _container(self, kind, offset):
+        if kind == ARRAY:
+            return Array(self, offset)
+        if kind == DICT:
+            return Hash(self, offset)
+        if kind in (HASH32, HASH64):
+            return HashMap(self, offset)
+        raise ValueError(f"unknown container 0x{kind:02x} at 0x{offset:x}")
+
+    def _value(self, kind, raw):
+        """Decodes a child value from its type and the u32 stored in its parent"""
+        if kind == STRING:
+            return self.strings[raw]
+        if kind in CONTAINERS:
+            return self._container(kind, raw)
+        if kind == INT:
+            return raw - (1 << 32) if raw & 0x80000000 else raw
+        if kind == FLOAT:
+            return _f32(raw)
+        if kind == UINT:
+            return raw
+        if kind == BOOL:
+            return raw != 0
+        if kind in LONG:
+            return struct.unpack_from(self.endian + LONG[kind], self.buf, raw)[0]
+        if kind == NULL:
+            return None
+        if kind == BINARY:
+            size = struct.unpack_from(self.endian + "I", self.buf, raw)[0]
+            return bytes(self.buf[raw + 4 : raw + 4 + size])
+        if kind == FILE_DATA:
+            size = struct.unpack_from(self.endian + "I", self.buf, raw)[0]
+            return bytes(self.buf[raw + 8 : raw + 8 + size])
+        raise ValueError(f"unknown node type 0x{kind:02x}")
+
+    def to_python(self):
+        return to_python(self.root)
+
+
+class Array(Sequence):
+    def __init__(self, doc, offset):
+        self.doc = doc
+        self.offset = offset
+        self.count = doc._header(offset, ARRAY)[1]
+        self.values = offset + 4 + (self.count + 3) // 4 * 4
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self.doc._value(*self._entry(i))
+
+    def _entry(self, i):
+        raw = struct.unpack_from(self.doc.endian + "I", self.doc.buf, self.values + 4 * i)[0]
+        return self.doc.buf[self.offset + 4 + i], raw
+
+    def __repr__(self):
+        return f"<byml.Array 0x{self.offset:x} len={self.count}>"
+
+
+class Hash(Mapping):
+    """String keyed dict; entries are sorted by key"""
+
+    def __init__(self, doc, offset):
+        self.doc = doc
+        self.offset = offset
+        self.count = doc._header(offset, DICT)[1]
+        self._big = doc.endian == ">"
+
+    def _entry(self, i):
+        # u24 key index, u8 type, u32 value
+        pos = self.offset + 4 + 8 * i
+        raw = bytes(self.doc.buf[pos : pos + 3])
+        key = int.from_bytes(raw, "big" if self._big else "little")
+        value = struct.unpack_from(self.doc.endian + "I", self.doc.buf, pos + 4)[0]
+        return key, self.doc.buf[pos + 3], value
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.doc.keys[self._entry(i)[0]]
+
+    def __getitem__(self, key):
+        index = self.doc.keys.index(key) if isinstance(key, str) else -1
+        lo, hi = 0, self.count
+        while lo < hi and index >= 0:
+            mid = (lo + hi) // 2
+            k, kind, value = self._entry(mid)
+            if k == index:
+                return self.doc._value(kind, value)
+            if k < index:
+                lo = mid + 1
+            else:
+                hi = mid
+        raise KeyError(key)
+
+    def items(self):
+        for i in range(self.count):
+            k, kind, value = self._entry(i)
+            yield self.doc.keys[k], self.doc._value(kind, value)
+
+    def __repr__(self):
+        return f"<byml.Hash 0x{self.offset:x} len={self.count}>"
+
+
+class HashMap(Mapping):
+    """Dict keyed by 32 or 64 bit hashes (v7)"""
+
+    def __init__(self, doc, offset):
+        self.doc = doc
+        self.offset = offset
+        kind, self.count = doc._header(offset)
+        self.key_format = doc.endian + ("I" if kind == HASH32 else "Q")
+        self.stride = struct.calcsize(self.key_format) + 4
+        # Entries (key, u32 value), then one type byte per entry
+        self.types = offset + 4 + self.stride * self.count
+        self._index = None
+
+    def _entry(self, i):
+        pos = self.offset + 4 + self.stride * i
+        key = struct.unpack_from(self.key_format, self.doc.buf, pos)[0]
+        value = struct.unpack_from(self.doc.endian + "I", self.doc.buf, pos + self.stride - 4)[0]
+        return key, self.doc.buf[self.types + i], value
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self._entry(i)[0]
+
+    def __getitem__(self, key):
+        if self._index is None:
+            self._index = {self._entry(i)[0]: i for i in range(self.count)}
+        _, kind, value = self._entry(self._index[key])
+        return self.doc._value(kind, value)
+
+    def items(self):
+        for i in range(self.count):
+            k, kind, value = self._entry(i)
+            yield k, self.doc._value(kind, value)
+
+    def __repr__(self):
+        return f"<byml.HashMap 0x{self.offset:x} len={self.count}>"
+
+
+def _materialize(doc, kind, raw):
+    if kind == FLOAT:
+        return _short_f32(raw)
+    value = doc._value(kind, raw)
+    return to_python(value) if kind in CONTAINERS else value
+
+
+def to_python(node):
+    """Materializes a lazy node as dicts and lists shaped like the JSON exports"""
+    if isinstance(node, Hash):
+        entries = (node._entry(i) for i in range(node.count))
+        return {node.doc.keys[k]: _materialize(node.doc, kind, raw) for k, kind, raw in entries}
+    if isinstance(node, HashMap):
+        entries = (node._entry(i) for i in range(node.count))
+        return {k: _materialize(node.doc, kind, raw) for k, kind, raw in entries}
+    if isinstance(node, Array):
+        return [_materialize(node.doc, *node._entry(i)) for i in range(node.count)]
+    return node
+
+
+def _zstd_decompress(data, zsdic=None):
+    if zstandard is None:
+        raise ImportError("reading .zs files needs the zstandard package (pip install zstandard)")
+    kwargs = {}
+    if zsdic:
+        with open(zsdic, "rb") as f:
+            kwargs["dict_data"] = zstandard.ZstdCompressionDict(f.read())
+    return zstandard.ZstdDecompressor(**kwargs).decompressobj().decompress(data)
+
+
+def open_document(path, zsdic=None):
+    """Opens path lazily: .byml through mmap, .zs decompressed in memory"""
+    path = str(path)
+    with open(path, "rb") as f:
+        if path.endswith(".zs"):
+            return Document(_zstd_decompress(f.read(), zsdic))
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{path}: empty file")
+        return Document(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def load(path, zsdic=None):
+    return open_document(path, zsdic).to_python()
+
+
+def loads(data):
+    return Document(data).to_python()
+
+
+def find_zsdic(path):
+    """Looks for ZsDic/zs.zsdic in the romfs above path"""
+    parent = os.path.dirname(os.path.abspath(path))
+    while True:
+        candidate = os.path.join(parent, "ZsDic", "zs.zsdic")
+        if os.path.exists(candidate):
+            return candidate
+        up = os.path.dirname(parent)
+        if up == parent:
+            return None
+        parent = up
+
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(type(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read BYML (.byml, .byml.zs) files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("dump", "get"):
+        p = sub.add_parser(name)
+        p.add_argument("file")
+        if name == "get":
+            p.add_argument("path", nargs="?", default="", help="slash separated keys / indexes")
+        else:
+            p.add_argument("-o", "--output", help="write JSON here instead of stdout")
+        p.add_argument("--zsdic", help="zstd dictionary (default: ZsDic/zs.zsdic above the file)")
+    args = parser.parse_args()
+
+    zsdic = args.zsdic or (find_zsdic(args.file) if args.file.endswith(".zs") else None)
+    doc = open_document(args.file, zsdic)
+    if args.command == "dump":
+        out = open(args.output, "w") if args.output else sys.stdout
+        json.dump(doc.to_python(), out, default=_json_default)
+        return
+    node = doc.root
+    for part in filter(None, args.path.split("/")):
+        if isinstance(node, Array):
+            node = node[int(part)]
+        elif isinstance(node, HashMap):
+            node = node[int(part, 0)]
+        else:
+            node = node[part]
+    if isinstance(node, (Hash, HashMap)):
+        for k, v in node.items():
+            print(f"{k}: {v!r}")
+    else:
+        print(json.dumps(to_python(node), default=_json_default))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# Level of detail versions of the ecosystem polygon layers, optionally cut
+#   into zoom/x/y tiles.
+#
+# Every level covers a range of map zooms and is simplified (tools/geo.py)
+#   with a tolerance of half a screen pixel at its highest zoom; the last
+#   level keeps the full geometry. Output per layer:
+#
+#   out/<layer>/index.json   {"levels": [{min_zoom, max_zoom, tolerance, path,
+#                            bytes, vertices}], "tiles": {...}}
+#   out/<layer>/<n>.json     level n, same layout as the source file
+#   out/<layer>/tiles/<z>/<x>/<y>.json
+#                            with --tiles: the level for zoom z clipped to the
+#                            tile (plus a small buffer). Tiles without
+#                            geometry are not written, and levels under
+#                            TILE_MIN_BYTES are not tiled at all; "zooms" in
+#                            index.json lists the tiled zooms.
+#
+# Tiles follow the map's CRS (src/MapBase.ts): at zoom z a map unit is
+#   4 * 2^z / TILE_SIZE pixels and x = -MAP_SIZE[0] / 4 is pixel 0, as in
+#   L.Transformation(4 / TILE_SIZE, MAP_SIZE[0] / TILE_SIZE, ...).
+#
+#   ./tools/ecosystem_lod.py -o out/ecosystem_lod public/game_files/ecosystem/{MapTower,cave_polys,sky_polys,cherry_blossom_trees}.json
+#   ./tools/ecosystem_lod.py --tiles -o out/ecosystem_lod public/game_files/ecosystem/cave_polys.json
+
+import argparse
+import copy
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+import geo
+
+# Keep in sync with src/util/map.ts
+TILE_SIZE = 256
+MAP_SIZE = (24000, 20000)
+MIN_ZOOM = 2
+MAX_ZOOM = 10
+# Highest zoom with base map tiles; tiles stop here and are overzoomed
+MAX_TILE_ZOOM = 7
+
+# (min_zoom, max_zoom) of every level
+LEVELS = [(MIN_ZOOM, 3), (4, 5), (6, 7), (8, MAX_ZOOM)]
+PRECISION = 2
+BUFFER_PX = 4
+# Levels smaller than this are only served whole
+TILE_MIN_BYTES = 64 * 1024
+
+
+def units_per_pixel(zoom):
+    return TILE_SIZE / (4 * 2**zoom)
+
+
+def tile_bounds(z, x, y, buffer_px=0):
+    size = TILE_SIZE * units_per_pixel(z)
+    pad = buffer_px * units_per_pixel(z)
+    x0 = x * size - MAP_SIZE[0] / 4
+    z0 = y * size - MAP_SIZE[1] / 4
+    return x0 - pad, z0 - pad, x0 + size + pad, z0 + size + pad
+
+
+def tile_range(bbox, z):
+    size = TILE_SIZE * units_per_pixel(z)
+    x0, z0, x1, z1 = bbox
+    return (
+        range(math.floor((x0 + MAP_SIZE[0] / 4) / size), math.floor((x1 + MAP_SIZE[0] / 4) / size) + 1),
+        range(math.floor((z0 + MAP_SIZE[1] / 4) / size), math.floor((z1 + MAP_SIZE[1] / 4) / size) + 1),
+    )
+
+
+def _entries(doc):
+    """Yields (slot, geometry) where slot says where the geometry belongs"""
+    if "features" in doc:
+        for i, feature in enumerate(doc["features"]):
+            if feature.get("geometry"):
+                yield i, feature["geometry"]
+    else:
+        for key, layer in doc.items():
+            for geom in layer:
+                yield key, geom
+
+
+def _assemble(doc, items):
+    """Builds a document like doc holding only items [(slot, geometry)]"""
+    if "features" in doc:
+        return dict(doc, features=[dict(doc["features"][i], geometry=g) for i, g in items])
+    out = {}
+    for key, geom in items:
+        out.setdefault(key, []).append(geom)
+    return out
+
+
+def _geom_bounds(geom):
+    if geom["type"] == "Point":
+        x, z = geom["coordinates"][:2]
+        return x, z, x, z
+    boxes = [geo.bounds(poly[0]) for poly in geo.polygons(geom) if poly and poly[0]]
+    if not boxes:
+        return None
+    return min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)
+
+
+def cut_tiles(doc, z):
+    """Returns {(x, y): tile document} for zoom z"""
+    tiles = {}
+    for slot, geom in _entries(doc):
+        bbox = _geom_bounds(geom)
+        if bbox is None:
+            continue
+        xs, ys = tile_range(bbox, z)
+        for x in xs:
+            for y in ys:
+                clipped = geo.clip(geom, tile_bounds(z, x, y, BUFFER_PX))
+                if clipped is None:
+                    continue
+                # Clipping adds edge crossings at full float precision
+                for poly in geo.polygons(clipped):
+                    poly[:] = [geo.quantize_ring(ring, PRECISION) for ring in poly]
+                tiles.setdefault((x, y), []).append((slot, clipped))
+    return {key: _assemble(doc, items) for key, items in tiles.items()}
+
+
+def build_layer(path, out, levels=LEVELS, tiles=False):
+    name = Path(path).stem
+    source = geo.load(path)
+    tmp = out / f".{name}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    index = {"source": Path(path).name, "levels": []}
+    docs = []
+    for n, (min_zoom, max_zoom) in enumerate(levels):
+        doc = copy.deepcopy(source)
+        tolerance = 0.0
+        if n < len(levels) - 1:
+            tolerance = units_per_pixel(max_zoom) / 2
+            geo.simplify(doc, tolerance, PRECISION)
+        text = geo.dumps(doc)
+        with open(tmp / f"{n}.json", "w") as f:
+            f.write(text)
+        docs.append(doc)
+        index["levels"].append({
+            "min_zoom": min_zoom,
+            "max_zoom": max_zoom,
+            "tolerance": tolerance,
+            "path": f"{n}.json",
+            "bytes": len(text.encode()),
+            "vertices": geo.vertex_count(doc),
+        })
+
+    if tiles:
+        count, zooms = 0, []
+        for n, (min_zoom, max_zoom) in enumerate(levels):
+            if index["levels"][n]["bytes"] < TILE_MIN_BYTES:
+                continue
+            for z in range(min_zoom, min(max_zoom, MAX_TILE_ZOOM) + 1):
+                zooms.append(z)
+                for (x, y), tile in cut_tiles(docs[n], z).items():
+                    tile_path = tmp / "tiles" / str(z) / str(x) / f"{y}.json"
+                    tile_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(tile_path, "w") as f:
+                        f.write(geo.dumps(tile))
+                    count += 1
+        index["tiles"] = {
+            "path": "tiles/{z}/{x}/{y}.json",
+            "zooms": zooms,
+            "buffer_px": BUFFER_PX,
+            "count": count,
+        }
+
+    with open(tmp / "index.json", "w") as f:
+        json.dump(index, f, indent=2)
+    dest = out / name
+    old = out / f".{name}.old"
+    if dest.exists():
+        os.rename(dest, old)
+    os.rename(tmp, dest)
+    shutil.rmtree(old, ignore_errors=True)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Level of detail pyramid for ecosystem polygons")
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("-o", "--output", type=Path, required=True, help="output directory")
+    parser.add_argument("--tiles", action="store_true", help="also cut every level into zoom/x/y tiles")
+    args = parser.parse_args()
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    for path in args.files:
+        index = build_layer(path, args.output, tiles=args.tiles)
+        size = os.path.getsize(path)
+        levels = ", ".join(
+            f"z{lv['min_zoom']}-{lv['max_zoom']} {lv['bytes'] / size:.0%}" for lv in index["levels"]
+        )
+        tiles = f", {index['tiles']['count']} tiles" if "tiles" in index else ""
+        print(f"{path.name:28} {size:>9} bytes: {levels}{tiles}")
+
+
+if __name__ == "__main__":
+    main()
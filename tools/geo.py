@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# Geometry helpers for the ecosystem polygon files in public/game_files/ecosystem.
+#
+# Two layouts are used there:
+#   FeatureCollection:  cave_polys, cave_polys_detail, sky_polys, cherry_blossom_trees
+#   layer dict:         MapTower, {"0": [Polygon, ...], "1": [...], ...}
+#   where the layer dict holds bare geometries carrying their own properties.
+
+import json
+
+
+def load(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def dumps(doc):
+    return json.dumps(doc, separators=(",", ":"), ensure_ascii=False)
+
+
+def geometries(doc):
+    """Yields every geometry object of a document; they can be modified in place"""
+    if "features" in doc:
+        for feature in doc["features"]:
+            if feature.get("geometry"):
+                yield feature["geometry"]
+    else:
+        for layer in doc.values():
+            for geom in layer:
+                yield geom
+
+
+def polygons(geom):
+    """Polygons (lists of rings) of a Polygon or MultiPolygon"""
+    if geom["type"] == "Polygon":
+        return [geom["coordinates"]]
+    if geom["type"] == "MultiPolygon":
+        return geom["coordinates"]
+    return []
+
+
+def rings(doc):
+    for geom in geometries(doc):
+        for poly in polygons(geom):
+            for ring in poly:
+                yield ring
+
+
+def vertex_count(doc):
+    count = 0
+    for geom in geometries(doc):
+        if geom["type"] == "Point":
+            count += 1
+        for poly in polygons(geom):
+            count += sum(len(ring) for ring in poly)
+    return count
+
+
+def bounds(ring):
+    xs = [p[0] for p in ring]
+    zs = [p[1] for p in ring]
+    return min(xs), min(zs), max(xs), max(zs)
+
+
+def quantize_point(pt, precision):
+    # Whole numbers are written without a trailing .0
+    out = []
+    for v in pt:
+        v = round(v, precision)
+        out.append(int(v) if precision <= 0 or v == int(v) else v)
+    return out
+
+
+def quantize_ring(ring, precision):
+    out = []
+    for pt in ring:
+        pt = quantize_point(pt, precision)
+        # Rounding can collapse neighbouring vertices
+        if not out or pt != out[-1]:
+            out.append(pt)
+    return out
+
+
+def _segment_distance2(p, a, b):
+    ax, az = a[0], a[1]
+    dx, dz = b[0] - ax, b[1] - az
+    px, pz = p[0] - ax, p[1] - az
+    length2 = dx * dx + dz * dz
+    if length2 == 0:
+        return px * px + pz * pz
+    t = max(0.0, min(1.0, (px * dx + pz * dz) / length2))
+    ex, ez = px - t * dx, pz - t * dz
+    return ex * ex + ez * ez
+
+
+def douglas_peucker(points, tolerance):
+    """Simplifies an open polyline, always keeping both end points"""
+    if len(points) < 3:
+        return list(points)
+    tol2 = tolerance * tolerance
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        best, index = -1.0, 0
+        for i in range(first + 1, last):
+            d = _segment_distance2(points[i], points[first], points[last])
+            if d > best:
+                best, index = d, i
+        if best > tol2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def simplify_ring(ring, tolerance, locked=frozenset()):
+    """Simplifies a closed ring.
+
+    Vertices in `locked` (tuples) are always kept so that boundaries shared
+    with other rings are cut at the same points, and every section between
+    them is simplified in one canonical direction, so that a boundary walked
+    the other way round by the neighbouring ring simplifies alike.
+    Rings that would degenerate are returned unchanged.
+    """
+    if len(ring) < 5 or tolerance <= 0:
+        return ring
+    closed = ring[0] == ring[-1]
+    pts = ring[:-1] if closed else ring
+    anchors = [i for i, p in enumerate(pts) if tuple(p) in locked]
+    if not anchors:
+        # Split the loop at its smallest vertex and the vertex farthest from
+        #   it, so identical loops are split alike whatever their start
+        low = min(range(len(pts)), key=lambda i: tuple(pts[i]))
+        first = pts[low]
+        far = max(range(len(pts)), key=lambda i: (pts[i][0] - first[0]) ** 2 + (pts[i][1] - first[1]) ** 2)
+        anchors = sorted({low, far})
+    out = []
+    for n, start in enumerate(anchors):
+        end = anchors[(n + 1) % len(anchors)]
+        if end > start:
+            section = pts[start : end + 1]
+        else:
+            section = pts[start:] + pts[: end + 1]
+        forward = [tuple(p) for p in section]
+        if forward[::-1] < forward:
+            # Ties in douglas_peucker go to the first point found
+            out.extend(douglas_peucker(section[::-1], tolerance)[::-1][:-1])
+        else:
+            out.extend(douglas_peucker(section, tolerance)[:-1])
+    if len(out) < 3:
+        return ring
+    # Keep the original starting vertex first
+    start = out.index(pts[0]) if pts[0] in out else 0
+    out = out[start:] + out[:start]
+    return out + [out[0]] if closed else out
+
+
+def junctions(all_rings):
+    """Vertices where rings sharing a boundary part ways.
+
+    A vertex is a junction when its neighbours differ between the rings
+    using it, e.g. where three areas meet or a shared edge ends.
+    """
+    neighbours, found = {}, set()
+    for ring in all_rings:
+        pts = ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else ring
+        for i, pt in enumerate(pts):
+            key = tuple(pt)
+            pair = frozenset([tuple(pts[i - 1]), tuple(pts[(i + 1) % len(pts)])])
+            seen = neighbours.setdefault(key, pair)
+            if seen != pair:
+                found.add(key)
+    return found
+
+
+def simplify(doc, tolerance, precision):
+    """Quantizes and simplifies every geometry of doc in place.
+
+    Feature bounding boxes in the properties (xmin, xmax, zmin, zmax, as in
+    cave_polys) are recomputed from the simplified rings.
+    """
+    for geom in geometries(doc):
+        if geom["type"] == "Point":
+            geom["coordinates"] = quantize_point(geom["coordinates"], precision)
+        for poly in polygons(geom):
+            for i, ring in enumerate(poly):
+                poly[i] = quantize_ring(ring, precision)
+    locked = junctions(rings(doc))
+    for geom in geometries(doc):
+        for poly in polygons(geom):
+            for i, ring in enumerate(poly):
+                poly[i] = simplify_ring(ring, tolerance, locked)
+    for feature in doc.get("features", []):
+        props = feature.get("properties") or {}
+        geom = feature.get("geometry")
+        if "xmin" not in props or not geom or not polygons(geom):
+            continue
+        points = [pt for poly in polygons(geom) for ring in poly for pt in ring]
+        props["xmin"], props["zmin"], props["xmax"], props["zmax"] = bounds(points)
+    return doc
+
+
+def clip_ring(ring, bbox):
+    """Clips a closed ring to bbox (Sutherland-Hodgman); [] if nothing is left"""
+    x0, z0, x1, z1 = bbox
+    pts = ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else ring
+    edges = [
+        (lambda p: p[0] >= x0, lambda a, b: (x0 - a[0]) / (b[0] - a[0])),
+        (lambda p: p[0] <= x1, lambda a, b: (x1 - a[0]) / (b[0] - a[0])),
+        (lambda p: p[1] >= z0, lambda a, b: (z0 - a[1]) / (b[1] - a[1])),
+        (lambda p: p[1] <= z1, lambda a, b: (z1 - a[1]) / (b[1] - a[1])),
+    ]
+    for inside, cross in edges:
+        if not pts:
+            break
+        out = []
+        prev = pts[-1]
+        for cur in pts:
+            if inside(cur) != inside(prev):
+                t = cross(prev, cur)
+                out.append([prev[0] + t * (cur[0] - prev[0]), prev[1] + t * (cur[1] - prev[1])])
+            if inside(cur):
+                out.append(cur)
+            prev = cur
+        pts = out
+    if len(pts) < 3:
+        return []
+    # A concave ring passing around the box clips to a zero width sliver
+    #   along its sides
+    area = sum(a[0] * b[1] - b[0] * a[1] for a, b in zip(pts, pts[1:] + pts[:1]))
+    if abs(area) <= 1e-9 * (x1 - x0) * (z1 - z0):
+        return []
+    return pts + [pts[0]]
+
+
+def clip(geom, bbox):
+    """Clips a Polygon or MultiPolygon to bbox; returns None if it falls outside"""
+    if geom["type"] == "Point":
+        x, z = geom["coordinates"][:2]
+        return geom if bbox[0] <= x <= bbox[2] and bbox[1] <= z <= bbox[3] else None
+    polys = []
+    for poly in polygons(geom):
+        outer = clip_ring(poly[0], bbox)
+        if outer:
+            polys.append([outer] + [r for r in (clip_ring(h, bbox) for h in poly[1:]) if r])
+    if not polys:
+        return None
+    if geom["type"] == "Polygon":
+        return dict(geom, coordinates=polys[0])
+    return dict(geom, coordinates=polys)
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
 from pathlib import Path
 
+from parse_cache import cache
+from actor_loader import documents
+from pack_index import exists
+import pack_index
+from parallel import add_jobs_argument, map_chunked
+import profiling
+
 NAMES = json.load(open("names.json","r"))
 
 
@@ -14,10 +22,10 @@ def get_component(par, name, base):
         if file == "":
             return None, None
         local = base / file
-        if local.exists():
+        if exists(local):
             return local, base
         common = common_path / file
-        if common.exists():
+        if exists(common):
             return common, base
         return None, None
 
@@ -26,66 +34,86 @@ def get_component(par, name, base):
     # Remove leading 'Work/' and match locally or globally (for the parent)
     stub = par['$parent'].replace("Work/", "").replace(".gyml",".json")
     local = base / stub
-    if local.exists():
-        parent = json.load(open(local,"r"))['RootNode']
+    if exists(local):
+        parent = documents.root(local)
         return get_component(parent, name, base)
 
     common = common_path / stub
-    if common.exists():
-        parent = json.load(open(common,"r"))['RootNode']
+    if exists(common):
+        parent = documents.root(common)
         return get_component(parent, name, common_path)
 
     return None, None
 
-p = Path("Pack/Actor")
-
-horns = {}
-
-for actor in p.glob("*"):
+def actor_horn(actor):
     name = actor.name
     file = str(actor.name) + ".engine__actor__ActorParam.json"
 
     actor_path = actor / 'Actor' / file
-    if not actor_path.exists():
-        continue
-    actor_par = json.load(open(actor_path, "r"))['RootNode']
+    if not exists(actor_path):
+        return None
+    actor_par = documents.root(actor_path)
 
     # GameParameterTableRef
     gp_path, actor = get_component(actor_par, "GameParameterTableRef", actor)
     if not gp_path:
-        continue
+        return None
 
-    gp = json.load(open(gp_path, "r"))['RootNode']
+    gp = documents.root(gp_path)
 
     # HornTypeAndAttachmentMappingTable
     horn_path, actor = get_component(gp, 'HornTypeAndAttachmentMappingTable', actor)
     if not horn_path:
-        continue
+        return None
 
-    horn = json.load(open(horn_path, "r"))['RootNode']
+    horn = documents.root(horn_path)
 
     attachments = horn['HornTypeAndAttachmentMapping']
     # Frox are the only ones with 2 horns, they are the same
     #    Just assume its one
     if name.startswith("FldObj_"): # Ignore Figure of Enemies
-        continue
-    for attach in attachments[:1]: 
+        return None
+    for attach in attachments[:1]:
         attach_type = attach.get('HornType') or "Default"
         attach_name = attach.get('AttachmentName') or "NoHorn"
         attach_name = attach_name.split("/")[-1].split(".")[0]
         ui_name = NAMES.get(attach_name) or attach_name
         ui_actor_name = NAMES.get(name) or name
-        horns[name] = {
+        return {
             "ui_actor_name": ui_actor_name,
             "ui_name": ui_name,
             "name": name,
             "attach_name": attach_name,
         }
-
-horn_material = {}
-for key in sorted(horns.keys()):
-    val = horns[key]
-    horn_material[val['name']] = val['attach_name']
-
-print(json.dumps(horn_material, indent=2))
-
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the horn attachment of each actor as JSON")
+    add_jobs_argument(parser)
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.start("get_horn_data", args)
+
+    actors = sorted(Path("Pack/Actor").glob("*"))
+    # Scanned once here so that forked workers share the listing
+    pack_index.index.scan()
+    horns = {}
+    with profiling.phase("actors"):
+        for val in map_chunked(actor_horn, actors, args.jobs):
+            if val:
+                horns[val['name']] = val
+
+    horn_material = {}
+    for key in sorted(horns.keys()):
+        val = horns[key]
+        horn_material[val['name']] = val['attach_name']
+
+    print(json.dumps(horn_material, indent=2))
+    cache.report()
+    documents.report()
+    pack_index.index.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# Sorted uint64 index over the side tables joined by hash (koroks_id.json,
+#   rbox.json, shrine_caves.json).
+#
+# Each table is a sorted uint64 key array, an offset array and the records as
+#   compact JSON, all in one file that is memory mapped and searched with
+#   numpy.searchsorted, so looking up many hashes only decodes the records
+#   that match. shrine_caves.json has no hash, it is keyed by name_key() of
+#   the Location name instead.
+#
+# File layout (little endian):
+#   b"OMHI" u32 version, u32 header length, JSON header, zero padding to 8,
+#   then per table: keys u64[n], offsets u64[n + 1] into the records, records.
+#   The header holds the section offsets and the size/mtime of every source,
+#   and load_or_build() rebuilds the file when one of them changed.
+#
+#   ./tools/hash_index.py [-i tools/.hash_index.bin] build
+#   ./tools/hash_index.py lookup koroks 0x7de66884408148fc 9054713935133819132
+#   ./tools/hash_index.py lookup rbox < radar_hashes.txt
+#   ./tools/hash_index.py bench
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b"OMHI"
+VERSION = 1
+DEFAULT_PATH = "tools/.hash_index.bin"
+
+
+def name_key(name):
+    """64 bit key for tables keyed by name"""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+def parse_key(value):
+    """Accepts ints, decimal strings and 0x prefixed hex strings"""
+    if isinstance(value, int):
+        return value
+    return int(value, 16) if value.startswith("0x") else int(value)
+
+
+# name: (path relative to the repo root, returns [(key, record)])
+SOURCES = {
+    "koroks": ("tools/koroks_id.json", lambda d: [(int(k, 16), v) for k, v in d.items()]),
+    "rbox": ("tools/rbox.json", lambda d: [(int(v["hash_id"]), v) for v in d]),
+    "shrine_caves": ("tools/shrine_caves.json", lambda d: [(name_key(v["Location"]), v) for v in d]),
+}
+
+
+def _source_stats(base):
+    out = {}
+    for name, (path, _) in SOURCES.items():
+        st = os.stat(os.path.join(base, path))
+        out[name] = [path, st.st_size, st.st_mtime_ns]
+    return out
+
+
+def build(base="."):
+    """Returns the index over SOURCES as bytes; paths are relative to base"""
+    sections = []
+    tables = {}
+    size = 0
+
+    def add(data):
+        nonlocal size
+        offset = size
+        data += b"\0" * (-len(data) % 8)
+        sections.append(data)
+        size += len(data)
+        return offset
+
+    for name, (path, rows) in SOURCES.items():
+        with open(os.path.join(base, path)) as f:
+            entries = sorted(rows(json.load(f)), key=lambda e: e[0])
+        records = [json.dumps(rec, separators=(",", ":")).encode() for _, rec in entries]
+        offsets = np.zeros(len(records) + 1, dtype="<u8")
+        np.cumsum([len(r) for r in records], out=offsets[1:])
+        tables[name] = {
+            "count": len(entries),
+            "keys": add(np.array([k for k, _ in entries], dtype="<u8").tobytes()),
+            "offsets": add(offsets.tobytes()),
+            "records": add(b"".join(records)),
+        }
+
+    head = json.dumps({"sources": _source_stats(base), "tables": tables}).encode()
+    out = MAGIC + struct.pack("<II", VERSION, len(head)) + head
+    out += b"\0" * (-len(out) % 8)
+    return out + b"".join(sections)
+
+
+class HashIndex:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buf[:4] != MAGIC:
+            raise ValueError(f"{path}: not a hash index")
+        version, head_len = struct.unpack_from("<II", self.buf, 4)
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported version {version}")
+        self.header = json.loads(self.buf[12 : 12 + head_len])
+        base = 12 + head_len
+        base += -base % 8
+        self.tables = {}
+        for name, t in self.header["tables"].items():
+            n = t["count"]
+            keys = np.frombuffer(self.buf, dtype="<u8", count=n, offset=base + t["keys"])
+            offsets = np.frombuffer(self.buf, dtype="<u8", count=n + 1, offset=base + t["offsets"])
+            self.tables[name] = (keys, offsets, base + t["records"])
+
+    def close(self):
+        self.tables = {}
+        self.buf.close()
+
+    def positions(self, table, keys):
+        """Returns the row of every key in table, -1 where it is missing"""
+        table_keys = self.tables[table][0]
+        if not isinstance(keys, np.ndarray):
+            keys = np.array([parse_key(k) for k in keys], dtype=np.uint64)
+        if not len(table_keys):
+            return np.full(len(keys), -1, dtype=np.intp)
+        pos = np.searchsorted(table_keys, keys)
+        pos[pos == len(table_keys)] = 0
+        return np.where(table_keys[pos] == keys, pos, -1)
+
+    def record(self, table, row):
+        _, offsets, start = self.tables[table]
+        return json.loads(self.buf[start + int(offsets[row]) : start + int(offsets[row + 1])])
+
+    def lookup(self, table, keys):
+        """Returns the record for every key, None where it is missing"""
+        return [self.record(table, row) if row >= 0 else None for row in self.positions(table, keys)]
+
+    def get(self, table, key):
+        return self.lookup(table, [key])[0]
+
+    def stale(self, base="."):
+        try:
+            return self.header["sources"] != _source_stats(base)
+        except FileNotFoundError:
+            return True
+
+
+def load_or_build(path=DEFAULT_PATH, base="."):
+    """Opens the index at path, first (re)building it if the sources changed"""
+    if os.path.exists(path):
+        index = HashIndex(path)
+        if not index.stale(base):
+            return index
+        index.close()
+    data = build(base)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return HashIndex(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash index over the tools/ side tables")
+    parser.add_argument("-i", "--index", default=DEFAULT_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build")
+    p = sub.add_parser("lookup", help="print the records for hashes (or names) given or read from stdin")
+    p.add_argument("table", choices=list(SOURCES))
+    p.add_argument("keys", nargs="*")
+    sub.add_parser("bench")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if os.path.exists(args.index):
+            os.unlink(args.index)
+        index = load_or_build(args.index)
+        for name, t in index.header["tables"].items():
+            print(f"{name:14} {t['count']:>7} records")
+        print(f"{args.index}: {os.path.getsize(args.index)} bytes")
+    elif args.command == "lookup":
+        index = load_or_build(args.index)
+        keys = args.keys or [line.strip() for line in sys.stdin if line.strip()]
+        if args.table == "shrine_caves":
+            keys = [name_key(k) for k in keys]
+        for key, rec in zip(keys, index.lookup(args.table, keys)):
+            print(json.dumps({"key": str(key), "record": rec}))
+    else:
+        index = load_or_build(args.index)
+        keys, _, _ = index.tables["koroks"]
+        rng = np.random.default_rng(0)
+        # Half known hashes, half random ones, like a radar export
+        n = 500_000
+        queries = np.concatenate([rng.choice(keys, n // 2), rng.integers(0, 2**63, n // 2, dtype=np.uint64)])
+        start = time.perf_counter()
+        pos = index.positions("koroks", queries)
+        elapsed = time.perf_counter() - start
+        print(f"{n} lookups in {elapsed * 1000:.1f} ms, {int((pos >= 0).sum())} hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# Interned JSON encoding for documents with many repeated values (area_data.json).
+#
+# Every distinct value (string, number, list or dict) is stored once in a
+#   table and referred to by its index, so repeated actor names and identical
+#   species lists shared by many areas cost one small integer each:
+#
+#   {"format": "interned/1",
+#    "affixes": [["Work/Location/", ".game__location__Location.gyml"]],
+#    "shapes": [["name", "num"], ...],
+#    "values": [...],
+#    "root": ...}
+#
+#   values entries, children always before their parents:
+#     number, true, false, null, "string"   the value itself
+#     [ref, ...]                            a list
+#     [-1 - shape, ref, ...]                a dict with the keys of shapes[shape]
+#     {"a": affix, "s": "middle"}           affixes[affix][0] + middle + affixes[affix][1]
+#
+#   root mirrors the top `plain_depth` levels of dicts as plain JSON with refs
+#   at the leaves, so a reader can decode one entry (one area) on its own.
+#
+#   ./tools/interned.py encode public/game_files/area_data.json area_data.interned.json --plain-depth 2
+#   ./tools/interned.py check public/game_files/area_data.json --plain-depth 2
+
+import argparse
+import json
+import sys
+
+FORMAT = "interned/1"
+AFFIXES = [("Work/Location/", ".game__location__Location.gyml")]
+
+
+def _value_key(value):
+    # 1, 1.0 and true are different values
+    return type(value).__name__, json.dumps(value, sort_keys=False)
+
+
+class _Encoder:
+    def __init__(self, affixes):
+        self.affixes = [list(a) for a in affixes]
+        self.values, self.index = [], {}
+        self.shapes, self.shape_index = [], {}
+
+    def _add(self, key, entry):
+        if key not in self.index:
+            self.index[key] = len(self.values)
+            self.values.append(entry)
+        return self.index[key]
+
+    def ref(self, value):
+        if isinstance(value, dict):
+            shape = tuple(value)
+            if shape not in self.shape_index:
+                self.shape_index[shape] = len(self.shapes)
+                self.shapes.append(list(shape))
+            entry = [-1 - self.shape_index[shape]] + [self.ref(v) for v in value.values()]
+            return self._add(("dict", json.dumps(entry)), entry)
+        if isinstance(value, (list, tuple)):
+            entry = [self.ref(v) for v in value]
+            return self._add(("list", json.dumps(entry)), entry)
+        if isinstance(value, str):
+            for n, (prefix, suffix) in enumerate(self.affixes):
+                if value.startswith(prefix) and value.endswith(suffix) and len(value) >= len(prefix) + len(suffix):
+                    entry = {"a": n, "s": value[len(prefix) : len(value) - len(suffix)]}
+                    return self._add(_value_key(value), entry)
+        return self._add(_value_key(value), value)
+
+    def plain(self, value, depth):
+        if depth > 0 and isinstance(value, dict):
+            return {k: self.plain(v, depth - 1) for k, v in value.items()}
+        return self.ref(value)
+
+
+def encode(obj, plain_depth=0, affixes=AFFIXES):
+    enc = _Encoder(affixes)
+    root = enc.plain(obj, plain_depth)
+    return {
+        "format": FORMAT,
+        "affixes": enc.affixes,
+        "shapes": enc.shapes,
+        "values": enc.values,
+        "root": root,
+    }
+
+
+class Decoder:
+    """Decodes values on demand; decoded lists and dicts are shared, not copied"""
+
+    def __init__(self, doc):
+        if doc.get("format") != FORMAT:
+            raise ValueError(f"unsupported format {doc.get('format')}")
+        self.doc = doc
+        self.cache = {}
+
+    def value(self, ref):
+        if ref in self.cache:
+            return self.cache[ref]
+        entry = self.doc["values"][ref]
+        if isinstance(entry, list):
+            if entry and entry[0] < 0:
+                keys = self.doc["shapes"][-1 - entry[0]]
+                out = {k: self.value(r) for k, r in zip(keys, entry[1:])}
+            else:
+                out = [self.value(r) for r in entry]
+        elif isinstance(entry, dict):
+            prefix, suffix = self.doc["affixes"][entry["a"]]
+            out = prefix + entry["s"] + suffix
+        else:
+            out = entry
+        self.cache[ref] = out
+        return out
+
+    def plain(self, node):
+        if isinstance(node, dict):
+            return {k: self.plain(v) for k, v in node.items()}
+        return self.value(node)
+
+    def decode(self):
+        return self.plain(self.doc["root"])
+
+
+def decode(doc):
+    return Decoder(doc).decode()
+
+
+def check(obj, plain_depth=0):
+    """Encodes obj and verifies that it decodes back exactly; returns the encoding"""
+    doc = encode(obj, plain_depth)
+    decoded = decode(json.loads(json.dumps(doc)))
+    if json.dumps(decoded) != json.dumps(obj):
+        raise ValueError("decoded document differs")
+    return doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interned JSON encoding")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("encode", "decode", "check"):
+        p = sub.add_parser(name)
+        p.add_argument("input")
+        if name != "check":
+            p.add_argument("output")
+        if name != "decode":
+            p.add_argument("--plain-depth", type=int, default=0, help="levels of dicts kept as plain JSON")
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        text = f.read()
+    if args.command == "decode":
+        with open(args.output, "w") as f:
+            json.dump(decode(json.loads(text)), f, separators=(",", ":"))
+        return
+    try:
+        doc = check(json.loads(text), args.plain_depth)
+    except ValueError as e:
+        print(f"{args.input}: {e}")
+        sys.exit(1)
+    out = json.dumps(doc, separators=(",", ":"))
+    if args.command == "encode":
+        with open(args.output, "w") as f:
+            f.write(out)
+    print(f"{args.input}: {len(text.encode())} -> {len(out.encode())} bytes, {len(doc['values'])} values")
+
+
+if __name__ == "__main__":
+    main()
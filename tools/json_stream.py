@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# JSON output helpers for the generated files.
+#
+# Output is compact and key-sorted by default; pretty=True indents it like
+#   json.dump(..., indent=2) for diffing. dump() writes a whole document.
+#
+# JsonWriter writes containers opened and closed explicitly and returns the
+#   byte range of every value, which gen_climate_data.py records for each area
+#   of area_data.json. The values themselves are still built in memory by the
+#   caller, so it does not lower peak memory over dump():
+#
+#   with open_atomic("area_data.json") as f:
+#       w = JsonWriter(f)
+#       w.begin_object()
+#       for layer in sorted(data):
+#           w.key(layer)
+#           w.begin_object()
+#           for area in sorted(data[layer]):
+#               start, end = w.member(area, data[layer][area])
+#           w.end_object()
+#       w.end_object()
+#
+# Keys given to key() are written in the order received; pass them sorted.
+#   The output is ASCII only, so `offset` counts both characters and bytes.
+
+import contextlib
+import json
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def open_atomic(path, mode="w"):
+    """Writes to a temporary file that replaces path only on success"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        # mkstemp creates the file private; use the permissions open() would
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class JsonWriter:
+    def __init__(self, f, pretty=False):
+        self.f = f
+        self.pretty = pretty
+        self.offset = 0
+        # One entry per open container: number of members written so far
+        self._counts = []
+        self._after_key = False
+
+    def _write(self, text):
+        self.f.write(text)
+        self.offset += len(text)
+
+    def _newline(self, depth):
+        if self.pretty:
+            self._write("\n" + "  " * depth)
+
+    def _separate(self):
+        if self._after_key:
+            self._after_key = False
+            return
+        if self._counts:
+            if self._counts[-1]:
+                self._write(",")
+            self._counts[-1] += 1
+            self._newline(len(self._counts))
+
+    def _begin(self, bracket):
+        self._separate()
+        self._write(bracket)
+        self._counts.append(0)
+
+    def _end(self, bracket):
+        count = self._counts.pop()
+        if count:
+            self._newline(len(self._counts))
+        self._write(bracket)
+
+    def begin_object(self):
+        self._begin("{")
+
+    def end_object(self):
+        self._end("}")
+
+    def begin_array(self):
+        self._begin("[")
+
+    def end_array(self):
+        self._end("]")
+
+    def key(self, key):
+        self._separate()
+        self._write(json.dumps(str(key)) + (": " if self.pretty else ":"))
+        self._after_key = True
+
+    def value(self, value):
+        """Writes a complete value; returns its (start, end) offsets"""
+        self._separate()
+        start = self.offset
+        if self.pretty:
+            text = json.dumps(value, indent=2, sort_keys=True)
+            text = text.replace("\n", "\n" + "  " * len(self._counts))
+        else:
+            text = json.dumps(value, separators=(",", ":"), sort_keys=True)
+        self._write(text)
+        return start, self.offset
+
+    def member(self, key, value):
+        self.key(key)
+        return self.value(value)
+
+
+def dump(obj, f, pretty=False):
+    """json.dump in the same format as JsonWriter"""
+    if pretty:
+        json.dump(obj, f, indent=2, sort_keys=True)
+        f.write("\n")
+    else:
+        json.dump(obj, f, separators=(",", ":"), sort_keys=True)
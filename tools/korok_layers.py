@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# Bulk Sky / Surface classification of object positions (hidden koroks).
+#
+# Points at or above SKY_HEIGHT are Sky, everything else is Surface, unless the
+#   object's hash is listed in OVERRIDES. With a region index
+#   (tools/region_index.py) high points are only Sky when they also lie over a
+#   sky island, which catches objects on the tallest surface mountains.
+#   cave_polys is not used: cave footprints include the surface above them.
+
+import numpy as np
+
+SKY_HEIGHT = 750
+
+SKY = "Sky"
+SURFACE = "Surface"
+LABELS = np.array([SURFACE, SKY])
+
+# Objects the height threshold gets wrong, by hash
+OVERRIDES = {
+    6577590198901788531: SKY,
+    2587961335290322890: SKY,
+    3494902862536172994: SKY,
+    15262678164833260129: SURFACE,
+    18194949317466592174: SURFACE,
+}
+
+
+def classify(coords, hashes=None, overrides=OVERRIDES, index=None, sky_height=SKY_HEIGHT):
+    """Returns an array of layer labels for (N, 3) coordinates.
+
+    hashes: N object hashes (ints or decimal strings) matched against overrides
+    index:  optional RegionIndex used to require Sky points to be over sky_polys
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    sky = coords[:, 1] >= sky_height
+
+    if index is not None and len(coords):
+        over_island = index.classify(coords[:, 0], coords[:, 2], "sky_polys") >= 0
+        sky &= over_island
+
+    labels = LABELS[sky.astype(np.intp)]
+
+    if hashes is not None and overrides:
+        hashes = np.array([int(h) for h in hashes], dtype=np.uint64)
+        keys = np.array(list(overrides), dtype=np.uint64)
+        values = np.array(list(overrides.values()))
+        order = np.argsort(keys)
+        keys, values = keys[order], values[order]
+        pos = np.clip(np.searchsorted(keys, hashes), 0, len(keys) - 1)
+        hit = keys[pos] == hashes
+        labels[hit] = values[pos[hit]]
+    return labels
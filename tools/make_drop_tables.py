@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# Drop tables of every actor as one static file (drop_tables.json), so the
+#   object details do not need a radar /drop/<actor>/<table> query per popup.
+#
+# Tables are resolved with Actor.readDropTables; the per-process document
+#   cache (actor_loader.py) reuses the table and element files shared by many
+#   actors. Identical elements and tables are stored once:
+#
+#   {"format": "drop_tables/1",
+#    "elements": [DropTableElement resource, ...],
+#    "tables": [{...DropTable resource, "items": [element index, ...]}, ...],
+#    "actors": {actor: {DropTableName: table index}}}
+#
+#   A table with its "items" indexes replaced by the elements is what radar
+#   returns for /drop/<actor>/<DropTableName>.
+#
+#   cd romfs && ../tools/make_drop_tables.py -o drop_tables.json
+
+import argparse
+import glob
+import json
+import os
+import sys
+from pathlib import Path
+
+import pack_index
+import profiling
+from actor_loader import Actor, ActorLoader, documents
+from json_stream import open_atomic
+from parallel import add_jobs_argument, map_chunked
+from parse_cache import cache
+
+RESCOM = Path(".") / "Pack" / "ResidentCommon"
+FORMAT = "drop_tables/1"
+
+
+def _strip(doc):
+    # $parent is resolved already
+    return {k: v for k, v in doc.items() if k != "$parent"}
+
+
+def actor_drops(actor):
+    """Returns (actor, [drop table with resolved items]) or None"""
+    loader = ActorLoader(Path(actor), RESCOM)
+    actor = Path(actor).name
+    parm = Path(loader.work) / "Actor" / f"{actor}.engine__actor__ActorParam.json"
+    if not pack_index.exists(parm):
+        return None
+    try:
+        tables = Actor(parm, loader).readDropTables(loader)
+    except (ValueError, KeyError, OSError) as e:
+        # A missing or broken table file drops this actor, not the whole run
+        print(f"{actor}: skipped, {e}", file=sys.stderr)
+        return None
+    if not tables:
+        return None
+    return actor, tables
+
+
+class Interner:
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def add(self, value):
+        key = json.dumps(value, sort_keys=True, separators=(",", ":"))
+        if key not in self.index:
+            self.index[key] = len(self.values)
+            self.values.append(value)
+        return self.index[key]
+
+
+def pack(results):
+    elements, tables = Interner(), Interner()
+    actors = {}
+    for actor, actor_tables in results:
+        out = {}
+        for table in actor_tables:
+            items = [elements.add(_strip(item)) for item in table["items"]]
+            out[table["DropTableName"]] = tables.add(dict(_strip(table), items=items))
+        actors[actor] = out
+    return {
+        "format": FORMAT,
+        "elements": elements.values,
+        "tables": tables.values,
+        "actors": actors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate drop_tables.json from the actor DropRef components")
+    parser.add_argument("-o", "--output", default="drop_tables.json")
+    add_jobs_argument(parser)
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.start("make_drop_tables", args)
+
+    actors = sorted(glob.glob(str(Path(".") / "Pack" / "Actor" / "*")))
+    # Scanned once here so that forked workers share the listing
+    pack_index.index.scan()
+    with profiling.phase("actors"):
+        results = [r for r in map_chunked(actor_drops, actors, args.jobs) if r]
+    with profiling.phase("write"):
+        doc = pack(results)
+        with open_atomic(args.output) as f:
+            json.dump(doc, f, separators=(",", ":"))
+
+    listed = sum(len(tables) for _, tables in results)
+    print(
+        f"==> {args.output}: {len(doc['actors'])} actors, {listed} tables"
+        f" -> {len(doc['tables'])} unique, {len(doc['elements'])} elements,"
+        f" {os.path.getsize(args.output)} bytes"
+    )
+    cache.report()
+    documents.report()
+    pack_index.index.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,50 @@
 #!/usr/bin/env python3
 
-import yaml
+import argparse
 import json
-import sys
-
-base = sys.argv[1]
-
-with open(f"{base}/USen.Product.100/LocationMsg/Dungeon.msyt","r") as f:
-    data = yaml.load(f, Loader=yaml.FullLoader)
-
-out = {}
-
-for v, val in data['entries'].items():
-    if v.startswith("Ref_"):
-        continue
-    if v.startswith("2"):
-        id = v[1:]
-        out[f'Dungeon{id}_sub'] = val['contents'][0]['text']
-    if v.startswith("0"):
-        id = v[1:]
-        out[f'Dungeon{id}'] = val['contents'][0]['text']
-        out[f'Dungeon{id}_master'] = val['contents'][0]['text'].replace(" Shrine", "")
-
-out['_doc_'] = {
-    'path': 'objmap/public/game_files/text/Dungeon.json',
-    'created': 'make_dungeon_list.py',
-    'input_files': [
-        'USen.Product.100/LocationMsg/Dunggeon.msyt',
-    ],
-    'notes': 'msyt files created by msyt export file.msbt. Modified version in 2023-05-22 to accomdate variation in totk data structures',
-}
-json.dump(out, open("Dungeon.json",'w'))
-print("==> Dungeons.json")
+
+from msbt import add_format_argument, load_messages
+from msg_langs import add_language_arguments, languages, localize, output_path, run
+
+def build(base, fmt, lang):
+    """Returns the Dungeon.json contents for one language"""
+    data = load_messages(f"{base}/{lang}/LocationMsg/Dungeon.{fmt}")
+
+    out = {}
+
+    for v, val in data['entries'].items():
+        if v.startswith("Ref_"):
+            continue
+        if v.startswith("2"):
+            id = v[1:]
+            out[f'Dungeon{id}_sub'] = val['contents'][0]['text']
+        if v.startswith("0"):
+            id = v[1:]
+            out[f'Dungeon{id}'] = val['contents'][0]['text']
+            out[f'Dungeon{id}_master'] = val['contents'][0]['text'].replace(" Shrine", "")
+
+    out['_doc_'] = localize({
+        'path': 'objmap/public/game_files/text/Dungeon.json',
+        'created': 'make_dungeon_list.py',
+        'input_files': [
+            'USen.Product.100/LocationMsg/Dunggeon.msyt',
+        ],
+        'notes': 'msyt files created by msyt export file.msbt. Modified version in 2023-05-22 to accomdate variation in totk data structures',
+    }, lang)
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate Dungeon.json from the shrine messages')
+    parser.add_argument('base', help='message directory containing USen.Product.100/')
+    add_format_argument(parser)
+    add_language_arguments(parser)
+    args = parser.parse_args()
+
+    langs = languages(args.base, args.lang)
+    for lang, out in run(build, langs, args.jobs, args.base, args.format):
+        path = output_path("Dungeon.json", lang, len(langs) > 1)
+        json.dump(out, open(path,'w'))
+        print("==> Dungeons.json" if len(langs) == 1 else f"==> {path}")
+
+if __name__ == "__main__":
+    main()
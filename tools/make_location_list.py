@@ -1,30 +1,48 @@
 #!/usr/bin/env python3
 
-import yaml
+import argparse
 import json
-import sys
-
-base = sys.argv[1]
-
-with open(f"{base}/USen.Product.100/LocationMsg/Location.msyt","r") as f:
-    data = yaml.load(f, Loader=yaml.FullLoader)
-
-out = {}
-
-for v, val in data['entries'].items():
-    if len(val['contents']) != 1:
-        print(v, ">1")
-    out[v] = val['contents'][0]['text']
-for i in range(3,15):
-    out[f'ZonauRelief_{i:02d}'] = "Ancient Tablet"
-out['_doc_'] = {
-    'path': 'objmap/public/game_files/text/LocationMarker.json',
-    'created': 'make_location_list.py',
-    'input_files': [
-        'USen.Product.100/LocationMsg/Location.msyt',
-    ],
-    'notes': 'msyt files created by msyt export file.msbt. Modified version in 2023-05-22 to accomdate variation in totk data structures',
-}
-
-json.dump(out, open("LocationMarker.json",'w'), indent=2)
-print("==> LocationMarker.json")
+
+from msbt import add_format_argument, load_messages
+from msg_langs import add_language_arguments, languages, localize, output_path, run
+
+def build(base, fmt, lang):
+    """Returns (LocationMarker.json contents, log lines) for one language"""
+    data = load_messages(f"{base}/{lang}/LocationMsg/Location.{fmt}")
+
+    out = {}
+    log = []
+
+    for v, val in data['entries'].items():
+        if len(val['contents']) != 1:
+            log.append(f"{v} >1")
+        out[v] = val['contents'][0]['text']
+    for i in range(3,15):
+        out[f'ZonauRelief_{i:02d}'] = "Ancient Tablet"
+    out['_doc_'] = localize({
+        'path': 'objmap/public/game_files/text/LocationMarker.json',
+        'created': 'make_location_list.py',
+        'input_files': [
+            'USen.Product.100/LocationMsg/Location.msyt',
+        ],
+        'notes': 'msyt files created by msyt export file.msbt. Modified version in 2023-05-22 to accomdate variation in totk data structures',
+    }, lang)
+    return out, log
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate LocationMarker.json from the location messages')
+    parser.add_argument('base', help='message directory containing USen.Product.100/')
+    add_format_argument(parser)
+    add_language_arguments(parser)
+    args = parser.parse_args()
+
+    langs = languages(args.base, args.lang)
+    for lang, (out, log) in run(build, langs, args.jobs, args.base, args.format):
+        for line in log:
+            print(line)
+        path = output_path("LocationMarker.json", lang, len(langs) > 1)
+        json.dump(out, open(path,'w'), indent=2)
+        print(f"==> {path}")
+
+if __name__ == "__main__":
+    main()
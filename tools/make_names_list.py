@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 
-import yaml
+import argparse
 import json
-import sys
 
-base = sys.argv[1]
+from msbt import add_format_argument, load_messages
+from msg_langs import add_language_arguments, languages, localize, output_path, run
 
 # 1  ./make_names_list.py
 #     - Game data files
@@ -19,94 +19,123 @@ base = sys.argv[1]
 endswith = ['_BaseName', '_InstantTips', '_Adjective', '_Caption']
 skip_alias = ['Npc_Goron', 'Obj_AutoBuilderDraft', 'Ganondorf']
 
-out = {}
-for file in ["USen.Product.100/ActorMsg/Attachment.msyt",
-             "USen.Product.100/ActorMsg/AutoBuilderDraft.msyt",
-             "USen.Product.100/ActorMsg/Boss.msyt",
-             "USen.Product.100/ActorMsg/CharaDirectory.msyt",
-             "USen.Product.100/ActorMsg/Horse.msyt",
-             "USen.Product.100/ActorMsg/LinkHouse.msyt",
-             "USen.Product.100/ActorMsg/Nickname.msyt",
-             "USen.Product.100/ActorMsg/Npc.msyt",
-             "USen.Product.100/ActorMsg/PictureBook.msyt",
-             "USen.Product.100/ActorMsg/PouchContent.msyt",
-             "USen.Product.100/ActorMsg/SheikahCameraTarget.msyt"
-             ]:
-    with open(f"{base}/{file}","r") as f:
-        data = yaml.load(f, Loader=yaml.FullLoader)
-
-    for v, val in data['entries'].items():
-        skip = any([v.endswith(value) for value in endswith])
-        if skip:
-            continue;
-        if '_Caption_' in v:
-            continue
-        if not v.endswith('_Name') and not v.endswith('_Alias') and not 'Nickname' in file:
-            print(v, val, file)
-            continue
-        isAlias = v.endswith('_Alias')
-        v = v.replace('_Name','').replace('_Alias','')
-
-        if not 'text' in val['contents'][0]:
-            if len(val['contents']) > 1:
-                txt = val['contents'][1]['text']
-        else:
-            txt = val['contents'][0]['text']
+files = ["ActorMsg/Attachment",
+         "ActorMsg/AutoBuilderDraft",
+         "ActorMsg/Boss",
+         "ActorMsg/CharaDirectory",
+         "ActorMsg/Horse",
+         "ActorMsg/LinkHouse",
+         "ActorMsg/Nickname",
+         "ActorMsg/Npc",
+         "ActorMsg/PictureBook",
+         "ActorMsg/PouchContent",
+         "ActorMsg/SheikahCameraTarget"
+         ]
+
+def read_missing():
+    """(key, value) rows of missing.csv; the same for every language"""
+    rows = []
+    with open("missing.csv", "r") as f:
+        for line in f:
+            if len(line.strip()) == 0:
+                continue
+            if line.strip()[0] == '#':
+                continue
+            v = [x.strip() for x in line.split(",")]
+            key, val = v[0], v[1]
+            if val == "":
+                continue
+            rows.append((key, val))
+    return rows
+
+def build(base, fmt, extra, missing, lang):
+    """Returns (names.json contents, log lines) for one language"""
+    out = {}
+    log = []
+    for file in files:
+        file = f"{lang}/{file}.{fmt}"
+        data = load_messages(f"{base}/{file}")
 
-        # Check for repeated key/values
-        if v in out and out[v] != txt:
-            if isAlias or any([value in v for value in skip_alias]):
+        for v, val in data['entries'].items():
+            skip = any([v.endswith(value) for value in endswith])
+            if skip:
+                continue;
+            if '_Caption_' in v:
                 continue
-            #print(f"{v:35}: {out[v]:35} <> {txt:35}", isAlias, v)
+            if not v.endswith('_Name') and not v.endswith('_Alias') and not 'Nickname' in file:
+                log.append((v, val, file))
+                continue
+            isAlias = v.endswith('_Alias')
+            v = v.replace('_Name','').replace('_Alias','')
 
-        out[v] = txt
+            if not 'text' in val['contents'][0]:
+                if len(val['contents']) > 1:
+                    txt = val['contents'][1]['text']
+            else:
+                txt = val['contents'][0]['text']
+
+            # Check for repeated key/values
+            if v in out and out[v] != txt:
+                if isAlias or any([value in v for value in skip_alias]):
+                    continue
+                #print(f"{v:35}: {out[v]:35} <> {txt:35}", isAlias, v)
+
+            out[v] = txt
 
-with open("tools/names_extra.json","r") as f:
-    extra = json.load(f)
     for key, val in extra.items():
         if key not in out:
             out[key] = val
 
-missing = []
-
-with open("missing.csv", "r") as f:
-    for line in f:
-        if len(line.strip()) == 0:
-            continue
-        if line.strip()[0] == '#':
-            continue
-        v = [x.strip() for x in line.split(",")]
-        key, val = v[0], v[1]
-        if val == "":
-            continue
+    for key, val in missing:
         if val[0] == '$':
             val = val[1:]
             if val in out:
                 if not key in out:
                     out[key] = out[val]
                 else:
-                    print(key, val)
+                    log.append((key, val))
             else:
                 raise ValueError('value does not exist', val)
         else:
             if not key in out:
                 out[key] = val
             else:
-                print(key, val)
-
-out['_doc_'] = {
-    'path': 'objmap/public/game_files/names.json',
-    'created': 'make_names_list.py',
-    'input_files': [
-        "USen.Product.100/ActorMsg/PictureBook.msyt",
-        "USen.Product.100/ActorMsg/NPC.msyt",
-        "USen.Product.100/ActorMsg/CharaDirectory.msyt",
-        "USen.Product.100/ActorMsg/PouchContent.msyt"
-        'missing.csv',
-    ],
-    'notes1': 'msyt files created by msyt export file.msbt. Modified version in 2023-05-22 to accomdate variation in totk data structures',
-    'notes2': 'missing.csv created by comparing unit_config_names from map.db (radar/build.ts) to names and outputting the missing values; check top of mssing.csv for more details and format',
-}
-
-json.dump(dict(sorted(out.items())), open("names.json",'w'), indent=2)
-print("==> names.json")
+                log.append((key, val))
+
+    out['_doc_'] = localize({
+        'path': 'objmap/public/game_files/names.json',
+        'created': 'make_names_list.py',
+        'input_files': [
+            "USen.Product.100/ActorMsg/PictureBook.msyt",
+            "USen.Product.100/ActorMsg/NPC.msyt",
+            "USen.Product.100/ActorMsg/CharaDirectory.msyt",
+            "USen.Product.100/ActorMsg/PouchContent.msyt"
+            'missing.csv',
+        ],
+        'notes1': 'msyt files created by msyt export file.msbt. Modified version in 2023-05-22 to accomdate variation in totk data structures',
+        'notes2': 'missing.csv created by comparing unit_config_names from map.db (radar/build.ts) to names and outputting the missing values; check top of mssing.csv for more details and format',
+    }, lang)
+    return dict(sorted(out.items())), log
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate names.json from the ActorMsg messages')
+    parser.add_argument('base', help='message directory containing USen.Product.100/')
+    add_format_argument(parser)
+    add_language_arguments(parser)
+    args = parser.parse_args()
+
+    # Language independent inputs, read once for all languages
+    with open("tools/names_extra.json","r") as f:
+        extra = json.load(f)
+    missing = read_missing()
+
+    langs = languages(args.base, args.lang)
+    for lang, (out, log) in run(build, langs, args.jobs, args.base, args.format, extra, missing):
+        for line in log:
+            print(*line)
+        path = output_path("names.json", lang, len(langs) > 1)
+        json.dump(out, open(path,'w'), indent=2)
+        print(f"==> {path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,41 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
-import sys
 
-base = sys.argv[1]
+import hash_index
+import korok_layers
+import map_db
+import profiling
+import json_stream
+from json_stream import open_atomic
+
+parser = argparse.ArgumentParser(description='Generate static.json map markers')
+parser.add_argument('base', help='romfs with Banc/ converted to json')
+parser.add_argument('--region-index', help='region_index.json; Sky koroks must be over a sky island')
+parser.add_argument('--pretty', action='store_true', help='indent the output for diffing')
+parser.add_argument('--map-db', help='radar map.db; read shrine caves and dispensers from it instead of tools/*.json')
+parser.add_argument('--byml', action='store_true', help='read the Banc/ .byml.zs files directly (tools/byml.py) instead of their json exports')
+parser.add_argument('--columnar', metavar='PATH', help='also write the columnar binary form (marker_columns.py)')
+profiling.add_profile_argument(parser)
+args = parser.parse_args()
+base = args.base
+profiling.start('make_static_list', args)
+profiling.mark('setup')
+load_json = profiling.timed('json', lambda path: json.load(open(path, 'r')))
+
+def load_banc(field, kind):
+    if args.byml:
+        from parse_cache import load_byml
+        return load_byml(f"{base}/Banc/{field}/{kind}/{field}.{kind.lower()}.byml.zs", f"{base}/ZsDic/zs.zsdic")
+    return load_json(f"{base}/Banc/{field}/{kind}/{field}.{kind.lower()}.json")
+
+region_index = None
+if args.region_index:
+    from region_index import RegionIndex
+    region_index = RegionIndex.load(args.region_index)
+
+db = map_db.connect(args.map_db) if args.map_db else None
 
 def parseHash(value):
     v = int(value)
@@ -62,7 +94,6 @@ types = {
     "Stable": "Place",
     "SkyArchipelago": "Location",
 }
-out = {}
 markers = {}
 markers['Labo'] = []
 markers['Chasm'] = []
@@ -85,15 +116,17 @@ chasms_not_caves = [
     'Cave_Lanayru_0063'
 ]
 
-# Generate shrine_caves.json
-# sqlite> .mode json
-# sqlite> .output shrine_caves.json
-# sqlite> select map_name, json_extract(data, '$.Dynamic.Location') as Location from objs
-#            where unit_config_name = 'LocationMarker' and data like '%:"Dungeon%' ;
-shrine_maps = {val['Location']: val['map_name'].split("_")[0] for val in json.load(open("tools/shrine_caves.json", "r")) }
+# shrine_caves.json and rbox.json are exported from the radar map.db:
+#   ./tools/map_db.py map.db export shrine_caves tools/shrine_caves.json
+#   ./tools/map_db.py map.db export rbox tools/rbox.json
+# or read from it directly with --map-db
+# Side tables are joined in bulk through tools/hash_index.py
+hashes = hash_index.load_or_build()
+shrines = []
 
 for field in ['MainField', 'MinusField']:
-    data = json.load(open(f"{base}/Banc/{field}/LocationArea/{field}.locationarea.json","r"))
+    profiling.mark(f'{field} locations')
+    data = load_banc(field, 'LocationArea')
 
     for kind, values in data.items():
         item_kind = kind
@@ -121,7 +154,7 @@ for field in ['MainField', 'MinusField']:
                     'hash_id': parseHash(v['InstanceID'][i])
                 }
                 if kind == 'Shrine':
-                    item['ShrineInCave'] = shrine_maps[msg] == 'Cave'
+                    shrines.append(item)
                 if kind in icons :
                     item['Icon'] = icons[kind]
                 if kind.startswith("Spot") :
@@ -184,36 +217,42 @@ for field in ['MainField', 'MinusField']:
             markers[item_kind] = []
         markers[item_kind].extend(items)
 
-    data = json.load(open(f"{base}/Banc/{field}/HiddenKorok/{field}.hiddenkorok.json", "r"))
-    xkoroks = json.load(open("tools/koroks_id.json","r"))
+    profiling.mark(f'{field} koroks')
+    data = load_banc(field, 'HiddenKorok')
+    points = [(key, pt) for values in data.values() for key, pt in values.items()]
+    map_names = korok_layers.classify([pt for _, pt in points], [key for key, _ in points], index=region_index)
+    known = hashes.lookup('koroks', [key for key, _ in points])
     items = []
-    for kind, values in data.items():
-        for key, pt in values.items():
-            #print(kind, key)
-            map_name = 'Surface'
-            if pt[1] >= 750:
-                map_name = 'Sky'
-            if key in ['6577590198901788531','2587961335290322890','3494902862536172994']:
-                map_name = 'Sky'
-            if key in ['15262678164833260129', '18194949317466592174']:
-                map_name = 'Surface'
-            hash_id = parseHash(key)
-            ID = hash_id
-            if ID in xkoroks:
-                ID = xkoroks[ID]['id']
-            items.append({
-                'id': ID,
-                'Translate': { 'X': pt[0], 'Y': pt[1], 'Z': pt[2] },
-                'hash_id': parseHash(key),
-                'name': ID,
-                'map_static': 1,
-                'map_name': map_name,
-                'map_type': 'Totk'
-            })
+    for (key, pt), map_name, korok in zip(points, map_names, known):
+        ID = parseHash(key)
+        if korok:
+            ID = korok['id']
+        items.append({
+            'id': ID,
+            'Translate': { 'X': pt[0], 'Y': pt[1], 'Z': pt[2] },
+            'hash_id': parseHash(key),
+            'name': ID,
+            'map_static': 1,
+            'map_name': str(map_name),
+            'map_type': 'Totk'
+        })
     markers['Korok'].extend(items)
 
+profiling.mark('shrines')
+if db:
+    shrine_maps = {row['Location']: row['map_name'] for row in map_db.shrine_caves(db)}
+    shrine_rows = [{'map_name': shrine_maps[item['MessageID']]} for item in shrines]
+else:
+    shrine_rows = hashes.lookup('shrine_caves', [hash_index.name_key(item['MessageID']) for item in shrines])
+for item, shrine in zip(shrines, shrine_rows):
+    item['ShrineInCave'] = shrine['map_name'].split("_")[0] == 'Cave'
+
+profiling.mark('dispensers')
 markers['Dispensers'] = []
-rboxes =json.load(open('tools/rbox.json', 'r'))
+if db:
+    rboxes = map_db.rboxes(db)
+else:
+    rboxes = load_json('tools/rbox.json')
 for rbox in rboxes:
     pt = rbox['data']['Translate']
     msg = rbox['unit_config_name'],
@@ -244,8 +283,7 @@ markers['Place'].append({
     'hash_id': parseHash('13371596173322305161')
 })
 
-out['markers'] = markers
-out['_doc_'] = {
+doc = {
     'path': 'objmap/public/game_files/map_summary/MainField/static.json',
     'created': 'make_static_list.py',
     'input_files': [
@@ -254,5 +292,18 @@ out['_doc_'] = {
     ],
     'notes': 'json input files created by decompressing from zstd -D ZsDic/zs.zsdic -d file.byml.zs -o file.byml, then converting to yaml and json with byml_to_yml'
 }
-json.dump(out, open("static.json", "w"), indent=2)
+# Categories are filled from both fields and the side tables, so static.json
+#   is only written once every marker is in memory
+profiling.mark('write')
+with open_atomic("static.json") as f:
+    json_stream.dump({'_doc_': doc, 'markers': markers}, f, args.pretty)
 print("==> static.json")
+
+if args.columnar:
+    profiling.mark('columnar')
+    import marker_columns
+    # check() raises unless the file decodes back to exactly what static.json holds
+    data = marker_columns.check({'_doc_': doc, 'markers': markers})
+    with open_atomic(args.columnar, 'wb') as f:
+        f.write(data)
+    print(f"==> {args.columnar}")
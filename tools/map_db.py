@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# Queries against the radar map.db (objs table, see radar/build.ts) used by
+#   make_static_list.py and search_index.py.
+#
+# Rows are streamed from the cursor in the shape of the JSON exports they
+#   replace (tools/shrine_caves.json, tools/rbox.json). Indexes on
+#   unit_config_name and map_name are created if missing and the database is
+#   writable; a read-only map.db is queried as is.
+#
+#   ./tools/map_db.py map.db export shrine_caves tools/shrine_caves.json
+#   ./tools/map_db.py map.db export rbox tools/rbox.json
+
+import argparse
+import json
+import sqlite3
+
+from json_stream import open_atomic
+
+INDEXES = {
+    "objs_unit_config_name": "unit_config_name",
+    "objs_map_name": "map_name",
+}
+
+# Columns holding JSON text that the exports store decoded
+JSON_COLUMNS = ("data", "drops", "equip", "ui_equip")
+
+RBOX_COLUMNS = (
+    "objid", "map_type", "map_name", "gen_group", "hash_id", "unit_config_name", "ui_name",
+    "data", "map_static", "merged", "drops", "equip", "ui_drops", "ui_equip",
+)
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        for name, column in INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON objs ({column})")
+        conn.commit()
+    except sqlite3.OperationalError:
+        conn.rollback()
+    return conn
+
+
+def shrine_caves(conn, marker="LocationMarker", location="Dungeon*"):
+    """Yields {"map_name", "Location"} for every shrine location marker"""
+    cursor = conn.execute(
+        """
+        SELECT map_name, json_extract(data, '$.Dynamic.Location') AS Location
+        FROM objs
+        WHERE unit_config_name = ? AND json_extract(data, '$.Dynamic.Location') GLOB ?
+        ORDER BY map_name, Location
+        """,
+        (marker, location),
+    )
+    for row in cursor:
+        yield {"map_name": row["map_name"], "Location": row["Location"]}
+
+
+def rboxes(conn, pattern="RBox_Field_*"):
+    """Yields device dispenser rows shaped like tools/rbox.json"""
+    # GLOB with a literal prefix can use the unit_config_name index
+    cursor = conn.execute(
+        f"SELECT {', '.join(RBOX_COLUMNS)} FROM objs WHERE unit_config_name GLOB ? ORDER BY objid",
+        (pattern,),
+    )
+    for row in cursor:
+        item = dict(row)
+        item["hash_id"] = str(item["hash_id"])
+        for column in JSON_COLUMNS:
+            if isinstance(item[column], str):
+                item[column] = json.loads(item[column])
+        yield item
+
+
+def objects(conn, map_type=None, map_name=None):
+    """Yields a summary of every object: objid, hash_id, map_type, map_name,
+    map_static, name (unit_config_name), ui_name and pos"""
+    where, params = [], []
+    if map_type:
+        where.append("map_type = ?")
+        params.append(map_type)
+    if map_name:
+        where.append("map_name = ?")
+        params.append(map_name)
+    cursor = conn.execute(
+        f"""
+        SELECT objid, hash_id, map_type, map_name, map_static, unit_config_name, ui_name,
+               json_extract(data, '$.Translate') AS pos
+        FROM objs {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY objid
+        """,
+        params,
+    )
+    for row in cursor:
+        yield {
+            "objid": row["objid"],
+            "hash_id": str(row["hash_id"]) if row["hash_id"] is not None else None,
+            "map_type": row["map_type"],
+            "map_name": row["map_name"],
+            "map_static": row["map_static"],
+            "name": row["unit_config_name"],
+            "ui_name": row["ui_name"],
+            "pos": json.loads(row["pos"]) if row["pos"] else None,
+        }
+
+
+QUERIES = {"shrine_caves": shrine_caves, "rbox": rboxes, "objects": objects}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export marker inputs from the radar map.db")
+    parser.add_argument("db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="write a query's rows as a JSON list")
+    p.add_argument("query", choices=list(QUERIES))
+    p.add_argument("output")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    rows = QUERIES[args.query](conn)
+    with open_atomic(args.output) as f:
+        f.write("[")
+        for i, row in enumerate(rows):
+            f.write(("," if i else "") + json.dumps(row))
+        f.write("]")
+
+
+if __name__ == "__main__":
+    main()
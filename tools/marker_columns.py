@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# Columnar binary form of the marker summaries (static.json).
+#
+# Each marker category becomes a table with one column per field, nested
+#   dicts (Translate) being flattened to one column per member. Columns are
+#   stored as:
+#
+#   f32 / f64  coordinates and other numbers (f64 only if a value is not exact
+#              as float32); "ints" lists the rows that were integers in JSON
+#   i64        integers
+#   bool       one byte per row
+#   u64hex     "0x%016x" hash strings as uint64
+#   dict       any other value (strings, lists): a table of distinct values
+#              plus one u8/u16/u32 index per row
+#   const      the same value in every row, nothing stored per row
+#   alias      identical to an earlier column (Dispensers id == hash_id)
+#   prefix     prefix + an earlier string column (SaveFlag = Location_ + MessageID)
+#
+#   Each row's keys, in order, are dictionary encoded as its "shape", so
+#   optional fields and key order come back exactly as they were.
+#
+# File layout (little endian):
+#   b"OMCS" u32 version, u32 header length, JSON header, zero padding to 8,
+#   then the column arrays, each 8 byte aligned. The header holds _doc_, the
+#   tables and for every column its type, offset and row count.
+#
+#   ./tools/marker_columns.py encode static.json static.bin
+#   ./tools/marker_columns.py decode static.bin static.json
+
+import argparse
+import array
+import json
+import re
+import struct
+import sys
+
+MAGIC = b"OMCS"
+VERSION = 1
+HASH_RE = re.compile(r"0x[0-9a-f]{16}\Z")
+
+
+def _key(value):
+    return json.dumps(value, sort_keys=True)
+
+
+def _is_f32(value):
+    try:
+        return struct.unpack("<f", struct.pack("<f", value))[0] == value
+    except OverflowError:
+        return False
+
+
+def _index_code(n):
+    return "B" if n <= 0xFF else "H" if n <= 0xFFFF else "I"
+
+
+def _flatten(item):
+    """Returns [(path, value)] with nested dicts expanded one level"""
+    out = []
+    for key, value in item.items():
+        if isinstance(value, dict) and value:
+            out.extend(((key, sub), v) for sub, v in value.items())
+        else:
+            out.append(((key,), value))
+    return out
+
+
+class _Blob:
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def add(self, arr):
+        if sys.byteorder == "big":
+            arr = array.array(arr.typecode, arr)
+            arr.byteswap()
+        data = arr.tobytes()
+        offset = self.size
+        pad = -len(data) % 8
+        self.parts.append(data + b"\0" * pad)
+        self.size += len(data) + pad
+        return offset
+
+
+def _dict_column(values, blob):
+    table, index = [], {}
+    rows = array.array("I")
+    for v in values:
+        k = _key(v)
+        if k not in index:
+            index[k] = len(table)
+            table.append(v)
+        rows.append(index[k])
+    code = _index_code(len(table) - 1)
+    return {"type": "dict", "values": table, "code": code, "offset": blob.add(array.array(code, rows))}
+
+
+def _encode_column(values, earlier, blob):
+    """values: [(row, value)] for the rows that have this field"""
+    vals = [v for _, v in values]
+    rows = [r for r, _ in values]
+    keys = [_key(v) for v in vals]
+
+    if len(set(keys)) == 1:
+        return {"type": "const", "value": vals[0]}
+    for name, (other_rows, other_keys, other_vals) in earlier.items():
+        if other_rows != rows:
+            continue
+        if other_keys == keys:
+            return {"type": "alias", "of": name}
+        if all(isinstance(v, str) for v in vals + other_vals) and vals[0].endswith(other_vals[0]):
+            prefix = vals[0][: len(vals[0]) - len(other_vals[0])]
+            if all(v == prefix + o for v, o in zip(vals, other_vals)):
+                return {"type": "prefix", "of": name, "prefix": prefix}
+
+    if all(isinstance(v, bool) for v in vals):
+        return {"type": "bool", "offset": blob.add(array.array("B", vals))}
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in vals):
+        if all(-(2**63) <= v < 2**63 for v in vals):
+            return {"type": "i64", "offset": blob.add(array.array("q", vals))}
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in vals):
+        floats = [float(v) for v in vals]
+        if all(float(v) == v for v in vals):
+            ints = [i for i, v in enumerate(vals) if isinstance(v, int)]
+            kind = "f32" if all(_is_f32(v) for v in floats) else "f64"
+            col = {"type": kind, "offset": blob.add(array.array("f" if kind == "f32" else "d", floats))}
+            if ints:
+                col["ints"] = ints
+            return col
+    if all(isinstance(v, str) and HASH_RE.match(v) for v in vals):
+        return {"type": "u64hex", "offset": blob.add(array.array("Q", [int(v, 16) for v in vals]))}
+    return _dict_column(vals, blob)
+
+
+def encode(doc):
+    """Encodes {"markers": {kind: [item]}, ...} into bytes"""
+    blob = _Blob()
+    tables = []
+    for kind, items in doc["markers"].items():
+        columns, data = {}, {}
+        shapes = []
+        for row, item in enumerate(items):
+            fields = _flatten(item)
+            shapes.append([list(path) for path, _ in fields])
+            for path, value in fields:
+                data.setdefault(path, []).append((row, value))
+        earlier = {}
+        for path, values in data.items():
+            name = ".".join(path)
+            col = _encode_column(values, earlier, blob)
+            col["path"] = list(path)
+            col["count"] = len(values)
+            columns[name] = col
+            earlier[name] = ([r for r, _ in values], [_key(v) for _, v in values], [v for _, v in values])
+        shape = _dict_column(shapes, blob)
+        tables.append({"kind": kind, "rows": len(items), "shapes": shape, "columns": list(columns.values())})
+
+    header = {k: v for k, v in doc.items() if k != "markers"}
+    header["tables"] = tables
+    head = json.dumps(header, separators=(",", ":")).encode()
+    out = MAGIC + struct.pack("<II", VERSION, len(head)) + head
+    out += b"\0" * (-len(out) % 8)
+    return out + b"".join(blob.parts)
+
+
+def _read(buf, base, code, offset, count):
+    arr = array.array(code)
+    start = base + offset
+    arr.frombytes(buf[start : start + count * arr.itemsize])
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def decode(buf):
+    """Decodes bytes written by encode() back into the static.json document"""
+    buf = memoryview(buf)
+    if bytes(buf[:4]) != MAGIC:
+        raise ValueError("not a marker column file")
+    version, head_len = struct.unpack_from("<II", buf, 4)
+    if version != VERSION:
+        raise ValueError(f"unsupported version {version}")
+    header = json.loads(bytes(buf[12 : 12 + head_len]))
+    base = 12 + head_len
+    base += -base % 8
+
+    markers = {}
+    for table in header.pop("tables"):
+        values = {}
+        for col in table["columns"]:
+            name, kind, count = ".".join(col["path"]), col["type"], col["count"]
+            if kind == "const":
+                vals = [col["value"]] * count
+            elif kind == "alias":
+                vals = values[col["of"]]
+            elif kind == "prefix":
+                vals = [col["prefix"] + v for v in values[col["of"]]]
+            elif kind == "bool":
+                vals = [bool(v) for v in _read(buf, base, "B", col["offset"], count)]
+            elif kind == "i64":
+                vals = _read(buf, base, "q", col["offset"], count).tolist()
+            elif kind in ("f32", "f64"):
+                vals = _read(buf, base, "f" if kind == "f32" else "d", col["offset"], count).tolist()
+                for i in col.get("ints", ()):
+                    vals[i] = int(vals[i])
+            elif kind == "u64hex":
+                vals = [f"0x{v:016x}" for v in _read(buf, base, "Q", col["offset"], count)]
+            elif kind == "dict":
+                table_values = col["values"]
+                vals = [table_values[i] for i in _read(buf, base, col["code"], col["offset"], count)]
+            else:
+                raise ValueError(f"unknown column type {kind}")
+            values[name] = vals
+
+        shape_col = table["shapes"]
+        shapes = shape_col["values"]
+        shape_rows = _read(buf, base, shape_col["code"], shape_col["offset"], table["rows"])
+        cursors = {name: iter(vals) for name, vals in values.items()}
+        items = []
+        for s in shape_rows:
+            item = {}
+            for path in shapes[s]:
+                value = next(cursors[".".join(path)])
+                if len(path) == 1:
+                    item[path[0]] = value
+                else:
+                    item.setdefault(path[0], {})[path[1]] = value
+            items.append(item)
+        markers[table["kind"]] = items
+
+    doc = {"markers": markers}
+    doc.update(header)
+    return doc
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def check(doc):
+    """Round-trips doc, raising ValueError on any difference; returns the encoding"""
+    data = encode(doc)
+    expected = json.dumps(doc, sort_keys=True)
+    got = json.dumps(decode(data), sort_keys=True)
+    if got != expected:
+        for kind, items in doc["markers"].items():
+            for i, (a, b) in enumerate(zip(items, decode(data)["markers"].get(kind, []))):
+                if _key(a) != _key(b):
+                    raise ValueError(f"{kind}[{i}] differs: {a} != {b}")
+        raise ValueError("decoded document differs")
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar binary form of static.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("encode")
+    p.add_argument("input")
+    p.add_argument("output")
+    p = sub.add_parser("decode")
+    p.add_argument("input")
+    p.add_argument("output")
+    args = parser.parse_args()
+
+    if args.command == "encode":
+        with open(args.input) as f:
+            data = check(json.load(f))
+        with open(args.output, "wb") as f:
+            f.write(data)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(load(args.input), f, sort_keys=True, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# MSBT message file reader for the text generators.
+#
+# Reads the binary message files directly (mmap) instead of their msyt YAML
+#   exports. Only the LBL1 (labels) and TXT2 (UTF-16 text) sections are used;
+#   ATR1 and the other sections are skipped. Text is split at control tags
+#   like msyt does, so load() returns the same shape as an msyt export:
+#
+#   {"entries": {label: {"contents": [{"text": "..."},
+#                                     {"control": {"group", "type", "params"}}, ...]}}}
+#
+#   with the labels sorted, as msyt writes them. texts() yields
+#   (label, text) pairs with the control tags dropped.
+#
+#   ./tools/msbt.py dump USen.Product.100/LocationMsg/Location.msbt
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+MAGIC = b"MsgStdBn"
+ENCODINGS = {0: "utf-8", 1: "utf-16", 2: "utf-32"}
+TAG = 0x0E
+TAG_END = 0x0F
+
+
+def _sections(buf, endian, count):
+    out = {}
+    pos = 0x20
+    for _ in range(count):
+        magic = bytes(buf[pos : pos + 4])
+        size = struct.unpack_from(endian + "I", buf, pos + 4)[0]
+        out[magic] = (pos + 16, size)
+        pos += 16 + size
+        pos += -pos % 16
+    return out
+
+
+class MessageFile:
+    def __init__(self, buf):
+        self.buf = buf
+        if bytes(buf[:8]) != MAGIC:
+            raise ValueError("not an MSBT file")
+        bom = bytes(buf[8:10])
+        self.endian = ">" if bom == b"\xfe\xff" else "<"
+        encoding, self.version, count = struct.unpack_from(self.endian + "BBH", buf, 12)
+        if ENCODINGS.get(encoding) != "utf-16":
+            raise ValueError(f"unsupported text encoding {ENCODINGS.get(encoding, encoding)}")
+        self.sections = _sections(buf, self.endian, count)
+        for magic in (b"LBL1", b"TXT2"):
+            if magic not in self.sections:
+                raise ValueError(f"missing {magic.decode()} section")
+
+    def labels(self):
+        """Returns [(label, message index)] sorted by label"""
+        start, _ = self.sections[b"LBL1"]
+        groups = struct.unpack_from(self.endian + "I", self.buf, start)[0]
+        out = []
+        for g in range(groups):
+            n, offset = struct.unpack_from(self.endian + "II", self.buf, start + 4 + 8 * g)
+            pos = start + offset
+            for _ in range(n):
+                size = self.buf[pos]
+                label = bytes(self.buf[pos + 1 : pos + 1 + size]).decode("utf-8")
+                index = struct.unpack_from(self.endian + "I", self.buf, pos + 1 + size)[0]
+                out.append((label, index))
+                pos += 1 + size + 4
+        out.sort()
+        return out
+
+    def raw(self, index):
+        start, size = self.sections[b"TXT2"]
+        count = struct.unpack_from(self.endian + "I", self.buf, start)[0]
+        if not 0 <= index < count:
+            raise IndexError(index)
+        begin = struct.unpack_from(self.endian + "I", self.buf, start + 4 + 4 * index)[0]
+        end = size if index + 1 == count else struct.unpack_from(self.endian + "I", self.buf, start + 8 + 4 * index)[0]
+        return bytes(self.buf[start + begin : start + end])
+
+    def contents(self, index):
+        """The message split into text runs and control tags, like msyt"""
+        raw = self.raw(index)
+        units = array("H")
+        units.frombytes(raw)
+        if (self.endian == "<") != (sys.byteorder == "little"):
+            units.byteswap()
+        codec = "utf-16-le" if sys.byteorder == "little" else "utf-16-be"
+        try:
+            plain = units.tobytes().decode(codec).split("\0", 1)[0]
+        except UnicodeDecodeError:  # tag parameters
+            plain = "\x0e"
+        if "\x0e" not in plain and "\x0f" not in plain:
+            return [{"text": plain}] if plain else []
+        out = []
+        text = 0
+        i = 0
+        n = len(units)
+        while i < n:
+            unit = units[i]
+            if unit not in (0, TAG, TAG_END):
+                i += 1
+                continue
+            if i > text:
+                out.append({"text": units[text:i].tobytes().decode(codec)})
+            if unit == 0:
+                break
+            group, kind = units[i + 1], units[i + 2]
+            if unit == TAG:
+                size = units[i + 3]
+                params = raw[2 * i + 8 : 2 * i + 8 + size]
+                out.append({"control": {"group": group, "type": kind, "params": params.hex()}})
+                i += 4 + (size + 1) // 2
+            else:
+                out.append({"control": {"group": group, "type": kind, "close": True}})
+                i += 3
+            text = i
+        else:
+            if n > text:
+                out.append({"text": units[text:n].tobytes().decode(codec)})
+        return out
+
+    def messages(self):
+        """Yields (label, contents) in label order"""
+        for label, index in self.labels():
+            yield label, self.contents(index)
+
+
+def open_file(path):
+    with open(path, "rb") as f:
+        return MessageFile(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def texts(path):
+    """Yields (label, text) with control tags skipped"""
+    for label, contents in open_file(path).messages():
+        yield label, "".join(c["text"] for c in contents if "text" in c)
+
+
+def load(path):
+    return {"entries": {label: {"contents": contents} for label, contents in open_file(path).messages()}}
+
+
+def load_messages(path):
+    """msyt shaped messages from a .msbt file or an msyt export"""
+    if str(path).endswith(".msbt"):
+        return load(path)
+    from yaml_loader import load_yaml
+
+    return load_yaml(path)
+
+
+def add_format_argument(parser):
+    parser.add_argument(
+        "--format",
+        choices=["msyt", "msbt"],
+        default="msyt",
+        help="read the msyt exports (default) or the .msbt files directly",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read MSBT message files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("dump", help="print the messages as msyt shaped JSON")
+    p.add_argument("file")
+    p = sub.add_parser("texts", help="print label<TAB>text lines")
+    p.add_argument("file")
+    args = parser.parse_args()
+
+    if args.command == "dump":
+        json.dump(load(args.file), sys.stdout, ensure_ascii=False, indent=2)
+    else:
+        for label, text in texts(args.file):
+            print(f"{label}\t{text}")
+
+
+if __name__ == "__main__":
+    main()
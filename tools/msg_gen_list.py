@@ -1,14 +1,96 @@
 #!/usr/bin/env python3
 # Generate a list of text message files.
+#
+#   ./msg_gen_list.py [text_dir] [-o list.json] [--pack [bundle_dir]]
+#
+# --pack also merges every text file and names.json into a single bundle so
+#   the map needs one request for its labels. String values are stored once
+#   in a table, most used first, and referred to by index; other values
+#   (_doc_) are kept as is:
+#
+#   {"format": "text_bundle/2",
+#    "strings": ["Cave Entrance", ...],
+#    "files": {"StaticMsg/Dungeon": {"refs": {"Dungeon000": 12, ...}, "values": {"_doc_": {...}}}, ...},
+#    "names": {"refs": {"Animal_Bear_A": 345, ...}, "values": {...}}}
+#
+#   The bundle directory (default: text_dir/../text_bundle) holds the bundle
+#   as <hash>.json, named after the sha256 of its contents so it can be cached
+#   forever, and manifest.json pointing at it: {"bundle": "<hash>.json"}.
+#   Both are generated by the build (build_game_files.py), not checked in.
 
+import argparse
+import collections
+import hashlib
 import json
 from pathlib import Path
 
+from json_stream import open_atomic
+
+FORMAT = 'text_bundle/2'
+
+
+def pack(text_dir, paths, names_path):
+    sources = {}
+    for path in sorted(paths):
+        with open(text_dir / path) as f:
+            sources[path[:-len('.json')]] = json.load(f)
+    with open(names_path) as f:
+        names = json.load(f)
+
+    counts = collections.Counter()
+    for doc in list(sources.values()) + [names]:
+        counts.update(v for v in doc.values() if isinstance(v, str))
+    # Most used first keeps the common indices short; ties in sorted order
+    strings = sorted(counts, key=lambda s: (-counts[s], s))
+    index = {s: i for i, s in enumerate(strings)}
+
+    def intern(doc):
+        return {
+            'refs': {k: index[v] for k, v in doc.items() if isinstance(v, str)},
+            'values': {k: v for k, v in doc.items() if not isinstance(v, str)},
+        }
+
+    return {
+        'format': FORMAT,
+        'strings': strings,
+        'files': {name: intern(doc) for name, doc in sources.items()},
+        'names': intern(names),
+    }
+
+
+def write_bundle(bundle_dir, bundle):
+    """Writes <hash>.json and manifest.json, removing older bundles"""
+    text = json.dumps(bundle, separators=(',', ':'), sort_keys=True)
+    name = hashlib.sha256(text.encode()).hexdigest()[:16] + '.json'
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    with open_atomic(bundle_dir / name) as f:
+        f.write(text)
+    with open_atomic(bundle_dir / 'manifest.json') as f:
+        json.dump({'format': FORMAT, 'bundle': name}, f)
+    for old in bundle_dir.glob('*.json'):
+        if old.name not in (name, 'manifest.json'):
+            old.unlink()
+    return bundle_dir / name
+
+
 root = Path(__file__).parent.parent
-text_dir = root / 'public' / 'game_files' / 'text'
+parser = argparse.ArgumentParser(description='Generate a list of text message files')
+parser.add_argument('text_dir', nargs='?', type=Path, default=root / 'public' / 'game_files' / 'text')
+parser.add_argument('-o', '--output', type=Path, help='default: text_dir/list.json')
+parser.add_argument('--pack', nargs='?', type=Path, const=True,
+                    help='also write a bundle of all text files and names.json (default: text_dir/../text_bundle/)')
+parser.add_argument('--names', type=Path, help='default: text_dir/../names.json')
+args = parser.parse_args()
+
+text_dir = args.text_dir
+output = args.output or text_dir / 'list.json'
 paths = []
 for text_path in text_dir.glob('*/*.json'):
     paths.append(str(text_path.relative_to(text_dir)))
-with open(text_dir / 'list.json', 'w') as f:
+with open_atomic(output) as f:
     json.dump(paths, f)
 
+if args.pack:
+    bundle_dir = text_dir.parent / 'text_bundle' if args.pack is True else args.pack
+    bundle = pack(text_dir, paths, args.names or text_dir.parent / 'names.json')
+    write_bundle(bundle_dir, bundle)
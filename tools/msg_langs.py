@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Language selection shared by the message generators (make_names_list.py,
+#   make_location_list.py, make_dungeon_list.py).
+#
+# --lang picks the message directories under the base directory; the default
+#   is USen.Product.100 and "all" means every *.Product.* directory. With a
+#   single language the outputs are written to the current directory as
+#   before, with several they go to <locale>/ (USen/names.json, ...). The
+#   languages are parsed concurrently (parallel.py), after the language
+#   independent inputs were read once.
+
+import functools
+import os
+
+from parallel import add_jobs_argument, map_chunked
+
+DEFAULT = "USen.Product.100"
+
+
+def add_language_arguments(parser):
+    parser.add_argument(
+        "--lang",
+        nargs="+",
+        default=[DEFAULT],
+        metavar="DIR",
+        help=f"message directories to read (default: {DEFAULT}; 'all': every *.Product.* directory)",
+    )
+    add_jobs_argument(parser)
+
+
+def languages(base, requested):
+    if requested != ["all"]:
+        return requested
+    found = sorted(e.name for e in os.scandir(base) if e.is_dir() and ".Product." in e.name)
+    if not found:
+        raise ValueError(f"no *.Product.* message directories in {base}")
+    return found
+
+
+def output_path(name, lang, multiple):
+    if not multiple:
+        return name
+    locale = lang.split(".")[0]
+    os.makedirs(locale, exist_ok=True)
+    return os.path.join(locale, name)
+
+
+def localize(doc, lang):
+    """_doc_ with the input paths pointing at lang instead of USen"""
+    if lang == DEFAULT:
+        return doc
+    out = dict(doc)
+    out["input_files"] = [path.replace(DEFAULT, lang) for path in doc["input_files"]]
+    return out
+
+
+def run(build, langs, jobs, *shared):
+    """Returns [(lang, build(*shared, lang))], running the languages concurrently"""
+    results = map_chunked(functools.partial(build, *shared), langs, jobs, chunksize=1)
+    return list(zip(langs, results))
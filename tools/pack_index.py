@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# In-memory index of the romfs Pack/ tree for the component lookups.
+#
+# get_horn_data.py and ActorLoader (common_name.py) probe every component
+#   first in the actor's pack and then in Pack/ResidentCommon, which costs a
+#   stat() per candidate path. The tree is instead listed once with
+#   os.scandir (no stat per file) and the lookups are answered from the
+#   listing. Paths outside the indexed root, under directories that could
+#   not be listed, or under a directory symlink leading to an already listed
+#   directory (which ends link cycles), still go to disk.
+#
+# Environment:
+#   OBJMAP_PACK_INDEX=0   disable the index, every lookup stats the disk
+#
+#   ./tools/pack_index.py [Pack]   # scan and print the index size
+
+import os
+import sys
+import time
+
+from parallel import register_counters
+
+
+class PackIndex:
+    def __init__(self, root="Pack", enabled=True):
+        self.root = os.path.normpath(root)
+        self.enabled = enabled
+        self.scanned = False
+        self.files = set()
+        self.dirs = set()
+        self.names = {}
+        self.unlisted = []
+        self.memory_lookups = 0
+        self.disk_lookups = 0
+
+    @classmethod
+    def from_env(cls, root="Pack"):
+        return cls(root, os.environ.get("OBJMAP_PACK_INDEX", "1") not in ["0", ""])
+
+    def scan(self):
+        if not self.enabled:
+            return self
+        self.abs_root = os.path.abspath(self.root)
+        stack = [self.root]
+        # (st_dev, st_ino) of the listed directories
+        seen = set()
+        while stack:
+            top = stack.pop()
+            try:
+                st = os.stat(top)
+                if (st.st_dev, st.st_ino) in seen:
+                    self.dirs.add(top)
+                    self.unlisted.append(top + os.sep)
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+                entries = list(os.scandir(top))
+            except FileNotFoundError:
+                continue
+            except OSError:
+                self.unlisted.append(top + os.sep)
+                continue
+            self.dirs.add(top)
+            for entry in entries:
+                path = os.path.join(top, entry.name)
+                if entry.is_dir():
+                    stack.append(path)
+                else:
+                    self.files.add(path)
+                    self.names.setdefault(entry.name, []).append(path)
+        self.scanned = True
+        return self
+
+    def _key(self, path):
+        """Normalized path relative to the indexed root's parent, None if outside"""
+        key = os.path.normpath(path)
+        if os.path.isabs(key):
+            if key != self.abs_root and not key.startswith(self.abs_root + os.sep):
+                return None
+            key = self.root + key[len(self.abs_root) :]
+        if key != self.root and not key.startswith(self.root + os.sep):
+            return None
+        if any(key.startswith(prefix) for prefix in self.unlisted):
+            return None
+        return key
+
+    def exists(self, path):
+        if self.enabled:
+            if not self.scanned:
+                self.scan()
+            key = self._key(str(path))
+            if key is not None:
+                self.memory_lookups += 1
+                return key in self.files or key in self.dirs
+        self.disk_lookups += 1
+        return os.path.exists(path)
+
+    def find(self, name):
+        """Indexed files with this basename"""
+        if not self.scanned:
+            self.scan()
+        return sorted(self.names.get(name, []))
+
+    def counters(self):
+        return {"memory_lookups": self.memory_lookups, "disk_lookups": self.disk_lookups}
+
+    def add_counters(self, counters):
+        self.memory_lookups += counters.get("memory_lookups", 0)
+        self.disk_lookups += counters.get("disk_lookups", 0)
+
+    def report(self, file=sys.stderr):
+        if self.memory_lookups + self.disk_lookups == 0:
+            return
+        print(
+            f"pack index: {self.memory_lookups} lookups answered in memory (stat calls saved),"
+            f" {self.disk_lookups} on disk",
+            file=file,
+        )
+
+
+index = PackIndex.from_env()
+register_counters(index)
+
+
+def exists(path):
+    return index.exists(path)
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else "Pack"
+    start = time.perf_counter()
+    idx = PackIndex(root).scan()
+    elapsed = time.perf_counter() - start
+    print(f"{root}: {len(idx.files)} files, {len(idx.dirs)} directories in {elapsed * 1000:.0f} ms")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Process pool helpers for the per-actor generators.
+#
+# Work items are dispatched in chunks and results come back in input order,
+#   so callers that sort their inputs get output identical to a serial run.
+#   Counters of registered objects (parse cache, document cache) are summed
+#   back into the parent process.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+_counters = []
+
+
+def register_counters(obj):
+    """obj needs counters() -> {name: int} and add_counters({name: int})"""
+    _counters.append(obj)
+
+
+def registered():
+    return list(_counters)
+
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+
+def add_jobs_argument(parser):
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=default_jobs(),
+        help="worker processes (default: CPU count, 1 runs serially)",
+    )
+
+
+def _run_chunk(fn, chunk):
+    before = [obj.counters() for obj in _counters]
+    results = [fn(item) for item in chunk]
+    deltas = []
+    for obj, start in zip(_counters, before):
+        deltas.append({k: v - start.get(k, 0) for k, v in obj.counters().items()})
+    return results, deltas
+
+
+def map_chunked(fn, items, jobs=None, chunksize=None, initializer=None, initargs=()):
+    items = list(items)
+    jobs = jobs or default_jobs()
+    if jobs <= 1 or len(items) < 2:
+        if initializer:
+            initializer(*initargs)
+        return [fn(item) for item in items]
+
+    if not chunksize:
+        # A few chunks per worker keeps the pool busy when actors differ in cost
+        chunksize = max(1, len(items) // (jobs * 4))
+    chunks = [items[i : i + chunksize] for i in range(0, len(items), chunksize)]
+
+    results = []
+    with ProcessPoolExecutor(min(jobs, len(chunks)), initializer=initializer, initargs=initargs) as ex:
+        futures = [ex.submit(_run_chunk, fn, chunk) for chunk in chunks]
+        for future in futures:
+            chunk_results, deltas = future.result()
+            results.extend(chunk_results)
+            for obj, delta in zip(_counters, deltas):
+                obj.add_counters(delta)
+    return results
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# On-disk cache of parsed game-data files shared by the generators.
+#
+# Parsed trees are pickled under a key made of the absolute path, size and
+#   mtime of the input, so a second run over an unchanged dump skips the
+#   YAML/JSON parsing entirely. The cache is pruned (least recently used
+#   first) to stay under a size limit when the process exits.
+#
+# Environment:
+#   OBJMAP_PARSE_CACHE=0         disable the cache
+#   OBJMAP_PARSE_CACHE_DIR=dir   cache location (default: .parse_cache)
+#   OBJMAP_PARSE_CACHE_MB=n      size limit in MiB (default: 2048)
+#
+#   ./tools/parse_cache.py [--prune] [--clear]  # print cache usage
+
+import atexit
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+import byml
+import profiling
+from parallel import register_counters
+from yaml_loader import load_yaml as _parse_yaml
+
+# Bump when the parsers change the shape of what they return
+VERSION = 3
+
+
+def _parse_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _load_entry(entry):
+    with open(entry, "rb") as f:
+        return pickle.load(f)
+
+
+_parse_json = profiling.timed("json", _parse_json)
+_parse_yaml = profiling.timed("yaml", _parse_yaml)
+_parse_byml = profiling.timed("byml", byml.load)
+_load_entry = profiling.timed("pickle", _load_entry)
+
+
+class ParseCache:
+    def __init__(self, root, max_bytes, enabled=True):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.bytes_written = 0
+
+    @classmethod
+    def from_env(cls):
+        enabled = os.environ.get("OBJMAP_PARSE_CACHE", "1") not in ["0", ""]
+        root = os.environ.get("OBJMAP_PARSE_CACHE_DIR", ".parse_cache")
+        max_mb = int(os.environ.get("OBJMAP_PARSE_CACHE_MB", "2048"))
+        return cls(root, max_mb * 1024 * 1024, enabled)
+
+    def entry_path(self, path, kind):
+        st = os.stat(path)
+        ident = f"{VERSION}\0{kind}\0{os.path.realpath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+        key = hashlib.sha1(ident.encode()).hexdigest()
+        return self.root / key[:2] / f"{key}.pickle"
+
+    def load(self, path, kind, parse):
+        if not self.enabled:
+            self.misses += 1
+            return parse(path)
+        entry = self.entry_path(path, kind)
+        try:
+            data = _load_entry(entry)
+            self.hits += 1
+            # Refresh the mtime so pruning evicts least recently used first
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+            return data
+        except OSError:
+            # Missing entry, or an unreadable cache directory
+            pass
+        except (pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            # Truncated or stale entry; reparse and overwrite it
+            pass
+        self.misses += 1
+        data = parse(path)
+        self.store(entry, data)
+        return data
+
+    def store(self, entry, data):
+        # The cache must never fail a run: an unwritable or full cache
+        #   directory disables it for the rest of the process
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        except OSError as e:
+            self.disable(e)
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                written = f.tell()
+            os.replace(tmp, entry)
+            self.bytes_written += written
+        except BaseException as e:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            if not isinstance(e, OSError):
+                raise
+            self.disable(e)
+
+    def disable(self, error):
+        print(f"parse cache: disabled, cannot write to {self.root}: {error}", file=sys.stderr)
+        self.enabled = False
+
+    def entries(self):
+        if not self.root.is_dir():
+            return []
+        out = []
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".pickle"):
+                    st = entry.stat()
+                    out.append((st.st_mtime, st.st_size, entry.path))
+        return out
+
+    def usage(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def prune(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.unlink(path)
+
+    def counters(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_written": self.bytes_written,
+        }
+
+    def add_counters(self, counters):
+        self.hits += counters.get("hits", 0)
+        self.misses += counters.get("misses", 0)
+        # Pool workers skip atexit, so the parent prunes for them
+        self.bytes_written += counters.get("bytes_written", 0)
+
+    def report(self, file=sys.stderr):
+        if not self.enabled or self.hits + self.misses == 0:
+            return
+        print(f"parse cache: {self.hits} hits, {self.misses} misses", file=file)
+
+    def close(self):
+        if self.enabled and self.bytes_written:
+            self.prune()
+
+
+cache = ParseCache.from_env()
+atexit.register(cache.close)
+register_counters(cache)
+
+
+def load_json(path):
+    return cache.load(path, "json", _parse_json)
+
+
+def load_yaml(path):
+    return cache.load(path, "yaml", _parse_yaml)
+
+
+def load_byml(path, zsdic=None):
+    """Reads .byml / .byml.zs game files directly (tools/byml.py)"""
+    return cache.load(path, "byml", functools.partial(_parse_byml, zsdic=zsdic))
+
+
+if __name__ == "__main__":
+    if "--clear" in sys.argv:
+        cache.clear()
+    if "--prune" in sys.argv:
+        print(f"removed {cache.prune()} entries")
+    entries = cache.entries()
+    print(f"{cache.root}: {len(entries)} entries, {cache.usage() / 1024 / 1024:.1f} MiB"
+          f" (limit {cache.max_bytes / 1024 / 1024:.0f} MiB)")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# Write .gz and .br siblings of the generated JSON files.
+#
+# Every *.json / *.geojson under the directory gets name.json.gz (gzip -9) and
+#   name.json.br (brotli quality 11) next to it, so the static host can serve
+#   precompressed bytes. Files whose sha256 matches the one recorded in
+#   .precompress.json (written alongside) are skipped. A sibling that would not
+#   be smaller than the file itself is not written, and siblings of deleted
+#   files are removed.
+#
+#   ./tools/precompress.py [public/game_files] [-j 8] [-f]
+#
+# brotli is optional (pip install brotli); without it only .gz is written.
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from json_stream import open_atomic
+from parallel import add_jobs_argument, map_chunked
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = ".precompress.json"
+EXTENSIONS = (".json", ".geojson")
+
+
+def encoders():
+    out = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        out[".br"] = lambda data: brotli.compress(data, quality=11)
+    return out
+
+
+def sources(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Skip the build driver's scratch directories and other hidden entries
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            if name.endswith(EXTENSIONS) and not name.startswith("."):
+                yield Path(dirpath) / name
+
+
+def compress(job):
+    """Returns (path, manifest entry, {suffix: size}), sizes being None if up to date"""
+    path, known, force = job
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if not force and known and known["sha256"] == digest:
+        if all(path.with_name(path.name + s).exists() for s in known["written"]):
+            return str(path), known, None
+    sizes = {"": len(data)}
+    for suffix, encode in encoders().items():
+        sibling = path.with_name(path.name + suffix)
+        packed = encode(data)
+        if len(packed) >= len(data):
+            if sibling.exists():
+                sibling.unlink()
+            continue
+        with open_atomic(sibling, "wb") as f:
+            f.write(packed)
+        sizes[suffix] = len(packed)
+    return str(path), {"sha256": digest, "written": sorted(s for s in sizes if s)}, sizes
+
+
+def remove_orphans(root):
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            stem, suffix = os.path.splitext(name)
+            if suffix in (".gz", ".br") and stem.endswith(EXTENSIONS) and stem not in filenames:
+                os.unlink(os.path.join(dirpath, name))
+                removed += 1
+    return removed
+
+
+def run(root, jobs=None, force=False, quiet=False):
+    root = Path(root)
+    manifest_path = root / MANIFEST
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+    # Redo everything if the set of encoders changed (brotli installed later)
+    suffixes = sorted(encoders())
+    if manifest.get("suffixes") != suffixes:
+        force = True
+    known = manifest.get("files", {})
+
+    jobs_in = [(path, known.get(path.relative_to(root).as_posix()), force) for path in sources(root)]
+    results = map_chunked(compress, jobs_in, jobs)
+
+    files, totals, updated = {}, {}, 0
+    if not quiet:
+        print(f"{'file':48} {'bytes':>10} " + " ".join(f"{s:>10}" for s in suffixes))
+    for path, entry, sizes in results:
+        rel = Path(path).relative_to(root).as_posix()
+        files[rel] = entry
+        if sizes is None:
+            continue
+        updated += 1
+        for suffix in [""] + suffixes:
+            totals[suffix] = totals.get(suffix, 0) + sizes.get(suffix, sizes[""])
+        if not quiet:
+            print(f"{rel:48} {sizes['']:>10} "
+                  + " ".join(f"{sizes[s]:>10}" if s in sizes else f"{'-':>10}" for s in suffixes))
+    if updated > 1 and not quiet:
+        raw = totals[""]
+        print(f"{'total':48} {raw:>10} "
+              + " ".join(f"{totals[s]:>10}" for s in suffixes)
+              + "  (" + ", ".join(f"{s} {totals[s] / raw:.0%}" for s in suffixes) + ")")
+    removed = remove_orphans(root)
+    print(f"{updated} compressed, {len(results) - updated} unchanged, {removed} stale removed",
+          file=sys.stderr)
+
+    with open_atomic(manifest_path) as f:
+        json.dump({"suffixes": suffixes, "files": files}, f, indent=2, sort_keys=True)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings of generated JSON files")
+    parser.add_argument("root", nargs="?", type=Path,
+                        default=Path(__file__).resolve().parent.parent / "public" / "game_files")
+    parser.add_argument("-f", "--force", action="store_true", help="recompress unchanged files")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no size table")
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    if not brotli:
+        print("brotli is not installed, only writing .gz", file=sys.stderr)
+    run(args.root, args.jobs, args.force, args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# Opt-in timing and profiling of the generators.
+#
+# Enabled with --profile [DIR] on a generator or OBJMAP_PROFILE=DIR in the
+#   environment (OBJMAP_PROFILE=1 means ./profile). On exit the generator
+#   writes DIR/<generator>.json:
+#
+#   {"generator", "argv", "started", "python", "wall", "cpu",
+#    "phases": {name: seconds},
+#    "parse": {"json" | "yaml" | "byml" | "pickle": {"files", "bytes", "seconds"}},
+#    "files_read", "bytes_parsed",
+#    "counters": {"ParseCache": {...}, "DocumentCache": {...}},
+#    "peak_rss_kb": {"self", "children"}}
+#
+#   Parse timings are recorded by parse_cache.py (pickle = parse cache hits)
+#   and summed back from pool workers like the other counters (parallel.py);
+#   DocumentCache.parent_loads counts $parent resolutions. With --cprofile or
+#   OBJMAP_PROFILE_CPROFILE=1 the main process is also run under cProfile and
+#   dumped to DIR/<generator>.prof (view with python -m pstats).
+#
+#   ./tools/get_horn_data.py --profile profile > /dev/null
+#   ./tools/profiling.py compare old/get_horn_data.json profile/get_horn_data.json
+
+import argparse
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import parallel
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+KINDS = ("json", "yaml", "byml", "pickle")
+
+
+def _env_dir():
+    value = os.environ.get("OBJMAP_PROFILE", "")
+    if value in ("", "0"):
+        return None
+    return "profile" if value == "1" else value
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    scale = 1024 if sys.platform == "darwin" else 1  # bytes on macOS
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+    }
+
+
+class Profiler:
+    def __init__(self, out_dir=None):
+        self.out_dir = out_dir
+        self.parse = {kind: {"files": 0, "bytes": 0, "seconds": 0.0} for kind in KINDS}
+        self.phases = {}
+        self.name = None
+        self.started = None
+        self.cprofile = None
+        self._mark = None
+
+    @property
+    def enabled(self):
+        return self.out_dir is not None
+
+    def record(self, kind, path, seconds):
+        stats = self.parse[kind]
+        stats["files"] += 1
+        stats["bytes"] += os.path.getsize(path)
+        stats["seconds"] += seconds
+
+    def timed(self, kind, parse):
+        """Wraps parse(path) so that its calls are recorded as kind"""
+
+        def wrapper(path, *args, **kwargs):
+            if not self.enabled:
+                return parse(path, *args, **kwargs)
+            start = time.perf_counter()
+            data = parse(path, *args, **kwargs)
+            self.record(kind, path, time.perf_counter() - start)
+            return data
+
+        return wrapper
+
+    def start(self, name, out_dir=None, cprofile=False):
+        if out_dir:
+            self.out_dir = out_dir
+        if not self.enabled:
+            return self
+        # Pool workers find out through the environment
+        os.environ["OBJMAP_PROFILE"] = os.path.abspath(self.out_dir)
+        self.name = name
+        self.started = (datetime.now(timezone.utc), time.perf_counter(), time.process_time())
+        if cprofile or os.environ.get("OBJMAP_PROFILE_CPROFILE", "") not in ("", "0"):
+            import cProfile
+
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        atexit.register(self.finish)
+        return self
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def mark(self, name=None):
+        """Ends the phase started by the previous mark() and starts phase name"""
+        now = time.perf_counter()
+        if self._mark:
+            self.add_phase(self._mark[0], now - self._mark[1])
+        self._mark = (name, now) if name else None
+
+    def counters(self):
+        if not self.enabled:
+            return {}
+        return {f"{kind}_{key}": value for kind, stats in self.parse.items() for key, value in stats.items()}
+
+    def add_counters(self, counters):
+        for name, value in counters.items():
+            kind, key = name.split("_", 1)
+            self.parse[kind][key] += value
+
+    def report(self):
+        started, wall, cpu = self.started
+        files = sum(stats["files"] for stats in self.parse.values())
+        return {
+            "generator": self.name,
+            "argv": sys.argv[1:],
+            "started": started.isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "wall": time.perf_counter() - wall,
+            "cpu": time.process_time() - cpu,
+            "phases": self.phases,
+            "parse": self.parse,
+            "files_read": files,
+            "bytes_parsed": sum(stats["bytes"] for stats in self.parse.values()),
+            "counters": {
+                type(obj).__name__: obj.counters() for obj in parallel.registered() if obj is not self
+            },
+            "peak_rss_kb": peak_rss_kb(),
+        }
+
+    def finish(self):
+        if not self.started:
+            return
+        self.mark()
+        if self.cprofile:
+            self.cprofile.disable()
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"{self.name}.json")
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        if self.cprofile:
+            self.cprofile.dump_stats(os.path.join(self.out_dir, f"{self.name}.prof"))
+        self.started = None
+        print(f"profile: {path}", file=sys.stderr)
+
+
+profiler = Profiler(_env_dir())
+parallel.register_counters(profiler)
+
+timed = profiler.timed
+phase = profiler.phase
+mark = profiler.mark
+
+
+def add_profile_argument(parser):
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profile",
+        metavar="DIR",
+        help="write a timing report to DIR/<generator>.json (default DIR: profile)",
+    )
+    parser.add_argument("--cprofile", action="store_true", help="with --profile, also dump cProfile stats")
+
+
+def start(name, args=None):
+    """Starts profiling if enabled by args (add_profile_argument) or OBJMAP_PROFILE"""
+    return profiler.start(
+        name,
+        getattr(args, "profile", None),
+        getattr(args, "cprofile", False),
+    )
+
+
+def _compare(old, new):
+    rows = [("wall", old.get("wall"), new["wall"]), ("cpu", old.get("cpu"), new["cpu"])]
+    for name in new["phases"]:
+        rows.append((f"phase {name}", old.get("phases", {}).get(name), new["phases"][name]))
+    for kind in KINDS:
+        rows.append((f"{kind} parse", old.get("parse", {}).get(kind, {}).get("seconds"), new["parse"][kind]["seconds"]))
+    old_rss = old.get("peak_rss_kb") or {}
+    for name, value in (new["peak_rss_kb"] or {}).items():
+        before = old_rss.get(name)
+        rows.append((f"peak rss {name} (MiB)", before / 1024 if before else None, value / 1024))
+    for name, a, b in rows:
+        change = f"{(b - a) / a:+8.1%}" if a else ""
+        print(f"{name:28} {'' if a is None else f'{a:10.3f}':>10} {b:10.3f} {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare generator timing reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("compare", help="print a report, or the change between two")
+    p.add_argument("reports", nargs="+", help="[old.json] new.json")
+    args = parser.parse_args()
+
+    reports = []
+    for path in args.reports[-2:]:
+        with open(path) as f:
+            reports.append(json.load(f))
+    _compare(reports[0] if len(reports) == 2 else {}, reports[-1])
+
+
+if __name__ == "__main__":
+    main()
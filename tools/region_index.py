@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# Point-to-region lookup over the ecosystem area polygons.
+#
+# A uniform grid over the map lists, for every cell, the polygons whose
+#   bounds overlap it and whether the cell's center lies inside each of them.
+#   A point is inside a polygon when the segment from the point to its cell's
+#   center crosses the polygon's edges within that cell an even number of
+#   times and the center is inside (or an odd number and it is not), so a
+#   lookup only looks at a few edges. The index is saved as a compact JSON file
+#   next to the GeoJSON, with the grid stored as flat offset/item arrays.
+#
+#   ./tools/region_index.py build public/game_files/ecosystem
+#   ./tools/region_index.py query public/game_files/ecosystem/region_index.json 1000 -2000
+#   ./tools/region_index.py bench public/game_files/ecosystem/region_index.json -n 1000000
+#
+# classify() labels many points at once and needs NumPy.
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import geo
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LAYERS = ["MapTower", "cave_polys", "sky_polys"]
+VERSION = 1
+
+
+def _feature_name(props):
+    for key in ["title", "group", "name"]:
+        if props.get(key):
+            return props[key]
+    return ""
+
+
+def _ring_contains(ring, x, z):
+    # ring: flat [x0, z0, x1, z1, ...], closed
+    inside = False
+    x1, z1 = ring[0], ring[1]
+    for i in range(2, len(ring), 2):
+        x2, z2 = ring[i], ring[i + 1]
+        if (z1 > z) != (z2 > z) and x < x1 + (z - z1) * (x2 - x1) / (z2 - z1):
+            inside = not inside
+        x1, z1 = x2, z2
+    return inside
+
+
+def _orient(ax, az, bx, bz, cx, cz):
+    return (bx - ax) * (cz - az) - (bz - az) * (cx - ax)
+
+
+def _crosses(px, pz, cx, cz, edge):
+    # Points on the line p-c count as being on its positive side, so a segment
+    #   passing through a vertex is counted once
+    ax, az, bx, bz = edge
+    oa = _orient(px, pz, cx, cz, ax, az) >= 0
+    ob = _orient(px, pz, cx, cz, bx, bz) >= 0
+    if oa == ob:
+        return False
+    return (_orient(ax, az, bx, bz, px, pz) > 0) != (_orient(ax, az, bx, bz, cx, cz) > 0)
+
+
+class Region:
+    def __init__(self, layer, key, name, bbox, rings):
+        self.layer = layer
+        self.key = key
+        self.name = name
+        # (xmin, zmin, xmax, zmax)
+        self.bbox = bbox
+        self.rings = rings
+
+    def contains(self, x, z):
+        xmin, zmin, xmax, zmax = self.bbox
+        if x < xmin or x > xmax or z < zmin or z > zmax:
+            return False
+        inside = False
+        for ring in self.rings:
+            if _ring_contains(ring, x, z):
+                inside = not inside
+        return inside
+
+    def to_json(self):
+        return {"layer": self.layer, "key": self.key, "name": self.name, "bbox": self.bbox, "rings": self.rings}
+
+
+class RegionIndex:
+    def __init__(self, regions, cell=250.0, origin=None, size=None, cells=None, inside=None):
+        self.regions = regions
+        self.cell = cell
+        if origin is None:
+            xmin = min(r.bbox[0] for r in regions)
+            zmin = min(r.bbox[1] for r in regions)
+            xmax = max(r.bbox[2] for r in regions)
+            zmax = max(r.bbox[3] for r in regions)
+            origin = [math.floor(xmin / cell) * cell, math.floor(zmin / cell) * cell]
+            size = [int((xmax - origin[0]) // cell) + 1, int((zmax - origin[1]) // cell) + 1]
+        self.origin = origin
+        self.cols, self.rows = size
+        self.cells = cells if cells is not None else self._build_cells()
+        # Per cell, parallel to cells: is the cell's center inside the region
+        self.inside = inside if inside is not None else self._center_status()
+        self.edges = self._cell_edges()
+
+    @classmethod
+    def from_files(cls, directory, layers=LAYERS, cell=250.0, precision=3):
+        regions = []
+        for layer in layers:
+            doc = geo.load(Path(directory) / f"{layer}.json")
+            if "features" in doc:
+                items = [(str(i), f.get("properties") or {}, f["geometry"]) for i, f in enumerate(doc["features"])]
+            else:
+                items = [(key, g.get("properties") or {}, g) for key, geoms in doc.items() for g in geoms]
+            for key, props, geom in items:
+                for poly in geo.polygons(geom):
+                    rings = [[round(v, precision) for pt in ring for v in pt[:2]] for ring in poly]
+                    xs = [v for ring in rings for v in ring[0::2]]
+                    zs = [v for ring in rings for v in ring[1::2]]
+                    bbox = [min(xs), min(zs), max(xs), max(zs)]
+                    regions.append(Region(layer, key, _feature_name(props), bbox, rings))
+        return cls(regions, cell)
+
+    def _cell_range(self, bbox):
+        x0, z0 = self.origin
+        c0 = max(0, int((bbox[0] - x0) // self.cell))
+        c1 = min(self.cols - 1, int((bbox[2] - x0) // self.cell))
+        r0 = max(0, int((bbox[1] - z0) // self.cell))
+        r1 = min(self.rows - 1, int((bbox[3] - z0) // self.cell))
+        return c0, c1, r0, r1
+
+    def _build_cells(self):
+        cells = [[] for _ in range(self.cols * self.rows)]
+        for i, region in enumerate(self.regions):
+            c0, c1, r0, r1 = self._cell_range(region.bbox)
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    cells[row * self.cols + col].append(i)
+        return cells
+
+    def center(self, n):
+        row, col = divmod(n, self.cols)
+        return self.origin[0] + (col + 0.5) * self.cell, self.origin[1] + (row + 0.5) * self.cell
+
+    def _center_status(self):
+        status = []
+        for n, cell in enumerate(self.cells):
+            cx, cz = self.center(n)
+            status.append([self.regions[i].contains(cx, cz) for i in cell])
+        return status
+
+    def _cell_edges(self):
+        # (cell, region) -> edges whose bounds overlap the cell
+        edges = {}
+        slots = [{i: k for k, i in enumerate(cell)} for cell in self.cells]
+        for i, region in enumerate(self.regions):
+            for ring in region.rings:
+                for j in range(0, len(ring) - 2, 2):
+                    edge = (ring[j], ring[j + 1], ring[j + 2], ring[j + 3])
+                    bbox = [min(edge[0], edge[2]), min(edge[1], edge[3]), max(edge[0], edge[2]), max(edge[1], edge[3])]
+                    c0, c1, r0, r1 = self._cell_range(bbox)
+                    for row in range(r0, r1 + 1):
+                        for col in range(c0, c1 + 1):
+                            n = row * self.cols + col
+                            edges.setdefault((n, slots[n][i]), []).append(edge)
+        return edges
+
+    def cell_of(self, x, z):
+        col = int((x - self.origin[0]) // self.cell)
+        row = int((z - self.origin[1]) // self.cell)
+        if col < 0 or row < 0 or col >= self.cols or row >= self.rows:
+            return -1
+        return row * self.cols + col
+
+    def query(self, x, z, layer=None):
+        """Regions containing the point (x, z), optionally limited to one layer"""
+        n = self.cell_of(x, z)
+        if n < 0:
+            return []
+        cx, cz = self.center(n)
+        out = []
+        for k, i in enumerate(self.cells[n]):
+            region = self.regions[i]
+            if layer is not None and region.layer != layer:
+                continue
+            inside = self.inside[n][k]
+            for edge in self.edges.get((n, k), ()):
+                if _crosses(x, z, cx, cz, edge):
+                    inside = not inside
+            if inside:
+                out.append(region)
+        return out
+
+    def classify(self, xs, zs, layer):
+        """Index into self.regions of the first `layer` region containing each point, or -1"""
+        if np is None:
+            raise RuntimeError("classify() requires numpy")
+        xs = np.asarray(xs, dtype=np.float64)
+        zs = np.asarray(zs, dtype=np.float64)
+        result = np.full(len(xs), -1, dtype=np.int32)
+        for i, region in enumerate(self.regions):
+            if region.layer != layer:
+                continue
+            xmin, zmin, xmax, zmax = region.bbox
+            cand = np.nonzero((result < 0) & (xs >= xmin) & (xs <= xmax) & (zs >= zmin) & (zs <= zmax))[0]
+            if not len(cand):
+                continue
+            # Sorted by z, the points crossed by an edge's ray are a contiguous slice
+            cand = cand[np.argsort(zs[cand], kind="stable")]
+            px, pz = xs[cand], zs[cand]
+            inside = np.zeros(len(cand), dtype=bool)
+            for ring in region.rings:
+                r = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+                x1, z1, x2, z2 = r[:-1, 0], r[:-1, 1], r[1:, 0], r[1:, 1]
+                lo = np.searchsorted(pz, np.minimum(z1, z2), "left")
+                hi = np.searchsorted(pz, np.maximum(z1, z2), "left")
+                for j in np.nonzero(hi > lo)[0]:
+                    a, b = lo[j], hi[j]
+                    xint = x1[j] + (pz[a:b] - z1[j]) * (x2[j] - x1[j]) / (z2[j] - z1[j])
+                    inside[a:b] ^= px[a:b] < xint
+            result[cand[inside]] = i
+        return result
+
+    def to_json(self):
+        offsets, items, inside = [0], [], []
+        for cell, status in zip(self.cells, self.inside):
+            items.extend(cell)
+            inside.extend(int(v) for v in status)
+            offsets.append(len(items))
+        return {
+            "version": VERSION,
+            "cell": self.cell,
+            "origin": self.origin,
+            "size": [self.cols, self.rows],
+            "regions": [r.to_json() for r in self.regions],
+            "cell_offsets": offsets,
+            "cell_items": items,
+            "cell_inside": inside,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get("version") != VERSION:
+            raise ValueError("unsupported region index version", data.get("version"))
+        regions = [Region(r["layer"], r["key"], r["name"], r["bbox"], r["rings"]) for r in data["regions"]]
+        offsets, items, inside = data["cell_offsets"], data["cell_items"], data["cell_inside"]
+        cells = [items[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1)]
+        status = [[bool(v) for v in inside[offsets[i] : offsets[i + 1]]] for i in range(len(offsets) - 1)]
+        return cls(regions, data["cell"], data["origin"], data["size"], cells, status)
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_json(), f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_json(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point-to-region index over ecosystem polygons")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build")
+    p.add_argument("directory", type=Path, help="directory holding the ecosystem GeoJSON")
+    p.add_argument("-o", "--output", type=Path, help="default: directory/region_index.json")
+    p.add_argument("--cell", type=float, default=250.0, help="grid cell size in map units")
+    p.add_argument("--layers", nargs="+", default=LAYERS)
+    p = sub.add_parser("query")
+    p.add_argument("index", type=Path)
+    p.add_argument("x", type=float)
+    p.add_argument("z", type=float)
+    p = sub.add_parser("bench")
+    p.add_argument("index", type=Path)
+    p.add_argument("-n", type=int, default=100000, help="points for the batch benchmark")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = RegionIndex.from_files(args.directory, args.layers, args.cell)
+        output = args.output or args.directory / "region_index.json"
+        index.save(output)
+        print(f"{output}: {len(index.regions)} regions, {index.cols}x{index.rows} cells,"
+              f" {os.path.getsize(output)} bytes")
+    elif args.command == "query":
+        index = RegionIndex.load(args.index)
+        for region in index.query(args.x, args.z):
+            print(f"{region.layer:12} {region.key:>4} {region.name}")
+    else:
+        index = RegionIndex.load(args.index)
+        x0, z0 = index.origin
+        x1, z1 = x0 + index.cols * index.cell, z0 + index.rows * index.cell
+        rng = random.Random(0)
+        points = [(rng.uniform(x0, x1), rng.uniform(z0, z1)) for _ in range(10000)]
+        start = time.perf_counter()
+        for x, z in points:
+            index.query(x, z)
+        elapsed = time.perf_counter() - start
+        print(f"query:    {elapsed / len(points) * 1e6:.1f} us/point")
+        if np is None:
+            print("classify: skipped, numpy is not installed", file=sys.stderr)
+            return
+        gen = np.random.default_rng(0)
+        xs, zs = gen.uniform(x0, x1, args.n), gen.uniform(z0, z1, args.n)
+        for layer in sorted({r.layer for r in index.regions}):
+            start = time.perf_counter()
+            found = index.classify(xs, zs, layer)
+            elapsed = time.perf_counter() - start
+            print(f"classify: {layer:12} {args.n} points in {elapsed:.2f}s,"
+                  f" {int((found >= 0).sum())} inside")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# Static trigram search index over names, map text and object summaries.
+#
+# Documents come from names.json (actor -> name), text/*/*.json (label ->
+#   text), the static.json markers and optionally every object of a radar
+#   map.db. Each has an "actor" and a "name" field (plus "hash" for objects),
+#   and is indexed under the trigrams of those fields; every field value is
+#   prefixed with \x02 so that trigrams can also anchor a term at its start.
+#
+# Output directory:
+#   manifest.json         document count, shard sizes, sources
+#   docs/NNNN.json        documents, DOC_SHARD per file, in id order
+#   postings/NN.bin       b"OMSP", u32 header length, JSON {gram: [offset,
+#                         length, count]}, then the posting lists: increasing
+#                         document ids as delta encoded LEB128 varints.
+#                         A gram lives in shard crc32(gram) % shards.
+#
+# Queries follow the radar syntax: terms are ANDed, OR separates
+#   alternatives, NOT excludes, actor: / name: / hash: restrict a term to a
+#   field, ^ anchors it to the start of the field and "..." keeps spaces.
+#   Terms match case-insensitively as substrings; trigrams only select the
+#   candidates, which are then checked against the documents. Terms shorter
+#   than a trigram fall back to scanning.
+#
+#   ./tools/search_index.py build search/ [--game-files public/game_files] [--map-db map.db]
+#   ./tools/search_index.py query search/ 'actor:^"TBox_" NOT name:Ore'
+#   ./tools/search_index.py bench search/
+#   ./tools/search_index.py serve search/ --port 8001
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from json_stream import open_atomic
+
+MAGIC = b"OMSP"
+VERSION = 1
+DOC_SHARD = 1024
+POSTING_SHARDS = 16
+ANCHOR = "\x02"
+FIELDS = ("actor", "name", "hash")
+
+
+def encode_postings(ids):
+    out = bytearray()
+    last = 0
+    for i in ids:
+        delta = i - last
+        last = i
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_postings(data):
+    ids = []
+    value = shift = last = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        last += value
+        ids.append(last)
+        value = shift = 0
+    return ids
+
+
+def grams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def doc_grams(doc):
+    out = set()
+    for field in FIELDS:
+        if doc.get(field):
+            out |= grams(ANCHOR + doc[field].casefold())
+    return out
+
+
+def shard_of(gram, shards):
+    return zlib.crc32(gram.encode()) % shards
+
+
+# Document sources
+
+
+def name_docs(game_files):
+    with open(game_files / "names.json") as f:
+        names = json.load(f)
+    for actor, name in names.items():
+        if isinstance(name, str):
+            yield {"kind": "actor", "actor": actor, "name": name}
+
+
+def text_docs(game_files):
+    for path in sorted((game_files / "text").glob("*/*.json")):
+        file = path.relative_to(game_files / "text").with_suffix("").as_posix()
+        with open(path) as f:
+            messages = json.load(f)
+        for label, text in messages.items():
+            if isinstance(text, str):
+                yield {"kind": "msg", "file": file, "actor": label, "name": text}
+
+
+def marker_docs(game_files):
+    path = game_files / "map_summary" / "MainField" / "static.json"
+    with open(path) as f:
+        markers = json.load(f)["markers"]
+    texts = {}
+    for file in ("StaticMsg/LocationMarker", "StaticMsg/Dungeon"):
+        try:
+            with open(game_files / "text" / f"{file}.json") as f:
+                texts.update((k, v) for k, v in json.load(f).items() if isinstance(v, str))
+        except FileNotFoundError:
+            pass
+    for category in sorted(markers):
+        for item in markers[category]:
+            actor = item.get("MessageID", item.get("id"))
+            if not isinstance(actor, str):
+                actor = "".join(actor)
+            pt = item["Translate"]
+            yield {
+                "kind": "marker",
+                "category": category,
+                "actor": actor,
+                "name": texts.get(actor, item.get("name", "")),
+                "hash": item["hash_id"],
+                "pos": [pt["X"], pt["Y"], pt["Z"]],
+            }
+
+
+def object_docs(db_path):
+    import map_db
+
+    for obj in map_db.objects(map_db.connect(db_path)):
+        yield {
+            "kind": "obj",
+            "objid": obj["objid"],
+            "actor": obj["name"],
+            "name": obj["ui_name"] or "",
+            # hash_id is decimal or 0x hex depending on the radar version
+            "hash": f"0x{int(obj['hash_id'], 0):016x}" if obj["hash_id"] else "",
+            "map_type": obj["map_type"],
+            "map_name": obj["map_name"],
+            "pos": obj["pos"],
+        }
+
+
+def build(out, game_files, map_db=None, shards=POSTING_SHARDS):
+    tmp = Path(f"{out}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    (tmp / "docs").mkdir(parents=True)
+    (tmp / "postings").mkdir()
+
+    sources = [name_docs(game_files), text_docs(game_files), marker_docs(game_files)]
+    if map_db:
+        sources.append(object_docs(map_db))
+
+    postings = {}
+    count = 0
+    batch = []
+
+    def flush():
+        with open(tmp / "docs" / f"{(count - 1) // DOC_SHARD:04d}.json", "w") as f:
+            json.dump(batch, f, separators=(",", ":"))
+        batch.clear()
+
+    # Documents are streamed; only the posting lists are kept in memory
+    for source in sources:
+        for doc in source:
+            for gram in doc_grams(doc):
+                postings.setdefault(gram, []).append(count)
+            batch.append(doc)
+            count += 1
+            if len(batch) == DOC_SHARD:
+                flush()
+    if batch:
+        flush()
+
+    by_shard = [{} for _ in range(shards)]
+    for gram, ids in postings.items():
+        by_shard[shard_of(gram, shards)][gram] = ids
+    for n, shard in enumerate(by_shard):
+        header, blob = {}, bytearray()
+        for gram in sorted(shard):
+            data = encode_postings(shard[gram])
+            header[gram] = [len(blob), len(data), len(shard[gram])]
+            blob += data
+        head = json.dumps(header, separators=(",", ":")).encode()
+        with open(tmp / "postings" / f"{n:02d}.bin", "wb") as f:
+            f.write(MAGIC + struct.pack("<II", VERSION, len(head)) + head + blob)
+
+    manifest = {
+        "version": VERSION,
+        "docs": count,
+        "doc_shard": DOC_SHARD,
+        "posting_shards": shards,
+        "grams": len(postings),
+        "sources": ["names.json", "text", "static.json"] + (["map.db"] if map_db else []),
+    }
+    with open_atomic(tmp / "manifest.json") as f:
+        json.dump(manifest, f, indent=2)
+    old = Path(f"{out}.old")
+    if Path(out).exists():
+        os.rename(out, old)
+    os.rename(tmp, out)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+# Queries
+
+TOKEN_RE = re.compile(r'\s*(?:(?P<field>actor|name|hash):)?(?P<anchor>\^)?(?:"(?P<quoted>[^"]*)"|(?P<word>[^\s"]+))')
+
+
+class Term:
+    def __init__(self, text, field=None, anchored=False, negated=False):
+        self.text = text.casefold()
+        self.field = field
+        self.anchored = anchored
+        self.negated = negated
+
+    def grams(self):
+        return grams(ANCHOR + self.text if self.anchored else self.text)
+
+    def matches(self, doc):
+        for field in [self.field] if self.field else FIELDS:
+            value = doc.get(field)
+            if not value:
+                continue
+            value = value.casefold()
+            if value.startswith(self.text) if self.anchored else self.text in value:
+                return True
+        return False
+
+
+def parse_query(query):
+    """Returns a list of alternatives, each a list of Terms to AND"""
+    clauses = [[]]
+    negate = False
+    pos = 0
+    while True:
+        m = TOKEN_RE.match(query, pos)
+        if not m or not m.group(0).strip():
+            break
+        pos = m.end()
+        word = m.group("word")
+        if word in ("OR", "AND", "NOT") and not m.group("field") and not m.group("anchor"):
+            if word == "OR" and clauses[-1]:
+                clauses.append([])
+            negate = word == "NOT"
+            continue
+        text = m.group("quoted") if m.group("quoted") is not None else word.rstrip("*")
+        if text:
+            clauses[-1].append(Term(text, m.group("field"), bool(m.group("anchor")), negate))
+        negate = False
+    return [c for c in clauses if any(not t.negated for t in c)]
+
+
+class SearchIndex:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "manifest.json") as f:
+            self.manifest = json.load(f)
+        self._postings = {}
+        self._docs = {}
+        # Shards are loaded on demand, possibly from several server threads
+        self._lock = threading.Lock()
+
+    def _posting_shard(self, n):
+        if n not in self._postings:
+            with self._lock:
+                if n not in self._postings:
+                    data = (self.path / "postings" / f"{n:02d}.bin").read_bytes()
+                    if data[:4] != MAGIC:
+                        raise ValueError(f"postings/{n:02d}.bin: not a posting shard")
+                    _, head_len = struct.unpack_from("<II", data, 4)
+                    start = 12 + head_len
+                    self._postings[n] = (json.loads(data[12:start]), memoryview(data)[start:])
+        return self._postings[n]
+
+    def postings(self, gram):
+        header, blob = self._posting_shard(shard_of(gram, self.manifest["posting_shards"]))
+        if gram not in header:
+            return []
+        offset, length, _ = header[gram]
+        return decode_postings(blob[offset : offset + length])
+
+    def doc(self, i):
+        n = i // self.manifest["doc_shard"]
+        if n not in self._docs:
+            with self._lock:
+                if n not in self._docs:
+                    with open(self.path / "docs" / f"{n:04d}.json") as f:
+                        self._docs[n] = json.load(f)
+        return self._docs[n][i % self.manifest["doc_shard"]]
+
+    def _candidates(self, terms):
+        needed = set()
+        for term in terms:
+            if not term.negated:
+                needed |= term.grams()
+        if not needed:
+            return range(self.manifest["docs"])
+        lists = sorted((self.postings(g) for g in needed), key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return sorted(result)
+
+    def search(self, query, limit=5000):
+        found = set()
+        for terms in parse_query(query):
+            for i in self._candidates(terms):
+                if i in found:
+                    continue
+                doc = self.doc(i)
+                if all(t.matches(doc) != t.negated for t in terms):
+                    found.add(i)
+        ids = sorted(found)
+        return [self.doc(i) for i in (ids[:limit] if limit >= 0 else ids)]
+
+
+def scan(index, query):
+    """Reference implementation checking every document"""
+    out = []
+    clauses = parse_query(query)
+    for i in range(index.manifest["docs"]):
+        doc = index.doc(i)
+        if any(all(t.matches(doc) != t.negated for t in terms) for terms in clauses):
+            out.append(doc)
+    return out
+
+
+def bench(path, count=200, seed=0):
+    index = SearchIndex(path)
+    rng = random.Random(seed)
+    docs = [index.doc(i) for i in range(index.manifest["docs"])]
+    queries = ['actor:^"TBox_"', "Zonaite Deposit", "Weapon_ NOT actor:^Enemy_", "name:Shrine OR name:Tower"]
+    while len(queries) < count:
+        name = rng.choice(docs)["name"]
+        if len(name) >= 4:
+            start = rng.randrange(len(name) - 3)
+            queries.append('"' + name[start : start + rng.randint(3, 8)] + '"')
+
+    for query in queries[:20]:
+        if [d for d in index.search(query, -1)] != scan(index, query):
+            raise ValueError(f"index and scan disagree for {query}")
+
+    cold = SearchIndex(path)
+    start = time.perf_counter()
+    hits = sum(len(cold.search(q)) for q in queries)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for q in queries:
+        cold.search(q)
+    warm = time.perf_counter() - start
+    start = time.perf_counter()
+    for q in queries[:20]:
+        scan(index, q)
+    scanned = time.perf_counter() - start
+    size = sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+    print(f"{index.manifest['docs']} documents, {index.manifest['grams']} trigrams, {size} bytes")
+    print(f"{len(queries)} queries, {hits} results")
+    print(f"cold  {first / len(queries) * 1000:8.3f} ms/query (loads shards on demand)")
+    print(f"warm  {warm / len(queries) * 1000:8.3f} ms/query")
+    print(f"scan  {scanned / 20 * 1000:8.3f} ms/query (no index)")
+
+
+def serve(path, port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    index = SearchIndex(path)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/search":
+                self.send_error(404)
+                return
+            params = parse_qs(url.query)
+            try:
+                limit = int(params.get("limit", ["5000"])[0])
+            except ValueError:
+                self.send_error(400, "limit must be an integer")
+                return
+            body = json.dumps(index.search(params.get("q", [""])[0], limit)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    print(f"serving {path} on http://localhost:{port}/search?q=", file=sys.stderr)
+    ThreadingHTTPServer(("", port), Handler).serve_forever()
+
+
+def main():
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Static search index over names, text and objects")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build")
+    p.add_argument("output", type=Path)
+    p.add_argument("--game-files", type=Path, default=root / "public" / "game_files")
+    p.add_argument("--map-db", help="also index every object of a radar map.db")
+    p.add_argument("--shards", type=int, default=POSTING_SHARDS, help="posting list shards")
+    p = sub.add_parser("query")
+    p.add_argument("index", type=Path)
+    p.add_argument("query")
+    p.add_argument("-l", "--limit", type=int, default=5000)
+    p = sub.add_parser("bench")
+    p.add_argument("index", type=Path)
+    p = sub.add_parser("serve")
+    p.add_argument("index", type=Path)
+    p.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        manifest = build(args.output, args.game_files, args.map_db, args.shards)
+        print(f"{manifest['docs']} documents, {manifest['grams']} trigrams -> {args.output}")
+    elif args.command == "query":
+        for doc in SearchIndex(args.index).search(args.query, args.limit):
+            print(json.dumps(doc))
+    elif args.command == "bench":
+        bench(args.index)
+    else:
+        serve(args.index, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Simplify and quantize the ecosystem polygon files.
+#
+# Rings are simplified with Douglas-Peucker at a tolerance given in map units
+#   and coordinates are rounded to a fixed number of decimals. Rings are only
+#   cut where neighbouring areas part ways, and simplified in the same
+#   direction, so shared boundaries simplify to the same vertices on both
+#   sides. The xmin/xmax/zmin/zmax properties of cave_polys are recomputed.
+#
+#   ./tools/simplify_polys.py -t 0.5 -p 2 -o out/ public/game_files/ecosystem/*.json
+#   ./tools/simplify_polys.py --in-place public/game_files/ecosystem/MapTower.json
+
+import argparse
+import os
+from pathlib import Path
+
+import geo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simplify and quantize ecosystem GeoJSON")
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("-t", "--tolerance", type=float, default=0.5, help="map units (default: 0.5)")
+    parser.add_argument("-p", "--precision", type=int, default=2, help="decimals kept (default: 2)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-o", "--output", type=Path, help="output directory")
+    group.add_argument("--in-place", action="store_true")
+    args = parser.parse_args()
+
+    if args.output:
+        args.output.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'file':28} {'vertices':>17} {'bytes':>21}")
+    totals = [0, 0, 0, 0]
+    for path in args.files:
+        doc = geo.load(path)
+        size = os.path.getsize(path)
+        count = geo.vertex_count(doc)
+        text = geo.dumps(geo.simplify(doc, args.tolerance, args.precision))
+        new_count = geo.vertex_count(doc)
+
+        dest = path if args.in_place else args.output / path.name
+        tmp = dest.with_suffix(dest.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, dest)
+        new_size = os.path.getsize(dest)
+
+        for i, v in enumerate([count, new_count, size, new_size]):
+            totals[i] += v
+        print(f"{path.name:28} {count:>7} -> {new_count:>7} {size:>9} -> {new_size:>9}"
+              f" ({new_size / size:.0%})")
+    count, new_count, size, new_size = totals
+    if len(args.files) > 1 and size:
+        print(f"{'total':28} {count:>7} -> {new_count:>7} {size:>9} -> {new_size:>9}"
+              f" ({new_size / size:.0%})")
+
+
+if __name__ == "__main__":
+    main()
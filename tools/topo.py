@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Shared-boundary (TopoJSON-style) encoding of the ecosystem polygon files.
+#
+# Coordinates are quantized to integers on a grid of `quantum` map units and
+#   rings are cut into arcs at junctions (where neighbouring areas part ways).
+#   Every arc is stored once and delta-encoded; rings refer to arcs by index,
+#   ~i meaning arc i reversed. The rest of the document (layers, features,
+#   properties) is kept as is, with each polygon's "coordinates" replaced by
+#   "arcs":
+#
+#   {"type": "Topology",
+#    "transform": {"scale": [q, q], "translate": [x0, z0]},
+#    "arcs": [[[x, z], [dx, dz], ...], ...],
+#    "objects": <original document>}
+#
+#   ./tools/topo.py encode public/game_files/ecosystem/MapTower.json MapTower.topo.json
+#   ./tools/topo.py decode MapTower.topo.json MapTower.json
+
+import argparse
+import copy
+
+import geo
+
+
+def _quantize(ring, x0, z0, quantum):
+    out = []
+    for pt in ring:
+        q = (round((pt[0] - x0) / quantum), round((pt[1] - z0) / quantum))
+        if not out or q != out[-1]:
+            out.append(q)
+    if len(out) > 1 and out[0] == out[-1]:
+        out.pop()
+    return out
+
+
+def _cut(ring, junctions):
+    """Splits an open ring (no closing point) into arcs"""
+    cuts = [i for i, pt in enumerate(ring) if pt in junctions]
+    if not cuts:
+        # Start closed loops at their smallest point so identical rings match
+        start = ring.index(min(ring))
+        ring = ring[start:] + ring[:start]
+        return [ring + [ring[0]]]
+    ring = ring[cuts[0] :] + ring[: cuts[0]]
+    cuts = [i - cuts[0] for i in cuts] + [len(ring)]
+    ring = ring + [ring[0]]
+    return [ring[a : b + 1] for a, b in zip(cuts, cuts[1:])]
+
+
+def _delta(arc):
+    out = [list(arc[0])]
+    for (x0, z0), (x1, z1) in zip(arc, arc[1:]):
+        out.append([x1 - x0, z1 - z0])
+    return out
+
+
+def encode(doc, quantum=0.01):
+    doc = copy.deepcopy(doc)
+    all_rings = list(geo.rings(doc))
+    if not all_rings:
+        raise ValueError("no polygons in document")
+    x0 = min(pt[0] for ring in all_rings for pt in ring)
+    z0 = min(pt[1] for ring in all_rings for pt in ring)
+
+    quantized = [_quantize(ring, x0, z0, quantum) for ring in all_rings]
+    junctions = geo.junctions([ring + ring[:1] for ring in quantized])
+
+    arcs, index = [], {}
+
+    def arc_ref(arc):
+        key = tuple(arc)
+        if key in index:
+            return index[key]
+        rkey = key[::-1]
+        if rkey in index:
+            return ~index[rkey]
+        index[key] = len(arcs)
+        arcs.append(arc)
+        return index[key]
+
+    it = iter(quantized)
+    for geom in geo.geometries(doc):
+        polys = geo.polygons(geom)
+        if not polys:
+            continue
+        refs = [[[arc_ref(arc) for arc in _cut(next(it), junctions)] for _ in poly] for poly in polys]
+        del geom["coordinates"]
+        geom["arcs"] = refs[0] if geom["type"] == "Polygon" else refs
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": [quantum, quantum], "translate": [x0, z0]},
+        "arcs": [_delta(arc) for arc in arcs],
+        "objects": doc,
+    }
+
+
+def decode(topo):
+    doc = copy.deepcopy(topo["objects"])
+    (sx, sz), (tx, tz) = topo["transform"]["scale"], topo["transform"]["translate"]
+
+    arcs = []
+    for arc in topo["arcs"]:
+        x = z = 0
+        points = []
+        for dx, dz in arc:
+            x += dx
+            z += dz
+            points.append((x, z))
+        arcs.append(points)
+
+    def ring(refs):
+        out = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            out.extend(arc if not out else arc[1:])
+        return [[x * sx + tx, z * sz + tz] for x, z in out]
+
+    for geom in geo.geometries(doc):
+        if "arcs" not in geom:
+            continue
+        refs = geom.pop("arcs")
+        if geom["type"] == "Polygon":
+            geom["coordinates"] = [ring(r) for r in refs]
+        else:
+            geom["coordinates"] = [[ring(r) for r in poly] for poly in refs]
+    return doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-boundary encoding of ecosystem polygons")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("encode")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("-q", "--quantum", type=float, default=0.01, help="grid size in map units")
+    p = sub.add_parser("decode")
+    p.add_argument("input")
+    p.add_argument("output")
+    args = parser.parse_args()
+
+    if args.command == "encode":
+        with open(args.output, "w") as f:
+            f.write(geo.dumps(encode(geo.load(args.input), args.quantum)))
+    else:
+        with open(args.output, "w") as f:
+            f.write(geo.dumps(decode(geo.load(args.input))))
+
+
+if __name__ == "__main__":
+    main()
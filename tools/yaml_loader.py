@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Shared YAML loader for the BYML/AAMP/msyt exports read by the generators.
+#
+# The tags written by the byml/aamp converters (!u, !io, !list, !obj, ...)
+#   are registered once here on top of libyaml (yaml.CSafeLoader). When PyYAML
+#   was built without libyaml the pure-Python SafeLoader is used instead.
+#
+# Benchmark:
+#   ./tools/yaml_loader.py Actor/GeneralParamList/Enemy_Bokoblin_Junior.gparamlist.yml
+
+import sys
+import time
+
+import yaml
+
+try:
+    _BaseLoader = yaml.CSafeLoader
+    HAS_LIBYAML = True
+except AttributeError:
+    _BaseLoader = yaml.SafeLoader
+    HAS_LIBYAML = False
+
+
+class Loader(_BaseLoader):
+    pass
+
+
+def u_constrt(loader, node):
+    return node.value
+
+
+def io_constrt(loader, node):
+    value = loader.construct_mapping(node)
+    return value
+
+
+def list_constrt(loader, node):
+    value = loader.construct_mapping(node)
+    return value
+
+
+def obj_constrt(loader, node):
+    value = loader.construct_mapping(node)
+    return value
+
+
+def str_constrt(loader, node):
+    return node.value
+
+
+def vec_constrt(loader, node):
+    # Components are kept as their raw scalar text
+    if isinstance(node, yaml.SequenceNode):
+        return [v.value for v in node.value]
+    return node.value
+
+
+Loader.add_constructor("!u", u_constrt)
+Loader.add_constructor("!io", io_constrt)
+Loader.add_constructor("!color", vec_constrt)
+Loader.add_constructor("!list", list_constrt)
+Loader.add_constructor("!obj", obj_constrt)
+Loader.add_constructor("!str64", str_constrt)
+Loader.add_constructor("!str32", str_constrt)
+Loader.add_constructor("!str256", str_constrt)
+Loader.add_constructor("!vec3", vec_constrt)
+
+
+def load_yaml(path):
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=Loader)
+
+
+def loads_yaml(text):
+    return yaml.load(text, Loader=Loader)
+
+
+def _legacy_loader():
+    # The per-script FullLoader setup this module replaces, for comparison
+    class LegacyLoader(yaml.FullLoader):
+        pass
+
+    for tag in ["!io", "!list", "!obj"]:
+        LegacyLoader.add_constructor(tag, io_constrt)
+    for tag in ["!u", "!str64", "!str32", "!str256"]:
+        LegacyLoader.add_constructor(tag, str_constrt)
+    for tag in ["!color", "!vec3"]:
+        LegacyLoader.add_constructor(tag, vec_constrt)
+    return LegacyLoader
+
+
+def benchmark(paths, repeat=5):
+    legacy = _legacy_loader()
+    print(f"libyaml: {HAS_LIBYAML}")
+    print(f"{'file':50} {'FullLoader':>12} {'shared':>12} {'speedup':>8}")
+    for path in paths:
+        with open(path, "r") as f:
+            text = f.read()
+        timings = []
+        for loader in [legacy, Loader]:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                yaml.load(text, Loader=loader)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+        old, new = timings
+        print(f"{path[-50:]:50} {old * 1000:10.2f}ms {new * 1000:10.2f}ms {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"usage: {sys.argv[0]} file.yml [file.yml ...]")
+        sys.exit(1)
+    benchmark(sys.argv[1:])